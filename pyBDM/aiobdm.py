@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import abc
+
+from pyBDM.bdm import (RegisterContext, BACKGROUND, ACK_ENABLE, ACK_DISABLE, READ_BD_BYTE, READ_BD_WORD, READ_BYTE, READ_WORD,
+    WRITE_BD_BYTE, WRITE_BD_WORD, WRITE_BYTE, WRITE_WORD, READ_NEXT, READ_PC, READ_D, READ_X, READ_Y, READ_SP,
+    WRITE_NEXT, WRITE_PC, WRITE_D, WRITE_X, WRITE_Y, WRITE_SP, GO_UNTIL, GO, TRACE1, TAGGO, PPAGE, MEMORY_HIGH,
+    RESET_VECTOR, bufferChunks, byteView, chunks, dataView, decodeWord, fillChunks
+)
+from pyBDM.logger import Logger
+from pyBDM.s12.BdmpModule import BDMCCR
+
+abstractmethod = abc.abstractmethod
+
+
+class AsyncBDMBase(object):
+    """ .. class:: AsyncBDMBase
+
+        asyncio counterpart of :class:`pyBDM.bdm.BDMBase`.
+
+        Every accessor is a coroutine, a pod serializes its own commands, so
+        any number of pods may be driven concurrently from one event loop.
+    """
+
+    DEVICE_NAME = None
+    MAX_READ_PAYLOAD = None
+    MAX_WRITE_PAYLOAD = None
+
+    def __init__(self, *args, **kwargs):
+        self.logger = Logger()
+        super(AsyncBDMBase, self).__init__(*args, **kwargs)
+
+    @abstractmethod
+    async def command(self, cmd, *operands):
+        """Execute a single BDM command, returns reply data or `None`."""
+
+    @abstractmethod
+    async def _readChunk(self, addr, length):
+        """Read at most `MAX_READ_PAYLOAD` bytes."""
+
+    @abstractmethod
+    async def _writeChunk(self, addr, data):
+        """Write at most `MAX_WRITE_PAYLOAD` bytes."""
+
+    @abstractmethod
+    async def reset(self):
+        pass
+
+    async def _readWord(self, cmd, *operands):
+        return decodeWord(await self.command(cmd, *operands))
+
+    async def targetGo(self):
+        self.logger.debug("GO")
+        await self.command(GO)
+
+    async def targetGoUntil(self):
+        self.logger.debug("GO_UNTIL")
+        await self.command(GO_UNTIL)
+
+    async def targetTagGo(self):
+        self.logger.debug("TAGGO")
+        await self.command(TAGGO)
+
+    async def targetTrace1(self):
+        self.logger.debug("TRACE1")
+        await self.command(TRACE1)
+
+    async def targetHalt(self):
+        self.logger.debug("BACKGROUND")
+        await self.command(BACKGROUND)
+
+    async def targetAckEnable(self):
+        self.logger.debug("ACK_ENABLE")
+        await self.command(ACK_ENABLE)
+
+    async def targetAckDisable(self):
+        self.logger.debug("ACK_DISABLE")
+        await self.command(ACK_DISABLE)
+
+    async def readBDWord(self, addr):
+        self.logger.debug("READ_BD_WORD[0x{0:04x}]".format(addr))
+        return await self._readWord(READ_BD_WORD, addr)
+
+    async def readWord(self, addr):
+        self.logger.debug("READ_WORD[0x{0:04x}]".format(addr))
+        return await self._readWord(READ_WORD, addr)
+
+    async def readBDByte(self, addr):
+        self.logger.debug("READ_BD_BYTE[0x{0:04x}]".format(addr))
+        return (await self.command(READ_BD_BYTE, addr))[0]
+
+    async def readByte(self, addr):
+        self.logger.debug("READ_BYTE[0x{0:04x}]".format(addr))
+        return (await self.command(READ_BYTE, addr))[0]
+
+    async def writeBDWord(self, addr, data):
+        self.logger.debug("WRITE_BD_WORD[0x{0:04x}]=0x{1:04x}".format(addr, data))
+        await self.command(WRITE_BD_WORD, addr, data)
+
+    async def writeBDByte(self, addr, data):
+        self.logger.debug("WRITE_BD_BYTE[0x{0:04x}]=0x{1:02x}".format(addr, data))
+        await self.command(WRITE_BD_BYTE, addr, data)
+
+    async def writeByte(self, addr, data):
+        self.logger.debug("WRITE_BYTE[0x{0:04x}]=0x{1:02x}".format(addr, data))
+        await self.command(WRITE_BYTE, addr, data)
+
+    async def writeWord(self, addr, data):
+        self.logger.debug("WRITE_WORD[0x{0:04x}]=0x{1:04x}".format(addr, data))
+        await self.command(WRITE_WORD, addr, data)
+
+    async def readNext(self):
+        self.logger.debug("READ_NEXT")
+        return await self._readWord(READ_NEXT)
+
+    async def writeNext(self, data):
+        self.logger.debug("WRITE_NEXT[0x{0:04x}]".format(data))
+        await self.command(WRITE_NEXT, data)
+
+    async def readPC(self):
+        self.logger.debug("READ_PC")
+        return await self._readWord(READ_PC)
+
+    async def readD(self):
+        self.logger.debug("READ_D")
+        return await self._readWord(READ_D)
+
+    async def readX(self):
+        self.logger.debug("READ_X")
+        return await self._readWord(READ_X)
+
+    async def readY(self):
+        self.logger.debug("READ_Y")
+        return await self._readWord(READ_Y)
+
+    async def readSP(self):
+        self.logger.debug("READ_SP")
+        return await self._readWord(READ_SP)
+
+    async def writePC(self, data):
+        self.logger.debug("WRITE_PC[0x{0:04x}]".format(data))
+        await self.command(WRITE_PC, data)
+
+    async def writeD(self, data):
+        self.logger.debug("WRITE_D[0x{0:04x}]".format(data))
+        await self.command(WRITE_D, data)
+
+    async def writeX(self, data):
+        self.logger.debug("WRITE_X[0x{0:04x}]".format(data))
+        await self.command(WRITE_X, data)
+
+    async def writeY(self, data):
+        self.logger.debug("WRITE_Y[0x{0:04x}]".format(data))
+        await self.command(WRITE_Y, data)
+
+    async def writeSP(self, data):
+        self.logger.debug("WRITE_SP[0x{0:04x}]".format(data))
+        await self.command(WRITE_SP, data)
+
+##
+## Convenience Methods.
+##
+    async def readCCR(self):
+        return await self.readBDByte(BDMCCR)
+
+    async def writeCCR(self, value):
+        await self.writeBDByte(BDMCCR, value)
+
+    async def readRegisters(self):
+        """ ..  py:method:: readRegisters()
+
+                :rtype: :class:`pyBDM.bdm.RegisterContext`
+        """
+        return RegisterContext(await self.readPC(), await self.readD(), await self.readX(), await self.readY(),
+            await self.readSP(), await self.readCCR()
+        )
+
+    async def getPartID(self):
+        return await self.readWord(0x001a)
+
+    async def getPPage(self):
+        return await self.readBDByte(PPAGE)
+
+    async def setPPage(self, value):
+        await self.writeBDByte(PPAGE, value)
+
+    async def getVector(self, vectorNumber):
+        return await self.readWord(MEMORY_HIGH - (2 * vectorNumber) - 1)
+
+    async def getResetVector(self):
+        return await self.getVector(RESET_VECTOR)
+
+    async def readArea(self, addr, length):
+        """ ..  py:method:: readArea(addr, length)
+
+                :rtype: bytearray
+        """
+        result = bytearray(length)
+        await self.readAreaInto(addr, result)
+        return result
+
+    async def readAreaInto(self, addr, buffer):
+        """ ..  py:method:: readAreaInto(addr, buffer)
+
+                Read `len(buffer)` bytes into the writable, contiguous `buffer`.
+
+                :returns: Number of bytes read.
+        """
+        view = byteView(buffer)
+        for chunkAddr, chunk in chunks(addr, view, self.MAX_READ_PAYLOAD):
+            chunk[ : ] = await self._readChunk(chunkAddr, len(chunk))
+        return len(view)
+
+    async def iterArea(self, addr, length, chunk = None):
+        """ ..  py:method:: iterArea(addr, length, chunk = None)
+
+                Asynchronous generator of `(address, memoryview)` pairs, see
+                :meth:`pyBDM.bdm.BDMBase.iterArea`.
+        """
+        for chunkAddr, view in bufferChunks(addr, length, chunk or self.MAX_READ_PAYLOAD):
+            await self.readAreaInto(chunkAddr, view)
+            yield chunkAddr, view
+
+    async def writeArea(self, addr, data):
+        """ ..  py:method:: writeArea(addr, data)
+        """
+        for chunkAddr, chunk in chunks(addr, dataView(data), self.MAX_WRITE_PAYLOAD):
+            self.logger.debug('Writing {0:d} bytes starting @ 0x{1:04x}.'.format(len(chunk), chunkAddr))
+            await self._writeChunk(chunkAddr, chunk)
+
+    async def fillArea(self, addr, value, length):
+        """ ..  py:method:: fillArea(addr, value, length)
+        """
+        for chunkAddr, pattern in fillChunks(addr, value, length, self.MAX_WRITE_PAYLOAD):
+            self.logger.debug("Filling {0:d} bytes with 0x{1:02x} starting @ 0x{2:04x}.".format(len(pattern), value, chunkAddr))
+            await self._writeChunk(chunkAddr, pattern)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import asyncio
+
+from pyBDM.aiobdm import AsyncBDMBase
+from pyBDM.aioserialport import AsyncPort
+from pyBDM.calibration import PayloadCache
+from pyBDM.compod12 import ComPod12, NoResponseError, TEMPLATES, RESET, WRITE_AREA, READ_AREA, VERSION
+from pyBDM.framing import Framer
+from pyBDM.stats import timer
+
+
+class AsyncComPod12(AsyncBDMBase, AsyncPort):
+    """ .. class:: AsyncComPod12
+
+        asyncio driver for the Elektronik-Laden ComPOD12::
+
+            async def session(device):
+                pod = AsyncComPod12(device, 38400)
+                pod.connect()
+                await pod.loadPayload()
+                await pod.reset()
+                await pod.targetHalt()
+                return await pod.readArea(0x4000, 0x400)
+
+            loop.run_until_complete(asyncio.gather(*[session(d) for d in devices]))
+    """
+
+    MAX_WRITE_PAYLOAD = ComPod12.MAX_WRITE_PAYLOAD
+    MAX_READ_PAYLOAD = ComPod12.MAX_READ_PAYLOAD
+    DEVICE_NAME = ComPod12.DEVICE_NAME
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncComPod12, self).__init__(*args, **kwargs)
+        self.framer = Framer(TEMPLATES, {WRITE_AREA: self.MAX_WRITE_PAYLOAD})
+        self._lock = asyncio.Lock()
+
+    async def exchange(self, frames, replyLength, name = "RAW"):
+        """ ..  py:method:: exchange(frames, replyLength, name = "RAW")
+
+                Send encoded frames and fetch the reply, one exchange at a time per pod.
+
+                :rtype: bytearray
+        """
+        async with self._lock:
+            start = timer()
+            await self.write(frames)
+            data = await self.read(replyLength)
+            self.transportStatistics.record(name, len(frames), len(data), timer() - start, len(data) < replyLength)
+        if replyLength and len(data) == 0:
+            raise NoResponseError("No response.")
+        return data
+
+    async def transact(self, frame, template, replyLength = None):
+        if replyLength is None:
+            replyLength = template.replyLength
+        return ComPod12.checkReply(template, await self.exchange(frame, replyLength, template.name), replyLength)
+
+    async def command(self, cmd, *operands):
+        frame = bytes(self.framer.encode(cmd, *operands))
+        return await self.transact(frame, self.framer.template(cmd))
+
+    async def reset(self):
+        self.logger.debug("RESET")
+        await self.command(RESET)
+
+    async def getPODVersion(self):
+        data = await self.command(VERSION)
+        return "{0!s} v{1:02d}.{2:02d}".format(self.DEVICE_NAME, data[0], data[1])
+
+    async def loadPayload(self, cache = None):
+        """ ..  py:method:: loadPayload(cache = None)
+
+                Apply the payload sizes calibrated for this pod, port and baud rate
+                (see :meth:`pyBDM.compod12.ComPod12.calibrate`), the safe defaults
+                are kept if there are none.
+
+                :returns: (readPayload, writePayload)
+        """
+        cache = cache or PayloadCache()
+        entry = cache.get(PayloadCache.key(self, await self.getPODVersion()))
+        if entry is not None:
+            self.MAX_READ_PAYLOAD = entry['read']
+            self.MAX_WRITE_PAYLOAD = entry['write']
+            self.logger.info("Using payload of {0:d}/{1:d} bytes (read/write).".format(entry['read'], entry['write']))
+        return self.MAX_READ_PAYLOAD, self.MAX_WRITE_PAYLOAD
+
+    async def _readChunk(self, addr, length):
+        frame = bytes(self.framer.encode(READ_AREA, addr, length))
+        return await self.transact(frame, self.framer.template(READ_AREA), length)
+
+    async def _writeChunk(self, addr, data):
+        frame = bytes(self.framer.encodePayload(WRITE_AREA, data, addr, len(data)))
+        await self.transact(frame, self.framer.template(WRITE_AREA))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import asyncio
+import os
+
+import serial
+
+from pyBDM.serialport import PortException
+from pyBDM.stats import Measurement, TransportStatistics, timer
+
+##
+##  asyncio counterpart of `serialport.Port`.
+##
+##  The serial device is opened (and configured) by pyserial, afterwards the
+##  non-blocking file descriptor is driven directly by the event loop, so no
+##  thread is ever blocked waiting for the pod (POSIX only).
+##
+
+class AsyncPort(object):
+    def __init__(self, num, baudrate, bytesize = serial.EIGHTBITS, parity = serial.PARITY_NONE, stopbits = serial.STOPBITS_ONE,
+            timeout = 0.1):
+        self.port = None
+        self.num = num
+        self.baudrate = baudrate
+        self.bytesize = bytesize
+        self.parity = parity
+        self.stopbits = stopbits
+        self.timeout = timeout
+        self.transportStatistics = TransportStatistics()
+        self._fd = None
+
+    def connect(self):
+        try:
+            self.port = serial.Serial(port = self.num, baudrate = self.baudrate, bytesize = self.bytesize, parity = self.parity,
+                stopbits = self.stopbits, timeout = 0
+            )
+        except serial.SerialException as e:
+            raise PortException(e)
+        self._fd = self.port.fileno()
+        os.set_blocking(self._fd, False)
+
+    async def _waitFor(self, register, unregister, timeout):
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        register(self._fd, lambda: waiter.done() or waiter.set_result(None))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            unregister(self._fd)
+
+    async def write(self, data):
+        if isinstance(data, int):
+            data = (data, )
+        loop = asyncio.get_running_loop()
+        view = memoryview(bytes(data))
+        length = len(view)
+        start = timer()
+        while view:
+            try:
+                view = view[os.write(self._fd, view) : ]
+            except BlockingIOError:
+                pass
+            if view:
+                await self._waitFor(loop.add_writer, loop.remove_writer, None)
+        self.transportStatistics.record(TransportStatistics.PORT, length, 0, timer() - start)
+
+    async def read(self, length):
+        """ ..  py:method:: read(length)
+
+                Read `length` bytes, returns less if `timeout` elapses in between.
+
+                :rtype: bytearray
+        """
+        loop = asyncio.get_running_loop()
+        data = bytearray()
+        start = timer()
+        deadline = loop.time() + self.timeout
+        while len(data) < length:
+            try:
+                chunk = os.read(self._fd, length - len(data))
+            except BlockingIOError:
+                chunk = None    # VMIN == VTIME == 0 yields b'' instead.
+            if chunk:
+                data.extend(chunk)
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await self._waitFor(loop.add_reader, loop.remove_reader, remaining)
+        self.transportStatistics.record(TransportStatistics.PORT, 0, len(data), timer() - start, len(data) < length)
+        return data
+
+    def stats(self):
+        """ ..  py:method:: stats()
+
+                :returns: Snapshot of the per command transport statistics.
+                :rtype: :class:`pyBDM.stats.TransportStatistics`
+        """
+        return self.transportStatistics.snapshot()
+
+    def measure(self):
+        """ ..  py:method:: measure()
+
+                Context manager measuring the statistics of the enclosed block.
+        """
+        return Measurement(self.transportStatistics)
+
+    def close(self):
+        if self.port and not self.port.closed:
+            self.port.close()
+        self._fd = None
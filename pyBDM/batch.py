@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+from pyBDM import bdm
+from pyBDM.s12.BdmpModule import BDMCCR
+
+
+class Future(object):
+    """ .. class:: Future
+
+        Result of a queued command, available after the batch was executed.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._done = False
+        self._result = None
+        self._exception = None
+
+    def done(self):
+        return self._done
+
+    def result(self):
+        """ ..  py:method:: result()
+
+                :returns: Command result, re-raises the error of a failed command.
+        """
+        if not self._done:
+            raise RuntimeError("'{0!s}' not executed yet.".format(self.name))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self):
+        return self._exception
+
+    def setResult(self, result):
+        self._result = result
+        self._done = True
+
+    def setException(self, exception):
+        self._exception = exception
+        self._done = True
+
+    def __repr__(self):
+        if not self._done:
+            state = "pending"
+        elif self._exception is not None:
+            state = "failed: {0!r}".format(self._exception)
+        else:
+            state = "result: {0!r}".format(self._result)
+        return "Future({0!s}, {1!s})".format(self.name, state)
+
+
+def _byte(data):
+    return data[0]
+
+def _word(data):
+    return data[0] << 8 | data[1]
+
+def _none(data):
+    return None
+
+
+class Batch(object):
+    """ .. class:: Batch
+
+        Queues BDM commands and executes them pipelined.
+
+        All frames are written back to back and the concatenated replies are
+        read and dissected afterwards, so a whole batch costs a single serial
+        turnaround (as long as it fits into the pods receive buffer, see
+        `PIPELINE_SIZE`).
+
+        Usually created via ``pod.batch()``::
+
+            with pod.batch() as b:
+                status = b.readBDByte(0xff01)
+                pc = b.readPC()
+            print(status.result(), pc.result())
+    """
+
+    def __init__(self, pod):
+        self._pod = pod
+        self._queue = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+        else:
+            self.cancel(exc_value)
+        return False
+
+    def __len__(self):
+        return len(self._queue)
+
+    def enqueue(self, opcode, *operands):
+        """ ..  py:method:: enqueue(opcode, *operands)
+
+                Queue an arbitrary fixed size command.
+
+                :rtype: :class:`Future`
+        """
+        template = self._pod.framer.template(opcode)
+        frame = bytes(self._pod.framer.encode(opcode, *operands))
+        if template.acked:
+            convert = _none
+        elif template.replyLength == 2:
+            convert = _word
+        else:
+            convert = _byte
+        future = Future(template.name)
+        self._queue.append((frame, template, convert, future))
+        return future
+
+    def cancel(self, exception = None):
+        """ ..  py:method:: cancel(exception = None)
+
+                Drop all queued commands without executing them.
+        """
+        for _, _, _, future in self._queue:
+            future.setException(exception or RuntimeError("Batch cancelled."))
+        self._queue = []
+
+    def execute(self):
+        """ ..  py:method:: execute()
+
+                Send all queued commands and resolve their futures.
+
+                If a group fails, the futures of all commands not executed yet
+                fail with the same error, which is re-raised.
+        """
+        queue, self._queue = self._queue, []
+        limit = self._pod.PIPELINE_SIZE
+        group = []
+        size = 0
+        try:
+            for entry in queue:
+                frame, template = entry[0], entry[1]
+                needed = max(len(frame), template.replyLength)
+                if group and size + needed > limit:
+                    self._executeGroup(group)
+                    group, size = [], 0
+                group.append(entry)
+                size += needed
+            if group:
+                self._executeGroup(group)
+        except Exception as e:
+            for _, _, _, future in queue:
+                if not future.done():
+                    future.setException(e)
+            raise
+
+    def _executeGroup(self, group):
+        self._pod.logger.debug("BATCH[{0:d} commands]".format(len(group)))
+        frames = b''.join(entry[0] for entry in group)
+        replyLength = sum(entry[1].replyLength for entry in group)
+        error = None
+        try:
+            data = self._pod.exchange(frames, replyLength, "BATCH")
+        except Exception as e:
+            data = bytearray()
+            error = e
+        offset = 0
+        for _, template, convert, future in group:
+            if error is None:
+                reply = data[offset : offset + template.replyLength]
+                offset += template.replyLength
+                try:
+                    future.setResult(convert(self._pod.checkReply(template, reply)))
+                    continue
+                except Exception as e:
+                    error = e
+            future.setException(error)
+        if error is not None:
+            raise error
+
+##
+##  Hardware Commands.
+##
+    def targetHalt(self):
+        return self.enqueue(bdm.BACKGROUND)
+
+    def targetAckEnable(self):
+        return self.enqueue(bdm.ACK_ENABLE)
+
+    def targetAckDisable(self):
+        return self.enqueue(bdm.ACK_DISABLE)
+
+    def readBDByte(self, addr):
+        return self.enqueue(bdm.READ_BD_BYTE, addr)
+
+    def readBDWord(self, addr):
+        return self.enqueue(bdm.READ_BD_WORD, addr)
+
+    def readByte(self, addr):
+        return self.enqueue(bdm.READ_BYTE, addr)
+
+    def readWord(self, addr):
+        return self.enqueue(bdm.READ_WORD, addr)
+
+    def writeBDByte(self, addr, data):
+        return self.enqueue(bdm.WRITE_BD_BYTE, addr, data)
+
+    def writeBDWord(self, addr, data):
+        return self.enqueue(bdm.WRITE_BD_WORD, addr, data)
+
+    def writeByte(self, addr, data):
+        return self.enqueue(bdm.WRITE_BYTE, addr, data)
+
+    def writeWord(self, addr, data):
+        return self.enqueue(bdm.WRITE_WORD, addr, data)
+
+##
+##  Firmware Commands.
+##
+    def readNext(self):
+        return self.enqueue(bdm.READ_NEXT)
+
+    def readPC(self):
+        return self.enqueue(bdm.READ_PC)
+
+    def readD(self):
+        return self.enqueue(bdm.READ_D)
+
+    def readX(self):
+        return self.enqueue(bdm.READ_X)
+
+    def readY(self):
+        return self.enqueue(bdm.READ_Y)
+
+    def readSP(self):
+        return self.enqueue(bdm.READ_SP)
+
+    def writeNext(self, data):
+        return self.enqueue(bdm.WRITE_NEXT, data)
+
+    def writePC(self, data):
+        return self.enqueue(bdm.WRITE_PC, data)
+
+    def writeD(self, data):
+        return self.enqueue(bdm.WRITE_D, data)
+
+    def writeX(self, data):
+        return self.enqueue(bdm.WRITE_X, data)
+
+    def writeY(self, data):
+        return self.enqueue(bdm.WRITE_Y, data)
+
+    def writeSP(self, data):
+        return self.enqueue(bdm.WRITE_SP, data)
+
+    def targetGo(self):
+        return self.enqueue(bdm.GO)
+
+    def targetGoUntil(self):
+        return self.enqueue(bdm.GO_UNTIL)
+
+    def targetTrace1(self):
+        return self.enqueue(bdm.TRACE1)
+
+    def targetTagGo(self):
+        return self.enqueue(bdm.TAGGO)
+
+##
+## Convenience Methods.
+##
+    def readCCR(self):
+        return self.readBDByte(BDMCCR)
+
+    def writeCCR(self, value):
+        return self.writeBDByte(BDMCCR, value)
+
+    def getPPage(self):
+        return self.readBDByte(bdm.PPAGE)
+
+    def setPPage(self, value):
+        return self.writeBDByte(bdm.PPAGE, value)
@@ -27,8 +27,12 @@ __copyright__ = """
 """
 
 import abc
-from pyBDM.s12.BdmModule import Bdm
+from pyBDM.s12.BdmpModule import Bdm, BDMSTS, BDMACT
+from pyBDM.s12.bkpModule import BKPCT0, BKPCT1, BKP0X, BKP0H, BKP0L, BKEN, BKBDM, BKTAG
 from pyBDM.logger import Logger
+from pyBDM.paging import PagedReader
+from pyBDM.polling import Poller, PollTimeoutError
+from pyBDM.routines import fillOnTarget, verifyOnTarget
 
 ##
 ##  BMD-Commands.
@@ -84,10 +88,58 @@ RESET_VECTOR    = 0
 
 PPAGE           = 0x30
 
+TARGET_FILL_MINIMUM = 0x40  # Below, downloading the fill routine doesn't pay off.
+
 from collections import namedtuple
 MemorySizes = namedtuple('MemorySizes','regSpace eepSpace ramSpace allocRomSpace')
+RegisterContext = namedtuple('RegisterContext', 'pc d x y sp ccr')
 
 class CommunicationError(Exception): pass
+class TargetTimeoutError(CommunicationError): pass
+class UnexpectedHaltError(CommunicationError): pass
+
+##
+##  Reply decoding and chunking, shared with pyBDM.aiobdm.
+##
+
+def decodeWord(data):
+    """Big endian word of a two byte reply."""
+    return data[0] << 8 | data[1]
+
+
+def byteView(buffer):
+    """Flat unsigned byte view of a contiguous `buffer`."""
+    view = memoryview(buffer)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+def dataView(data):
+    """View of a bytes-like object or sequence of ints."""
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytearray(data)
+    return memoryview(data)
+
+
+def chunks(addr, view, size):
+    """`(address, view)` pairs of at most `size` bytes covering `view`."""
+    for offset in range(0, len(view), size):
+        yield addr + offset, view[offset : offset + size]
+
+
+def fillChunks(addr, value, length, size):
+    """`(address, pattern)` pairs of at most `size` bytes filling `length` bytes with `value`."""
+    pattern = memoryview(bytearray([value]) * min(length, size))
+    for offset in range(0, length, size):
+        yield addr + offset, pattern[ : min(size, length - offset)]
+
+
+def bufferChunks(addr, length, size):
+    """`(address, view)` pairs like `chunks`, all views share one buffer of `size` bytes."""
+    buffer = memoryview(bytearray(min(size, length)))
+    for offset in range(0, length, size):
+        yield addr + offset, buffer[ : min(size, length - offset)]
 
 
 class BDMBase(object):
@@ -98,10 +150,13 @@ class BDMBase(object):
 
     __metaclass__= abc.ABCMeta
     DEVICE_NAME = None
+    MAX_READ_PAYLOAD = 0xff     # Bytes per chunk, see readArea() / writeArea(); fits a count byte.
+    MAX_WRITE_PAYLOAD = 0xff
     VARIABLE_BUS_FREQUENCY = False
 
     def __init__(self, *args, **kwargs):
         self.logger = Logger()
+        self.poller = Poller()
         super(BDMBase,self).__init__(*args, **kwargs)
         self.bdmModule = Bdm(self)
 
@@ -109,13 +164,25 @@ class BDMBase(object):
     def reset(self):
         self.logger.debug("Resetting Target.")
 
+    @abstractmethod
+    def command(self, cmd, *operands):
+        """ ..  py:method:: command(cmd, *operands)
+
+               Execute a single BDM command.
+
+               :returns: Reply data or `None` for acknowledged commands.
+        """
+
+    def _readWord(self, cmd, *operands):
+        return decodeWord(self.command(cmd, *operands))
+
     def targetGo(self):
         """ ..  py:method:: targetGo(self)
 
                Go to user program.  If enabled, ACK will occur when leaving active background mode.
         """
         self.logger.debug("GO")
-        self.writeCommand(GO)
+        self.command(GO)
 
     def targetGoUntil(self):
         """ ..  py:method:: targetGoUntil(self)
@@ -123,7 +190,7 @@ class BDMBase(object):
                Go to user program. If enabled, ACK will occur upon returning to active background mode.
         """
         self.logger.debug("GO_UNTIL")
-        self.writeCommand(GO_UNTIL)
+        self.command(GO_UNTIL)
 
     def targetTagGo(self):
         """ ..  py:method:: targetTagGo(self)
@@ -131,7 +198,7 @@ class BDMBase(object):
                Enable tagging and go to user program. There is no ACK pulse related to this command.
         """
         self.logger.debug("TAGGO")
-        self.writeCommand(TAGGO)
+        self.command(TAGGO)
 
     def targetHalt(self):
         """ ..  py:method:: targetHalt(self)
@@ -139,7 +206,7 @@ class BDMBase(object):
                Enter background mode if firmware enabled.
         """
         self.logger.debug("BACKGROUND")
-        self.writeCommand(BACKGROUND)
+        self.command(BACKGROUND)
 
     def targetAckEnable(self):
         """ ..  py:method:: targetAckEnable(self)
@@ -147,7 +214,7 @@ class BDMBase(object):
                Enable Handshake. Issues an ACK pulse after the command is executed.
         """
         self.logger.debug("ACK_ENABLE")
-        self.writeCommand(ACK_ENABLE)
+        self.command(ACK_ENABLE)
 
     def targetAckDisable(self):
         """ ..  py:method:: targetAckDisable(self)
@@ -155,7 +222,7 @@ class BDMBase(object):
                Disable Handshake. This command does not issue an ACK pulse.
         """
         self.logger.debug("ACK_DISABLE")
-        self.writeCommand(ACK_DISABLE)
+        self.command(ACK_DISABLE)
 
     def readBDWord(self, addr):
         """ ..  py:method:: readBDWord(addr)
@@ -167,7 +234,7 @@ class BDMBase(object):
                 :rtype: integer
         """
         self.logger.debug("READ_BD_WORD[0x{0:04x}]".format(addr))
-        data = self.readWord(READ_BD_WORD, addr)
+        data = self._readWord(READ_BD_WORD, addr)
         self.logger.debug("RESULT: 0x{0:04x}".format(data))
         return data
 
@@ -175,7 +242,7 @@ class BDMBase(object):
         """ ..  py:method::
         """
         self.logger.debug("READ_WORD[0x{0:04x}]".format(addr))
-        data = super(BDMBase, self).readWord(READ_WORD, addr)
+        data = self._readWord(READ_WORD, addr)
         self.logger.debug("RESULT: 0x{0:04x}".format(data))
         return data
 
@@ -183,7 +250,7 @@ class BDMBase(object):
         """ ..  py:method::
         """
         self.logger.debug("READ_BD_BYTE[0x{0:04x}]".format(addr))
-        data = self.readCommand(READ_BD_BYTE, 1, addr)[0]
+        data = self.command(READ_BD_BYTE, addr)[0]
         self.logger.debug("RESULT: 0x{0:02x}".format(data))
         return data
 
@@ -191,7 +258,7 @@ class BDMBase(object):
         """ ..  py:method::
         """
         self.logger.debug("READ_BYTE[0x{0:04x}]".format(addr))
-        data = self.readCommand(READ_BYTE, 1, addr)[0]
+        data = self.command(READ_BYTE, addr)[0]
         self.logger.debug("RESULT: 0x{0:02x}".format(data))
         return data
 
@@ -199,97 +266,97 @@ class BDMBase(object):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_BD_WORD[0x{0:04x}]=0x{1:04x}".format(addr, data))
-        self.writeWord(WRITE_BD_WORD, addr, data)
+        self.command(WRITE_BD_WORD, addr, data)
 
     def writeBDByte(self, addr, data):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_BD_BYTE[0x{0:04x}]=0x{1:02x}".format(addr, data))
-        self.writeByte(WRITE_BD_BYTE,addr, data)
+        self.command(WRITE_BD_BYTE, addr, data)
 
     def writeByte(self, addr, data):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_BYTE[0x{0:04x}]=0x{1:02x}".format(addr, data))
-        super(BDMBase, self).writeByte(WRITE_BYTE, addr, data)
+        self.command(WRITE_BYTE, addr, data)
 
     def writeWord(self, addr, data):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_WORD[0x{0:04x}]=0x{1:04x}".format(addr, data))
-        super(BDMBase, self).writeWord(WRITE_WORD, addr, data)
+        self.command(WRITE_WORD, addr, data)
 
     def readNext(self):
         """ ..  py:method::
         """
         self.logger.debug("READ_NEXT")
-        return self.readWord(READ_NEXT)
+        return self._readWord(READ_NEXT)
 
     def writeNext(self,data):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_NEXT[0x{0:04x}]".format(data))
-        self.writeWord(WRITE_NEXT, data)
+        self.command(WRITE_NEXT, data)
 
     def readPC(self):
         """ ..  py:method::
         """
         self.logger.debug("READ_PC")
-        return self.readWord(READ_PC)
+        return self._readWord(READ_PC)
 
     def readD(self):
         """ ..  py:method::
         """
         self.logger.debug("READ_D")
-        return self.readWord(READ_D)
+        return self._readWord(READ_D)
 
     def readX(self):
         """ ..  py:method::
         """
         self.logger.debug("READ_X")
-        return self.readWord(READ_X)
+        return self._readWord(READ_X)
 
     def readY(self):
         """ ..  py:method::
         """
         self.logger.debug("READ_Y")
-        return self.readWord(READ_Y)
+        return self._readWord(READ_Y)
 
     def readSP(self):
         """ ..  py:method::
         """
         self.logger.debug("READ_SP")
-        return self.readWord(READ_SP)
+        return self._readWord(READ_SP)
 
     def writePC(self, data):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_PC[0x{0:04x}]".format(data))
-        self.writeWord(WRITE_PC, data)
+        self.command(WRITE_PC, data)
 
     def writeD(self, data):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_D[0x{0:04x}]".format(data))
-        self.writeWord(WRITE_D, data)
+        self.command(WRITE_D, data)
 
     def writeX(self, data):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_X[0x{0:04x}]".format(data))
-        self.writeWord(WRITE_X, data)
+        self.command(WRITE_X, data)
 
     def writeY(self, data):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_Y[0x{0:04x}]".format(data))
-        self.writeWord(WRITE_Y, data)
+        self.command(WRITE_Y, data)
 
     def writeSP(self, data):
         """ ..  py:method::
         """
         self.logger.debug("WRITE_SP[0x{0:04x}]".format(data))
-        self.writeWord(WRITE_SP, data)
+        self.command(WRITE_SP, data)
 
 ##
 ## Convenience Methods.
@@ -304,6 +371,68 @@ class BDMBase(object):
         """
         self.bdmModule.bdmccr = value
 
+    def isHalted(self):
+        """ ..  py:method:: isHalted()
+
+                :returns: `True` if the target is in active background mode.
+        """
+        return (self.readBDByte(BDMSTS) & BDMACT) == BDMACT
+
+    def runTo(self, addr, timeout = 1.0):
+        """ ..  py:method:: runTo(addr, timeout = 1.0)
+
+                Run the target until the program counter reaches `addr`, using
+                hardware breakpoint 0 (tagged, BDM mode, 16-bit compare). A forced
+                breakpoint would fire when `addr` is prefetched, i.e. some
+                instructions early.
+
+                :returns: The program counter.
+                :raises TargetTimeoutError: `addr` wasn't reached within `timeout` seconds
+                                            (the target is halted again).
+                :raises UnexpectedHaltError: The target stopped elsewhere (e.g. BGND instruction).
+        """
+        self.logger.debug("RUN_TO[0x{0:04x}]".format(addr))
+        self.writeBDByte(BKPCT0, 0x00)
+        self.writeBDByte(BKPCT1, 0x00)
+        self.writeBDByte(BKP0X, 0x00)
+        self.writeBDByte(BKP0H, (addr >> 8) & 0xff)
+        self.writeBDByte(BKP0L, addr & 0xff)
+        self.writeBDByte(BKPCT0, BKEN | BKBDM | BKTAG)
+        try:
+            self.targetTagGo()
+            self.waitHalted(timeout, "0x{0:04x} not reached".format(addr))
+        finally:
+            self.writeBDByte(BKPCT0, 0x00)
+        pc = self.readPC()
+        if pc != addr:
+            raise UnexpectedHaltError("Halted at 0x{0:04x} before reaching 0x{1:04x}.".format(pc, addr))
+        return pc
+
+    def waitHalted(self, timeout = 1.0, what = "Target still running", key = None):
+        """ ..  py:method:: waitHalted(timeout = 1.0, what = "Target still running", key = None)
+
+                Wait for the target to enter active background mode.
+
+                :param key: Name of the code running, polling adapts to its
+                            measured run time (see :class:`pyBDM.polling.Poller`).
+                :raises TargetTimeoutError: Not halted within `timeout` seconds
+                                            (the target is halted by force).
+        """
+        try:
+            self.poller.wait(self.isHalted, bool, key, timeout, what)
+        except PollTimeoutError as e:
+            self.targetHalt()
+            raise TargetTimeoutError(str(e))
+
+    def readRegisters(self):
+        """ ..  py:method:: readRegisters()
+
+                Fetch the complete CPU context.
+
+                :rtype: :class:`RegisterContext`
+        """
+        return RegisterContext(self.readPC(), self.readD(), self.readX(), self.readY(), self.readSP(), self.readCCR())
+
     def getPartID(self):
         """ ..  py:method::
         """
@@ -333,69 +462,99 @@ class BDMBase(object):
         return MemorySizes(regSpace, eepSpace, ramSpace, allocRomSpace)
 
 
+    def _readChunk(self, addr, length):
+        """Read at most `MAX_READ_PAYLOAD` bytes, pods with area commands override this."""
+        result = bytearray(length)
+        offset = 0
+        if addr & 1:
+            result[0] = self.readByte(addr)
+            offset = 1
+        while offset + 1 < length:
+            word = self.readWord(addr + offset)
+            result[offset] = word >> 8
+            result[offset + 1] = word & 0xff
+            offset += 2
+        if offset < length:
+            result[offset] = self.readByte(addr + offset)
+        return result
+
+    def _readChunkInto(self, addr, view):
+        """Fill `view` (at most `MAX_READ_PAYLOAD` bytes), pods able to receive in place override this."""
+        view[ : ] = self._readChunk(addr, len(view))
+
+    def _writeChunk(self, addr, data):
+        """Write at most `MAX_WRITE_PAYLOAD` bytes, pods with area commands override this."""
+        length = len(data)
+        offset = 0
+        if addr & 1:
+            self.writeByte(addr, data[0])
+            offset = 1
+        while offset + 1 < length:
+            self.writeWord(addr + offset, (data[offset] << 8) | data[offset + 1])
+            offset += 2
+        if offset < length:
+            self.writeByte(addr + offset, data[offset])
+
     def readArea(self, addr, length):
-        """ ..  py:method::
+        """ ..  py:method:: readArea(addr, length)
+
+                Read `length` bytes, split into chunks of at most `MAX_READ_PAYLOAD` bytes.
+
+                :rtype: bytearray
         """
-        if length == 0:
-            return None
-        loops = length / self.MAX_READ_PAYLOAD
-        bytesRemaining = length % self.MAX_READ_PAYLOAD
-        offset = addr
-        result = bytearray()
-        for l in range(loops):
-            self.logger.debug("Reading {0:d} bytes starting @ 0x{1:04x}.".format(self.MAX_READ_PAYLOAD, offset))
-            data = self.readArea(offset, self.MAX_READ_PAYLOAD)
-            self.logger.debug("[{0!s}]".format(hexDump(data)))
-            result.extend(data)
-            offset += self.MAX_READ_PAYLOAD
-        if bytesRemaining:
-            self.logger.debug("Reading {0:d} bytes starting @ 0x{1:04x}.".format(bytesRemaining, offset))
-            data = self.readArea(offset,bytesRemaining)
-            self.logger.debug("[{0!s}]".format(hexDump(data)))
-            result.extend(data)
+        result = bytearray(length)
+        self.readAreaInto(addr, result)
         return result
 
-    def fillArea(self, addr, value, length):
-        """ ..  py:method::
+    def readAreaInto(self, addr, buffer):
+        """ ..  py:method:: readAreaInto(addr, buffer)
+
+                Read `len(buffer)` bytes straight into `buffer`, which may be any
+                writable, contiguous buffer (`bytearray`, `memoryview`, `mmap`,
+                `numpy` array, ...).
+
+                :returns: Number of bytes read.
         """
-        if length == 0:
-            return
-        loops = length / self.MAX_WRITE_PAYLOAD
-        bytesRemaining = length % self.MAX_WRITE_PAYLOAD
-        offset = addr
-        for l in range(loops):
-            self.logger.debug("Filling {0:d} bytes with 0x{1:02x} starting @ 0x{2:04x}.".format(self.MAX_WRITE_PAYLOAD, value, offset))
-            self.writeArea(offset, self.MAX_WRITE_PAYLOAD, [value] * self.MAX_WRITE_PAYLOAD)
-            offset += self.MAX_WRITE_PAYLOAD
-        if bytesRemaining:
-            self.logger.debug("Filling {0:d} bytes with 0x{1:02x} starting @ 0x{2:04x}.".format(bytesRemaining, value, offset))
-            self.writeArea(offset, bytesRemaining, [value] * bytesRemaining)
+        view = byteView(buffer)
+        for chunkAddr, chunk in chunks(addr, view, self.MAX_READ_PAYLOAD):
+            self._readChunkInto(chunkAddr, chunk)
+        return len(view)
+
+    def iterArea(self, addr, length, chunk = None):
+        """ ..  py:method:: iterArea(addr, length, chunk = None)
+
+                Read `length` bytes as a stream of `(address, memoryview)` pairs of
+                `chunk` bytes each (default: `MAX_READ_PAYLOAD`).
+
+                The views share one buffer and are only valid until the next
+                iteration, copy them (`bytes(view)`) to keep the data.
+        """
+        for chunkAddr, view in bufferChunks(addr, length, chunk or self.MAX_READ_PAYLOAD):
+            self.readAreaInto(chunkAddr, view)
+            yield chunkAddr, view
+
+    def fillArea(self, addr, value, length, onTarget = False):
+        """ ..  py:method:: fillArea(addr, value, length, onTarget = False)
+
+                Fill `length` bytes with `value`.
+
+                With `onTarget` (RAM only) a fill routine is run on the target,
+                see :func:`pyBDM.routines.fillOnTarget`.
+        """
+        if onTarget and length >= TARGET_FILL_MINIMUM:
+            return fillOnTarget(self, addr, value, length)
+        self.logger.debug("Filling {0:d} bytes with 0x{1:02x} starting @ 0x{2:04x}.".format(length, value, addr))
+        for chunkAddr, pattern in fillChunks(addr, value, length, self.MAX_WRITE_PAYLOAD):
+            self._writeChunk(chunkAddr, pattern)
 
     def writeArea(self, addr, data):
-        """ ..  py:method::
+        """ ..  py:method:: writeArea(addr, data)
+
+                Write `data` (any bytes-like object or sequence of ints), split into
+                chunks of at most `MAX_WRITE_PAYLOAD` bytes.
         """
-        length = len(data)
-        if length == 0:
-            return None
-        loops = length / self.MAX_WRITE_PAYLOAD
-        bytesRemaining = length % self.MAX_WRITE_PAYLOAD
-        addrOffset = addr
-
-        dataOffsetFrom = 0
-        dataOffsetTo = self.MAX_WRITE_PAYLOAD
-        for l in range(loops):
-            self.logger.debug('Writing {0:d} bytes starting @ 0x{1:04x}.'.format(self.MAX_WRITE_PAYLOAD, addrOffset))
-            dslice = data[dataOffsetFrom : dataOffsetTo]
-            self.logger.debug("[{0!s}]".format(hexDump(dslice)))
-            super(BDMBase, self).writeArea(addrOffset, self.MAX_WRITE_PAYLOAD, dslice)
-            addrOffset += self.MAX_WRITE_PAYLOAD
-            dataOffsetFrom = dataOffsetTo
-            dataOffsetTo = dataOffsetFrom + self.MAX_WRITE_PAYLOAD
-        if bytesRemaining:
-            self.logger.debug('Writing {0:d} bytes starting @ 0x{1:04x}.'.format(bytesRemaining, addrOffset))
-            dslice = data[dataOffsetFrom: dataOffsetFrom + bytesRemaining]
-            self.logger.debug("[{0!s}]".format(hexDump(dslice)))
-            super(BDMBase, self).writeArea(addrOffset, bytesRemaining, dslice)
+        for chunkAddr, chunk in chunks(addr, dataView(data), self.MAX_WRITE_PAYLOAD):
+            self._writeChunk(chunkAddr, chunk)
 
     def getPPage(self):
         """ ..  py:method::
@@ -407,6 +566,26 @@ class BDMBase(object):
         """
         self.writeBDByte(PPAGE, value)
 
+    def readGlobal(self, addr, length):
+        """ ..  py:method:: readGlobal(addr, length)
+
+                Read banked memory by global address (e.g. 0xF8000 == page 0x3E,
+                offset 0), see :class:`pyBDM.paging.PagedReader`.
+
+                :rtype: bytearray
+        """
+        return PagedReader(self).read(addr, length)
+
+    def verifyArea(self, addr, data, sectorSize = 1024, paged = False):
+        """ ..  py:method:: verifyArea(addr, data, sectorSize = 1024, paged = False)
+
+                Verify memory against `data` with per sector CRCs computed by
+                the target, see :func:`pyBDM.routines.verifyOnTarget`.
+
+                :returns: List of mismatching sectors.
+        """
+        return verifyOnTarget(self, addr, data, sectorSize, paged)
+
     def getVector(self, vectorNumber):
         """ ..  py:method::
         """
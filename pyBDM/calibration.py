@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+##
+##  Calibration of the largest reliable READ_AREA / WRITE_AREA payload.
+##
+
+import json
+import os
+
+from pyBDM.stats import timer
+
+CANDIDATES      = (16, 32, 64, 128, 192, 255)
+SCRATCH_ADDRESS = 0x1000    # Start of RAM on most S12 derivatives.
+ROUNDS          = 3
+
+READ            = "read"
+WRITE           = "write"
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".pyBDM", "payload.json")
+
+
+class PayloadCache(object):
+    """ .. class:: PayloadCache
+
+        Persists calibrated payload sizes, keyed by pod, port and baud rate.
+    """
+
+    def __init__(self, fileName = DEFAULT_CACHE):
+        self.fileName = fileName
+
+    @staticmethod
+    def key(pod, version = None):
+        """`version`: Result of `pod.getPODVersion()` (queried if `None`)."""
+        if version is None:
+            version = pod.getPODVersion()
+        return "{0!s}|{1!s}|{2:d}".format(version, pod.num, pod.baudrate)
+
+    def _load(self):
+        try:
+            with open(self.fileName) as fin:
+                return json.load(fin)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        return self._load().get(key)
+
+    def put(self, key, value):
+        entries = self._load()
+        entries[key] = value
+        directory = os.path.dirname(self.fileName)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(self.fileName, "w") as fout:
+            json.dump(entries, fout, indent = 4, sort_keys = True)
+
+
+def _pattern(size, seed):
+    return bytearray(((i * 0x3b) + seed) & 0xff for i in range(size))
+
+
+def _readTrusted(pod, addr, length):
+    """Read using the pod's current payload."""
+    data = bytearray()
+    while len(data) < length:
+        data.extend(pod._readChunk(addr + len(data), min(pod.MAX_READ_PAYLOAD, length - len(data))))
+    return data
+
+
+def _writeTrusted(pod, addr, data):
+    """Write using the pod's current payload."""
+    for offset in range(0, len(data), pod.MAX_WRITE_PAYLOAD):
+        pod._writeChunk(addr + offset, data[offset : offset + pod.MAX_WRITE_PAYLOAD])
+
+
+def probe(pod, size, addr = SCRATCH_ADDRESS, rounds = ROUNDS, direction = None):
+    """ ..  py:function:: probe(pod, size, addr = SCRATCH_ADDRESS, rounds = ROUNDS, direction = None)
+
+            Transfer `size` bytes forth and back `rounds` times.
+
+            :param direction: :data:`READ` or :data:`WRITE` to probe and time one
+                              direction only, the other one uses the pod's current
+                              payload. `None` probes both.
+            :returns: Throughput in bytes/sec. or `None` if the payload is unreliable.
+    """
+    elapsed = 0.0
+    for seed in range(rounds):
+        pattern = _pattern(size, seed)
+        try:
+            if direction == READ:
+                _writeTrusted(pod, addr, pattern)
+            start = timer()
+            if direction != READ:
+                pod._writeChunk(addr, pattern)
+            if direction == WRITE:
+                elapsed += timer() - start
+                data = _readTrusted(pod, addr, size)
+            else:
+                data = pod._readChunk(addr, size)
+                elapsed += timer() - start
+        except Exception as e:
+            pod.logger.debug("Payload {0:d}: {1!s}".format(size, e))
+            pod.purge()
+            pod.transportStatistics.recordRetry("CALIBRATE")
+            return None
+        if data != pattern:
+            pod.logger.debug("Payload {0:d}: data mismatch.".format(size))
+            pod.purge()
+            return None
+    transfers = 1 if direction else 2
+    return (transfers * size * rounds) / elapsed if elapsed else float('inf')
+
+
+def _fastest(pod, candidates, addr, direction):
+    best, bestRate = None, 0.0
+    for size in sorted(candidates):
+        rate = probe(pod, size, addr, direction = direction)
+        if rate is None:
+            break
+        pod.logger.info("{0!s} payload {1:3d} bytes: {2:.0f} bytes/sec.".format(direction.capitalize(), size, rate))
+        if rate > bestRate:
+            best, bestRate = size, rate
+    return best
+
+
+def calibratePayload(pod, cache = None, force = False, candidates = CANDIDATES, addr = SCRATCH_ADDRESS):
+    """ ..  py:function:: calibratePayload(pod, cache = None, force = False, candidates = CANDIDATES, addr = SCRATCH_ADDRESS)
+
+            Determine the fastest reliable payloads of READ_AREA and WRITE_AREA
+            and apply them to `pod` (`MAX_READ_PAYLOAD`, `MAX_WRITE_PAYLOAD`).
+            Both are probed separately, pods tend to fail on large replies
+            earlier than on large commands.
+
+            Probes use the RAM at `addr`, its content is restored afterwards.
+            Results are taken from / stored to `cache` unless `force` is set.
+
+            :returns: (readPayload, writePayload)
+    """
+    cache = cache or PayloadCache()
+    key = PayloadCache.key(pod)
+    entry = None if force else cache.get(key)
+    if entry is None:
+        saved = _readTrusted(pod, addr, max(candidates))
+        try:
+            entry = dict(read = _fastest(pod, candidates, addr, READ), write = _fastest(pod, candidates, addr, WRITE))
+        finally:
+            _writeTrusted(pod, addr, saved)
+        if None in entry.values():
+            pod.logger.warn("Calibration failed, keeping payload of {0:d}/{1:d} bytes.".format(pod.MAX_READ_PAYLOAD,
+                pod.MAX_WRITE_PAYLOAD)
+            )
+            return pod.MAX_READ_PAYLOAD, pod.MAX_WRITE_PAYLOAD
+        cache.put(key, entry)
+    pod.MAX_READ_PAYLOAD = entry['read']
+    pod.MAX_WRITE_PAYLOAD = entry['write']
+    pod.logger.info("Using payload of {0:d}/{1:d} bytes (read/write).".format(entry['read'], entry['write']))
+    return entry['read'], entry['write']
+
+
+def verifyLink(pod, addr = SCRATCH_ADDRESS, size = CANDIDATES[0], fallback = None):
+    """ ..  py:function:: verifyLink(pod, addr = SCRATCH_ADDRESS, size = CANDIDATES[0], fallback = None)
+
+            Read-back pattern test of the current link settings, restores the
+            RAM content at `addr`.
+
+            :param fallback: Called if the test fails, before the RAM is restored,
+                             to switch back to working link settings (the failing
+                             ones are used otherwise).
+            :rtype: bool
+    """
+    try:
+        saved = pod._readChunk(addr, size)
+    except Exception as e:
+        pod.logger.debug("Link test: {0!s}".format(e))
+        pod.purge()
+        return False
+    ok = False
+    try:
+        ok = probe(pod, size, addr, 1) is not None
+    finally:
+        if not ok and fallback is not None:
+            fallback()
+        pod._writeChunk(addr, saved)
+    return ok
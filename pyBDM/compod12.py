@@ -26,8 +26,12 @@ __copyright__ = """
   51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
 
-import serialport
-from bdm import BDMBase
+from pyBDM import serialport
+from pyBDM.batch import Batch
+from pyBDM.bdm import BDMBase, CommunicationError, RegisterContext
+from pyBDM.calibration import calibratePayload, verifyLink
+from pyBDM.framing import Framer, Template, BDM_TEMPLATES, ADDRESS_BYTE
+from pyBDM.stats import timer
 
 # Elektonikladen Commands.
 RESET           = 0x80 # Reset
@@ -42,73 +46,160 @@ class InvalidResponseError(Exception): pass
 def com(v):
     return 0xff & ~v
 
+TEMPLATES = dict(BDM_TEMPLATES)
+TEMPLATES.update((t.opcode, t) for t in (
+    Template("RESET",       RESET),
+    Template("WRITE_AREA",  WRITE_AREA, ADDRESS_BYTE),
+    Template("READ_AREA",   READ_AREA,  ADDRESS_BYTE, 0, acked = False),    # Reply length == CNT.
+    Template("VERSION",     VERSION,    replyLength = 2, acked = False),
+))
+
 class ComPod12(BDMBase, serialport.Port):
 
     MAX_WRITE_PAYLOAD = 0xff
-    MAX_READ_PAYLOAD = 16 # 0xff
+    MAX_READ_PAYLOAD = 16 # Safe default, up to 0xff, see calibrate().
+    PIPELINE_SIZE = 64  # Bytes in flight per direction while executing a batch.
     DEVICE_NAME = "Elektronik-Laden ComPOD12"
     VARIABLE_BUS_FREQUENCY = False
+    BAUDRATES = (115200, 57600, 38400, 19200, 9600)
+
+    def __init__(self, *args, **kwargs):
+        super(ComPod12, self).__init__(*args, **kwargs)
+        self.framer = Framer(TEMPLATES, {WRITE_AREA: self.MAX_WRITE_PAYLOAD})
+
+    def connect(self, baudrates = None):
+        """ ..  py:method:: connect(baudrates = None)
+
+                Open the port, if `baudrates` is given (e.g. `ComPod12.BAUDRATES`)
+                the highest working rate is negotiated, see `negotiateBaudrate`.
+        """
+        super(ComPod12, self).connect()
+        if baudrates:
+            self.negotiateBaudrate(baudrates)
+
+    def _setBaudrate(self, baudrate):
+        self.port.baudrate = self.baudrate = baudrate
+        self.purge()
+
+    def _tryBaudrate(self, baudrate, fallback = None):
+        """`fallback`: Known good rate to restore the scratch RAM at if the link test fails."""
+        self.logger.debug("Trying {0:d} bits/sec.".format(baudrate))
+        self._setBaudrate(baudrate)
+        try:
+            self.getPODVersion()
+        except (NoResponseError, InvalidResponseError) as e:
+            self.logger.debug("{0:d} bits/sec.: {1!s}".format(baudrate, e))
+            self.transportStatistics.recordRetry("NEGOTIATE")
+            self.purge()
+            return False
+        return verifyLink(self, fallback = None if fallback is None else lambda: self._setBaudrate(fallback))
+
+    def negotiateBaudrate(self, baudrates):
+        """ ..  py:method:: negotiateBaudrate(baudrates)
+
+                Try `baudrates` from the highest down and keep the first one
+                passing `getPODVersion` and a read-back pattern test.
+                Falls back to the rate the port was opened with.
+
+                :returns: The baud rate in use.
+        """
+        original = self.baudrate
+        for baudrate in sorted(set(baudrates), reverse = True):
+            if self._tryBaudrate(baudrate, original):
+                self.logger.info("Using {0:d} bits/sec.".format(baudrate))
+                return baudrate
+        self.logger.warn("Baud rate negotiation failed, falling back to {0:d} bits/sec.".format(original))
+        if not self._tryBaudrate(original):
+            raise CommunicationError("No response at {0:d} bits/sec.".format(original))
+        return original
+
+    def exchange(self, frames, replyLength, name = "RAW"):
+        """ ..  py:method:: exchange(frames, replyLength, name = "RAW")
+
+                Send one or more encoded frames with a single write and fetch
+                the (concatenated) reply with a single read.
+
+                :param name: Accounted under this name in the transport statistics.
+                :rtype: bytearray
+        """
+        start = timer()
+        self.write(frames)
+        data = self.read(replyLength)
+        self.transportStatistics.record(name, len(frames), len(data), timer() - start, len(data) < replyLength)
+        if replyLength and len(data) == 0:
+            raise NoResponseError("No response.")
+        return data
 
-    def writeCommand(self, cmd):
-        self.write(cmd)
-        data = self.read(1)
-        self.port.flush() # ?
-        if data == bytearray():
-            raise NoResponseError
-        if data[0] != com(cmd):
-            raise InvalidResponseError
-        if len(data) > 1:
-            return data[1:]
-        else:
-            return None
+    @staticmethod
+    def checkReply(template, data, replyLength = None):
+        """ ..  py:method:: checkReply(template, data, replyLength = None)
 
-    def readCommand(self, cmd, responseLen, addr = None):
-        self.write(cmd)
-        if addr:
-            self.write((addr >> 8) & 0xff)
-            self.write(addr & 0xff)
-        data = self.read(responseLen)
-        self.port.flush() # ?
-        if data == bytearray():
-            raise NoResponseError
-        if len(data) != responseLen:
-            raise InvalidResponseError
+                Validate the reply to a single command.
+
+                :returns: Reply data or `None` for acknowledged commands.
+        """
+        if replyLength is None:
+            replyLength = template.replyLength
+        if len(data) == 0:
+            raise NoResponseError("{0!s}: no response.".format(template.name))
+        if len(data) != replyLength:
+            raise InvalidResponseError("{0!s}: expected {1:d} bytes got {2:d}.".format(template.name,
+                replyLength, len(data))
+            )
+        if template.acked:
+            if data[0] != com(template.opcode):
+                raise InvalidResponseError("{0!s}: invalid acknowledge 0x{1:02x}.".format(template.name, data[0]))
+            return None
         return data
 
-    def readWord(self, cmd, addr = None):
-        data = self.readCommand(cmd, 2, addr)
-        self.port.flush() # ?
-        if data == bytearray():
-            raise NoResponseError
-        if len(data) != 2:
-            raise InvalidResponseError
-        return data[0] << 8 | data[1]
-
-    def writeWord(self, cmd, data0, data1 = None):
-        self.write(cmd)
-        self.write((data0 >> 8) & 0xff)
-        self.write(data0 & 0xff)
-        if data1:
-            self.write((data1 >> 8) & 0xff)
-            self.write(data1 & 0xff)
-        d = self.read(1)
-        self.port.flush() # ?
-        if d == bytearray():
-            raise NoResponseError
-        if (d[0] != com(cmd)):
-            raise InvalidResponseError
-
-    def writeByte(self, cmd, addr, data):
-        self.write(cmd)
-        self.write((addr >> 8) & 0xff)
-        self.write(addr & 0xff)
-        self.write(data)
-        d = self.read(1)
-        self.port.flush() # ?
-        if d == bytearray():
-            raise NoResponseError
-        if (d[0] != com(cmd)):
-            raise InvalidResponseError
+    def transact(self, frame, template, replyLength = None):
+        """ ..  py:method:: transact(frame, template, replyLength = None)
+
+                Execute a single encoded command.
+
+                :returns: Reply data or `None` for acknowledged commands.
+        """
+        if replyLength is None:
+            replyLength = template.replyLength
+        return self.checkReply(template, self.exchange(frame, replyLength, template.name), replyLength)
+
+    def batch(self):
+        """ ..  py:method:: batch()
+
+                Queue commands for pipelined execution, see :class:`pyBDM.batch.Batch`.
+        """
+        return Batch(self)
+
+    def command(self, cmd, *operands):
+        """ ..  py:method:: command(cmd, *operands)
+
+                Execute a fixed size command.
+        """
+        return self.transact(self.framer.encode(cmd, *operands), self.framer.template(cmd))
+
+    def readRegisters(self):
+        """ ..  py:method:: readRegisters()
+
+                Fetch the complete CPU context with a single pipelined exchange.
+
+                :rtype: :class:`pyBDM.bdm.RegisterContext`
+        """
+        with self.batch() as b:
+            futures = (b.readPC(), b.readD(), b.readX(), b.readY(), b.readSP(), b.readCCR())
+        return RegisterContext(*[f.result() for f in futures])
+
+    def writeCommand(self, cmd):
+        return self.command(cmd)
+
+    def readCommand(self, cmd, responseLen, addr = None):
+        template = self.framer.template(cmd)
+        if responseLen != template.replyLength:
+            raise ValueError("{0!s} replies with {1:d} bytes, not {2:d}.".format(template.name, template.replyLength,
+                responseLen)
+            )
+        if addr is None:
+            return self.command(cmd)
+        return self.command(cmd, addr)
 
     def reset(self):
         self.logger.debug("RESET")
@@ -118,30 +209,42 @@ class ComPod12(BDMBase, serialport.Port):
         data = self.readCommand(VERSION, 2)
         return "{0!s} v{1:02d}.{2:02d}".format(self.DEVICE_NAME, data[0], data[1])
 
-    def readArea(self, addr, length):
-        self.write(READ_AREA)
-        self.write((addr >> 8) & 0xff)
-        self.write(addr & 0xff)
-        self.write(length)
-        data = self.read(length)
-        self.port.flush() # ?
-        if len(data) == 0:
-            raise NoResponseError
-        if len(data) != length:
-            #print "Expected: %u Actual %u" % (length, len(data))
-            raise InvalidResponseError("Expected {0:d} bytes got {1:d}.".format(length, len(data)))
-        return data
-
-    def writeArea(self, addr, length, data):
-        self.write(WRITE_AREA)
-        self.write((addr >> 8) & 0xff)
-        self.write(addr & 0xff)
-        self.write(length)
-        self.write(tuple(data))
-        d = self.read(1)
-        self.port.flush() # ?
-        if d == bytearray():
-            raise NoResponseError
-        if (d[0] != com(WRITE_AREA)):
-            raise InvalidResponseError
-
+    def calibrate(self, cache = None, force = False):
+        """ ..  py:method:: calibrate(cache = None, force = False)
+
+                Determine (or load) the fastest reliable payload size, see
+                :func:`pyBDM.calibration.calibratePayload`.
+        """
+        return calibratePayload(self, cache, force)
+
+    def _readChunk(self, addr, length):
+        template = self.framer.template(READ_AREA)
+        return self.transact(self.framer.encode(READ_AREA, addr, length), template, length)
+
+    def _readChunkInto(self, addr, view):
+        template = self.framer.template(READ_AREA)
+        length = len(view)
+        start = timer()
+        self.write(self.framer.encode(READ_AREA, addr, length))
+        received = self.readinto(view)
+        self.transportStatistics.record(template.name, template.size, received, timer() - start, received < length)
+        if received == 0:
+            raise NoResponseError("{0!s}: no response.".format(template.name))
+        if received != length:
+            raise InvalidResponseError("{0!s}: expected {1:d} bytes got {2:d}.".format(template.name, length, received))
+
+    def writeArea(self, addr, data, *legacy):
+        """ ..  py:method:: writeArea(addr, data)
+
+                See :meth:`pyBDM.bdm.BDMBase.writeArea`, any size is chunked. The
+                former `writeArea(addr, length, data)` form is still accepted.
+        """
+        if legacy:
+            length, data = data, legacy[0]
+            if length != len(data):
+                raise ValueError("writeArea: length {0:d} doesn't match {1:d} bytes of data.".format(length, len(data)))
+        super(ComPod12, self).writeArea(addr, data)
+
+    def _writeChunk(self, addr, data):
+        template = self.framer.template(WRITE_AREA)
+        self.transact(self.framer.encodePayload(WRITE_AREA, data, addr, len(data)), template)
@@ -0,0 +1,942 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+##
+##  Software ComPOD12 speaking the Elektronik-Laden protocol on a pseudo-terminal,
+##  backed by a (very) simplified MC9S12DP256 model.
+##
+##  Usage:
+##      with ComPod12Emulator(baudrate = 38400) as emu:
+##          pod = ComPod12(emu.portName, 38400)
+##          pod.connect()
+##          ...
+##
+
+import os
+import select
+import termios
+import threading
+import time
+import tty
+
+from pyBDM import bdm
+from pyBDM import compod12
+from pyBDM.logger import Logger
+from pyBDM.s12 import BdmpModule, FlashModule, bkpModule, eepModule, mmcModule
+
+REGISTER_SPACE      = (0x0000, 0x0400)
+EEPROM_SPACE        = (0x0400, 0x1000)
+RAM_SPACE           = (0x1000, 0x4000)
+PAGE_WINDOW         = (0x8000, 0xC000)
+BDM_SPACE           = (0xFF00, 0x10000)
+
+PAGE_SIZE           = 0x4000
+FIXED_PAGES         = {0x4000: 0x3E, 0xC000: 0x3F}
+
+FLASH_BLOCK_SIZE    = 0x10000
+FLASH_SECTOR_SIZE   = 1024
+EEPROM_SECTOR_SIZE  = 4
+
+PARTID              = 0x001A
+
+##
+##  Durations of NVM commands (seconds).
+##
+FLASH_TIMING = {
+    FlashModule.ERASE_VERIFY:   35e-6,
+    FlashModule.PROGRAM:        45e-6,
+    FlashModule.SECTOR_ERASE:   20e-3,
+    FlashModule.MASS_ERASE:     100e-3,
+}
+
+EEPROM_TIMING = {
+    eepModule.ERASE_VERIFY:     35e-6,
+    eepModule.WORD_PROGRAM:     45e-6,
+    eepModule.SECTOR_ERASE:     20e-3,
+    eepModule.MASS_ERASE:       100e-3,
+    eepModule.SECTOR_MODIFY:    20e-3 + 45e-6,
+}
+
+
+class NvmBank(object):
+    """State machine of one independently operating flash block."""
+
+    def __init__(self):
+        self.errors = 0x00
+        self.command = None
+        self.latch = None       # (array index, word) of the last array write.
+        self.active = None      # (command, index, word, completion time).
+        self.buffered = None    # (command, index, word).
+
+
+class NvmController(object):
+    """ .. class:: NvmController
+
+        Command state machine shared by the FTS flash and EETS EEPROM modules,
+        including the one-deep command buffer (CBEIF) and per-block concurrency.
+
+        :param array: Backing `bytearray`.
+        :param registerBase: Address of xCLKDIV.
+        :param numBanks: Independent blocks, selected via BKSEL (xCNFG[1:0]).
+        :param sectorSize: Bytes erased by SECTOR_ERASE.
+        :param timing: Dictionary command -> duration in seconds.
+    """
+
+    CLKDIV  = 0
+    SEC     = 1
+    CNFG    = 3
+    PROT    = 4
+    STAT    = 5
+    CMD     = 6
+    ADDR    = 8
+    DATA    = 10
+
+    PROGRAM_COMMANDS = (FlashModule.PROGRAM, )
+
+    def __init__(self, array, registerBase, numBanks, sectorSize, timing, timeScale = 1.0):
+        self.array = array
+        self.registerBase = registerBase
+        self.banks = [NvmBank() for _ in range(numBanks)]
+        self.bankSize = len(array) // numBanks
+        self.sectorSize = sectorSize
+        self.timing = timing
+        self.timeScale = timeScale
+        self.registers = bytearray(16)
+        self.registers[self.SEC] = 0xFE     # Unsecured.
+        self.registers[self.PROT] = 0xFF
+
+    def selectedBank(self):
+        return self.banks[self.registers[self.CNFG] & (len(self.banks) - 1)]
+
+    def bankOf(self, index):
+        """Block number of an array index (block 0 holds the highest addresses)."""
+        return (len(self.banks) - 1) - (index // self.bankSize)
+
+    def _start(self, bank, command, now):
+        cmd, index, word = command
+        bank.active = (cmd, index, word, now + self.timing.get(cmd, 0.0) * self.timeScale)
+
+    def _execute(self, bank, cmd, index, word):
+        array = self.array
+        if cmd in self.PROGRAM_COMMANDS:
+            if array[index] & array[index + 1] != 0xff:
+                bank.errors |= FlashModule.ACCERR    # No cumulative programming without erasing.
+                return
+            array[index], array[index + 1] = word >> 8, word & 0xff
+        elif cmd == FlashModule.SECTOR_ERASE:
+            start = index - (index % self.sectorSize)
+            array[start : start + self.sectorSize] = b'\xff' * self.sectorSize
+        elif cmd == FlashModule.MASS_ERASE:
+            start = index - (index % self.bankSize)
+            array[start : start + self.bankSize] = b'\xff' * self.bankSize
+        elif cmd == eepModule.SECTOR_MODIFY:
+            start = index - (index % self.sectorSize)
+            array[start : start + self.sectorSize] = b'\xff' * self.sectorSize
+            array[index], array[index + 1] = word >> 8, word & 0xff
+
+    def update(self, now = None):
+        """Retire finished commands, start buffered ones."""
+        if now is None:
+            now = time.time()
+        for bank in self.banks:
+            while bank.active and bank.active[3] <= now:
+                cmd, index, word, done = bank.active
+                self._execute(bank, cmd, index, word)
+                bank.active = None
+                if bank.buffered:
+                    self._start(bank, bank.buffered, done)
+                    bank.buffered = None
+
+    def busy(self):
+        self.update()
+        return any(bank.active for bank in self.banks)
+
+    def status(self, bank):
+        self.update()
+        value = bank.errors
+        if bank.buffered is None:
+            value |= FlashModule.CBEIF
+        if bank.active is None and bank.buffered is None:
+            value |= FlashModule.CCIF
+        if bank.command == FlashModule.ERASE_VERIFY and bank.active is None:
+            start = (len(self.banks) - 1 - self.banks.index(bank)) * self.bankSize
+            if self.array[start : start + self.bankSize].count(0xff) == self.bankSize:
+                value |= FlashModule.BLANK
+        return value
+
+    def arrayWrite(self, index, word):
+        bank = self.banks[self.bankOf(index)]
+        if bank is not self.selectedBank() or bank.buffered is not None:
+            bank.errors |= FlashModule.ACCERR
+            return
+        bank.latch = (index & ~1, word)
+
+    def readRegister(self, offset):
+        bank = self.selectedBank()
+        if offset == self.STAT:
+            return self.status(bank)
+        elif offset == self.CMD:
+            return bank.command or 0x00
+        return self.registers[offset]
+
+    def writeRegister(self, offset, value):
+        bank = self.selectedBank()
+        if offset == self.STAT:
+            bank.errors &= ~(value & (FlashModule.PVIOL | FlashModule.ACCERR))
+            if value & FlashModule.CBEIF:
+                self.launch(bank)
+        elif offset == self.CMD:
+            bank.command = value
+        elif offset == self.CLKDIV:
+            self.registers[offset] = value | FlashModule.FDIVLD
+        else:
+            self.registers[offset] = value
+
+    def launch(self, bank):
+        self.update()
+        if bank.latch is None or bank.command not in self.timing or bank.errors:
+            bank.errors |= FlashModule.ACCERR
+            return
+        command = (bank.command, ) + bank.latch
+        bank.latch = None
+        if bank.active is None:
+            self._start(bank, command, time.time())
+        else:
+            bank.buffered = command
+
+
+class EepromController(NvmController):
+    PROGRAM_COMMANDS = (eepModule.WORD_PROGRAM, )
+
+
+class UnknownInstruction(Exception): pass
+
+##
+##  Why the core stopped executing.
+##
+STOP_BACKGROUND     = "BGND"
+STOP_BREAKPOINT     = "BREAKPOINT"
+STOP_UNKNOWN        = "UNKNOWN"
+STOP_BUDGET         = "BUDGET"
+
+GO_SLICE            = 20000     # Instructions executed right away on GO.
+RUN_SLICE           = 2000      # Instructions per idle poll of the emulator.
+PREFETCH_BYTES      = 4         # Instruction queue, forced breakpoints match fetches this far ahead.
+
+CCR_C               = 0x01
+CCR_V               = 0x02
+CCR_Z               = 0x04
+CCR_N               = 0x08
+
+LOOP_REGISTERS      = {0: 'A', 1: 'B', 4: 'D', 5: 'X', 6: 'Y', 7: 'SP'}
+INDEX_REGISTERS     = ('X', 'Y', 'SP')
+
+
+class Cpu12Core(object):
+    """ .. class:: Cpu12Core
+
+        Executes the subset of CPU12 instructions used by the target resident
+        routines (see :mod:`pyBDM.routines`), there is no cycle timing.
+
+        :param target: :class:`S12Target`
+    """
+
+    MAX_STEPS = GO_SLICE
+
+    def __init__(self, target):
+        self.target = target
+        self.instructions = {
+            0x00: self._bgnd,
+            0x04: self._loop,
+            0x18: self._page2,
+            0x1A: self._leax,
+            0x1E: self._brset,
+            0x1F: self._brclr,
+            0x20: self._bra,
+            0x24: self._bcc,
+            0x26: self._bne,
+            0x27: self._beq,
+            0x2B: self._bmi,
+            0x59: self._asld,
+            0x69: self._clr,
+            0x6A: self._staaIndexed,
+            0x6B: self._stab,
+            0x6C: self._std,
+            0x7A: self._staaExtended,
+            0x7C: self._stdExtended,
+            0x83: self._subdImmediate,
+            0x85: self._bitaImmediate,
+            0x86: self._ldaaImmediate,
+            0x88: self._eoraImmediate,
+            0xA6: self._ldaaIndexed,
+            0xA7: self._nop,
+            0xA8: self._eoraIndexed,
+            0xB6: self._ldaaExtended,
+            0xC8: self._eorbImmediate,
+            0xEC: self._lddIndexed,
+            0xED: self._ldyIndexed,
+            0xFC: self._lddExtended,
+            0xFE: self._ldxExtended,
+        }
+
+    ## Register access.
+    def _get(self, name):
+        cpu = self.target.cpu
+        if name == 'A':
+            return cpu['D'] >> 8
+        elif name == 'B':
+            return cpu['D'] & 0xff
+        return cpu[name]
+
+    def _set(self, name, value):
+        cpu = self.target.cpu
+        if name == 'A':
+            cpu['D'] = ((value & 0xff) << 8) | (cpu['D'] & 0xff)
+        elif name == 'B':
+            cpu['D'] = (cpu['D'] & 0xff00) | (value & 0xff)
+        else:
+            cpu[name] = value & 0xffff
+
+    @property
+    def ccr(self):
+        return self.target.bdmRegisters[BdmpModule.BDMCCR & 0xff]
+
+    @ccr.setter
+    def ccr(self, value):
+        self.target.bdmRegisters[BdmpModule.BDMCCR & 0xff] = value & 0xff
+
+    def _flags(self, value, bits, carry = None):
+        """Update N and Z (V cleared), and C if given."""
+        ccr = self.ccr & ~(CCR_N | CCR_Z | CCR_V)
+        if value & (1 << (bits - 1)):
+            ccr |= CCR_N
+        if value & ((1 << bits) - 1) == 0:
+            ccr |= CCR_Z
+        if carry is not None:
+            ccr = (ccr | CCR_C) if carry else (ccr & ~CCR_C)
+        self.ccr = ccr
+
+    def _fetch(self):
+        cpu = self.target.cpu
+        value = self.target.readByte(cpu['PC'])
+        cpu['PC'] = (cpu['PC'] + 1) & 0xffff
+        return value
+
+    def _fetchWord(self):
+        return (self._fetch() << 8) | self._fetch()
+
+    def _indexed(self):
+        """Effective address of the indexed modes with 5-bit offset or auto increment / decrement."""
+        postbyte = self._fetch()
+        register = INDEX_REGISTERS[(postbyte >> 6) & 0x03] if (postbyte >> 6) != 3 else None
+        if register is None:
+            raise UnknownInstruction("Indexed postbyte 0x{0:02x}.".format(postbyte))
+        base = self._get(register)
+        if not postbyte & 0x20:                         # 5-bit constant offset.
+            offset = postbyte & 0x1f
+            return (base + (offset - 0x20 if offset & 0x10 else offset)) & 0xffff
+        amount = postbyte & 0x0f
+        amount = amount + 1 if amount < 8 else amount - 16
+        if postbyte & 0x10:                             # Post increment / decrement.
+            self._set(register, base + amount)
+            return base
+        self._set(register, base + amount)              # Pre increment / decrement.
+        return (base + amount) & 0xffff
+
+    ## Instructions, return `True` to stop.
+    def _bgnd(self):
+        return True
+
+    def _nop(self):
+        return False
+
+    def _loop(self):
+        postbyte = self._fetch()
+        low = self._fetch()
+        operation = postbyte >> 5
+        register = LOOP_REGISTERS.get(postbyte & 0x07)
+        if operation > 5 or register is None:
+            raise UnknownInstruction("Loop postbyte 0x{0:02x}.".format(postbyte))
+        width = 8 if register in ('A', 'B') else 16
+        mask = (1 << width) - 1
+        value = self._get(register)
+        if operation in (0, 1):
+            value = (value - 1) & mask
+        elif operation in (4, 5):
+            value = (value + 1) & mask
+        self._set(register, value)
+        if (value == 0) == (operation in (0, 2, 4)):
+            offset = low - 0x100 if postbyte & 0x10 else low
+            self.target.cpu['PC'] = (self.target.cpu['PC'] + offset) & 0xffff
+        return False
+
+    def _branch(self, condition):
+        offset = self._fetch()
+        if condition:
+            self.target.cpu['PC'] = (self.target.cpu['PC'] + (offset - 0x100 if offset & 0x80 else offset)) & 0xffff
+        return False
+
+    def _bra(self):
+        return self._branch(True)
+
+    def _bne(self):
+        return self._branch(not self.ccr & CCR_Z)
+
+    def _beq(self):
+        return self._branch(self.ccr & CCR_Z)
+
+    def _bmi(self):
+        return self._branch(self.ccr & CCR_N)
+
+    def _bitBranch(self, taken):
+        addr = self._fetchWord()
+        mask = self._fetch()
+        return self._branch(taken(self.target.readByte(addr), mask))
+
+    def _brset(self):
+        return self._bitBranch(lambda value, mask: (~value & mask) == 0)
+
+    def _brclr(self):
+        return self._bitBranch(lambda value, mask: (value & mask) == 0)
+
+    def _page2(self):
+        opcode = self._fetch()
+        if opcode == 0x0B:                              # MOVB #opr8i,opr16a
+            value = self._fetch()
+            self.target.writeByte(self._fetchWord(), value)
+        elif opcode == 0x0C:                            # MOVB opr16a,opr16a
+            value = self.target.readByte(self._fetchWord())
+            self.target.writeByte(self._fetchWord(), value)
+        else:
+            raise UnknownInstruction("Opcode 0x18 0x{0:02x}.".format(opcode))
+        return False
+
+    def _leax(self):
+        self._set('X', self._indexed())
+        return False
+
+    def _load(self, register, value, bits):
+        self._set(register, value)
+        self._flags(value, bits)
+        return False
+
+    def _ldaaImmediate(self):
+        return self._load('A', self._fetch(), 8)
+
+    def _ldaaIndexed(self):
+        return self._load('A', self.target.readByte(self._indexed()), 8)
+
+    def _ldaaExtended(self):
+        return self._load('A', self.target.readByte(self._fetchWord()), 8)
+
+    def _lddIndexed(self):
+        return self._load('D', self.target.readWord(self._indexed()), 16)
+
+    def _lddExtended(self):
+        return self._load('D', self.target.readWord(self._fetchWord()), 16)
+
+    def _ldyIndexed(self):
+        return self._load('Y', self.target.readWord(self._indexed()), 16)
+
+    def _ldxExtended(self):
+        return self._load('X', self.target.readWord(self._fetchWord()), 16)
+
+    def _clr(self):
+        self.target.writeByte(self._indexed(), 0x00)
+        self.ccr = (self.ccr & ~(CCR_N | CCR_V | CCR_C)) | CCR_Z
+        return False
+
+    def _staaIndexed(self):
+        value = self._get('A')
+        self.target.writeByte(self._indexed(), value)
+        self._flags(value, 8)
+        return False
+
+    def _staaExtended(self):
+        value = self._get('A')
+        self.target.writeByte(self._fetchWord(), value)
+        self._flags(value, 8)
+        return False
+
+    def _stdExtended(self):
+        value = self._get('D')
+        self.target.writeWord(self._fetchWord(), value)
+        self._flags(value, 16)
+        return False
+
+    def _subdImmediate(self):
+        value = self._get('D')
+        operand = self._fetchWord()
+        result = (value - operand) & 0xffff
+        self._set('D', result)
+        self._flags(result, 16, operand > value)
+        return False
+
+    def _bitaImmediate(self):
+        self._flags(self._get('A') & self._fetch(), 8)
+        return False
+
+    def _bcc(self):
+        return self._branch(not self.ccr & CCR_C)
+
+    def _asld(self):
+        value = self._get('D')
+        result = (value << 1) & 0xffff
+        self._set('D', result)
+        self._flags(result, 16, value & 0x8000)
+        return False
+
+    def _stab(self):
+        value = self._get('B')
+        self.target.writeByte(self._indexed(), value)
+        self._flags(value, 8)
+        return False
+
+    def _std(self):
+        value = self._get('D')
+        self.target.writeWord(self._indexed(), value)
+        self._flags(value, 16)
+        return False
+
+    def _eor(self, register, operand):
+        value = self._get(register) ^ operand
+        self._set(register, value)
+        self._flags(value, 8)
+        return False
+
+    def _eoraImmediate(self):
+        return self._eor('A', self._fetch())
+
+    def _eorbImmediate(self):
+        return self._eor('B', self._fetch())
+
+    def _eoraIndexed(self):
+        return self._eor('A', self.target.readByte(self._indexed()))
+
+    def step(self):
+        """Execute one instruction, `True` if it was BGND."""
+        pc = self.target.cpu['PC']
+        opcode = self._fetch()
+        instruction = self.instructions.get(opcode)
+        if instruction is None:
+            self.target.cpu['PC'] = pc
+            raise UnknownInstruction("Opcode 0x{0:02x} @ 0x{1:04x}.".format(opcode, pc))
+        try:
+            return instruction()
+        except UnknownInstruction:
+            self.target.cpu['PC'] = pc
+            raise
+
+    def run(self, breakpoint = None, maxSteps = MAX_STEPS, lookahead = 0):
+        """ ..  py:method:: run(breakpoint = None, maxSteps = MAX_STEPS, lookahead = 0)
+
+                :param lookahead: Stop as soon as `breakpoint` lies within this many
+                                  bytes after the program counter (prefetch).
+                :returns: One of the `STOP_` reasons.
+        """
+        for _ in range(maxSteps):
+            if breakpoint is not None and 0 <= breakpoint - self.target.cpu['PC'] <= lookahead:
+                return STOP_BREAKPOINT
+            try:
+                if self.step():
+                    return STOP_BACKGROUND
+            except UnknownInstruction:
+                return STOP_UNKNOWN
+        return STOP_BUDGET
+
+
+class S12Target(object):
+    """ .. class:: S12Target
+
+        Memory map and BDM view of a MC9S12DP256 in special single-chip mode.
+
+        :param flashSize: Size of the paged flash (multiple of 64KB).
+        :param partID: Value of the PARTID register.
+    """
+
+    def __init__(self, flashSize = 256 * 1024, partID = 0x0012, timeScale = 1.0):
+        self.registers = bytearray(REGISTER_SPACE[1])
+        self.ram = bytearray(RAM_SPACE[1] - RAM_SPACE[0])
+        self.eeprom = bytearray(b'\xff' * (EEPROM_SPACE[1] - EEPROM_SPACE[0]))
+        self.flash = bytearray(b'\xff' * flashSize)
+        self.firstPage = 0x40 - (flashSize // PAGE_SIZE)
+        self.partID = partID
+        self.flashController = NvmController(self.flash, FlashModule.FCLKDIV, flashSize // FLASH_BLOCK_SIZE,
+            FLASH_SECTOR_SIZE, FLASH_TIMING, timeScale
+        )
+        self.eepromController = EepromController(self.eeprom, eepModule.ECLKDIV, 1, EEPROM_SECTOR_SIZE, EEPROM_TIMING,
+            timeScale
+        )
+        self.bdmRegisters = bytearray(8)
+        self.cpu = dict(PC = 0x0000, D = 0x0000, X = 0x0000, Y = 0x0000, SP = 0x0000)
+        self.core = Cpu12Core(self)
+        self.running = False
+        self._stopAt = None
+        self.reset()
+
+    def reset(self):
+        self.registers[ : ] = bytearray(len(self.registers))
+        self.registers[PARTID] = self.partID >> 8
+        self.registers[PARTID + 1] = self.partID & 0xff
+        self.registers[mmcModule.MEMSIZ0] = 0x13    # 4K EEPROM, 12K RAM.
+        self.registers[mmcModule.MEMSIZ1] = 0x81
+        self.registers[mmcModule.PPAGE] = self.firstPage
+        self.bdmRegisters[BdmpModule.BDMSTS & 0xff] = BdmpModule.ENBDM | BdmpModule.BDMACT | BdmpModule.UNSEC
+        self.bdmRegisters[BdmpModule.BDMCCR & 0xff] = 0xD8
+        self.cpu.update(PC = self.readWord(0xFFFE), D = 0x0000, X = 0x0000, Y = 0x0000, SP = 0x0000)
+
+    def flashIndex(self, addr):
+        """Index into the flash array of a (local) address, `None` if unmapped."""
+        if PAGE_WINDOW[0] <= addr < PAGE_WINDOW[1]:
+            page = self.registers[mmcModule.PPAGE]
+        else:
+            page = FIXED_PAGES.get(addr & 0xC000)
+            if page is None:
+                return None
+        if page < self.firstPage:
+            return None
+        return (page - self.firstPage) * PAGE_SIZE + (addr & (PAGE_SIZE - 1))
+
+    def readByte(self, addr, bdmInMap = False):
+        addr &= 0xffff
+        if bdmInMap and BDM_SPACE[0] <= addr < BDM_SPACE[0] + len(self.bdmRegisters):
+            return self.bdmRegisters[addr & 0xff]
+        if addr < REGISTER_SPACE[1]:
+            for controller in (self.flashController, self.eepromController):
+                offset = addr - controller.registerBase
+                if 0 <= offset < len(controller.registers):
+                    return controller.readRegister(offset)
+            return self.registers[addr]
+        if addr < EEPROM_SPACE[1]:
+            return self.eeprom[addr - EEPROM_SPACE[0]]
+        if addr < RAM_SPACE[1]:
+            return self.ram[addr - RAM_SPACE[0]]
+        index = self.flashIndex(addr)
+        return 0xff if index is None else self.flash[index]
+
+    def writeByte(self, addr, value, bdmInMap = False):
+        addr &= 0xffff
+        value &= 0xff
+        if bdmInMap and BDM_SPACE[0] <= addr < BDM_SPACE[0] + len(self.bdmRegisters):
+            if addr == BdmpModule.BDMSTS:
+                mask = BdmpModule.ENBDM | BdmpModule.CLKSW
+                value = (self.bdmRegisters[1] & ~mask) | (value & mask)
+            self.bdmRegisters[addr & 0xff] = value
+        elif addr < REGISTER_SPACE[1]:
+            for controller in (self.flashController, self.eepromController):
+                offset = addr - controller.registerBase
+                if 0 <= offset < len(controller.registers):
+                    controller.writeRegister(offset, value)
+                    return
+            if addr not in (PARTID, PARTID + 1):
+                self.registers[addr] = value
+        elif addr < EEPROM_SPACE[1]:
+            self.eepromController.selectedBank().errors |= eepModule.ACCERR  # Word accesses only.
+        elif addr < RAM_SPACE[1]:
+            self.ram[addr - RAM_SPACE[0]] = value
+        elif self.flashIndex(addr) is not None:
+            self.flashController.selectedBank().errors |= FlashModule.ACCERR
+
+    def readWord(self, addr, bdmInMap = False):
+        return self.readByte(addr, bdmInMap) << 8 | self.readByte(addr + 1, bdmInMap)
+
+    def writeWord(self, addr, value, bdmInMap = False):
+        addr &= 0xffff
+        if EEPROM_SPACE[0] <= addr < EEPROM_SPACE[1]:
+            self.eepromController.arrayWrite(addr - EEPROM_SPACE[0], value)
+            return
+        index = self.flashIndex(addr) if addr >= RAM_SPACE[1] else None
+        if index is not None:
+            self.flashController.arrayWrite(index, value)
+            return
+        self.writeByte(addr, value >> 8, bdmInMap)
+        self.writeByte(addr + 1, value & 0xff, bdmInMap)
+
+    def _setActive(self, active):
+        sts = BdmpModule.BDMSTS & 0xff
+        if active:
+            self.bdmRegisters[sts] |= BdmpModule.BDMACT
+        else:
+            self.bdmRegisters[sts] &= ~BdmpModule.BDMACT
+
+    def background(self):
+        self.running = False
+        self._setActive(True)
+
+    def _breakpoint(self, tagging):
+        """`(address, lookahead)` of the BDM breakpoint, forced ones fire on prefetch, tagged ones after TAGGO only."""
+        control = self.registers[bkpModule.BKPCT0]
+        if (control & (bkpModule.BKEN | bkpModule.BKBDM)) != (bkpModule.BKEN | bkpModule.BKBDM):
+            return None
+        address = (self.registers[bkpModule.BKP0H] << 8) | self.registers[bkpModule.BKP0L]
+        if control & bkpModule.BKTAG:
+            return (address, 0) if tagging else None
+        return (address, PREFETCH_BYTES - 1)
+
+    def go(self, untilBackground = False, tagging = False):
+        """Run until BGND or the BDM breakpoint, see `runSlice`."""
+        self._setActive(False)
+        self.running = True
+        self._stopAt = self._breakpoint(tagging)
+        self.runSlice(GO_SLICE)
+
+    def runSlice(self, steps = RUN_SLICE):
+        """ ..  py:method:: runSlice(steps = RUN_SLICE)
+
+                Continue execution for at most `steps` instructions, called by the
+                emulator while no command is pending (BDM accesses are interleaved
+                like cycle steals). Code the core doesn't know runs free, i.e.
+                the target stays out of background mode.
+        """
+        if not self.running:
+            return
+        address, lookahead = self._stopAt or (None, 0)
+        reason = self.core.run(address, steps, lookahead)
+        if reason == STOP_BUDGET:
+            return
+        self.running = False
+        if reason in (STOP_BACKGROUND, STOP_BREAKPOINT):
+            self._setActive(True)
+        elif reason == STOP_UNKNOWN and address is not None:
+            self.cpu['PC'] = address    # Stand-in for the code in between.
+            self._setActive(True)
+
+    def trace1(self):
+        try:
+            self.core.step()
+        except UnknownInstruction:
+            pass
+
+
+FIRMWARE_REGISTERS = {
+    bdm.READ_PC: 'PC', bdm.READ_D: 'D', bdm.READ_X: 'X', bdm.READ_Y: 'Y', bdm.READ_SP: 'SP',
+    bdm.WRITE_PC: 'PC', bdm.WRITE_D: 'D', bdm.WRITE_X: 'X', bdm.WRITE_Y: 'Y', bdm.WRITE_SP: 'SP',
+}
+
+
+class ComPod12Emulator(object):
+    """ .. class:: ComPod12Emulator
+
+        Serves the ComPOD12 protocol on the slave side of a pseudo-terminal.
+
+        :param target: :class:`S12Target` (a fresh one if `None`).
+        :param baudrate: Simulated line speed, determines `byteLatency` if not given.
+        :param byteLatency: Delay per transferred byte (seconds).
+        :param commandLatency: Processing delay per command (seconds).
+        :param readLimit: READ_AREA replies are truncated to this size (simulates
+                          pods loosing data on large transfers).
+        :param baudrates: Rates the pod understands, commands sent at other
+                          rates are ignored (`None`: any rate).
+        :param turnaroundLatency: Delay before replies are delivered once no further
+                                  command is pending, i.e. per host round trip (seconds).
+    """
+
+    VERSION = (1, 5)
+
+    def __init__(self, target = None, baudrate = None, byteLatency = None, commandLatency = 0.0, turnaroundLatency = 0.0,
+            readLimit = None, baudrates = None):
+        self.logger = Logger()
+        self.target = target or S12Target()
+        if byteLatency is None:
+            byteLatency = 10.0 / baudrate if baudrate else 0.0
+        self.byteLatency = byteLatency
+        self.commandLatency = commandLatency
+        self.turnaroundLatency = turnaroundLatency
+        self.readLimit = readLimit
+        self.baudrates = baudrates
+        self.templates = compod12.TEMPLATES
+        self.commandCount = 0
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.portName = os.ttyname(self._slave)
+        self._running = False
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target = self._serve, name = "ComPod12Emulator")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _receive(self, length):
+        data = bytearray()
+        while len(data) < length:
+            if not self._running:
+                return None
+            readable, _, _ = select.select([self._master], [], [], 0 if self.target.running else 0.05)
+            if not readable:
+                self.target.runSlice()
+            else:
+                try:
+                    data.extend(os.read(self._master, length - len(data)))
+                except OSError:
+                    return None
+        return data
+
+    def _send(self, data):
+        view = memoryview(bytes(data))
+        while view:
+            view = view[os.write(self._master, view) : ]
+
+    def _serve(self):
+        while self._running:
+            opcode = self._receive(1)
+            if not opcode:
+                break
+            opcode = opcode[0]
+            if not self._baudrateSupported():
+                continue
+            template = self.templates.get(opcode)
+            if template is None:
+                self.logger.warn("Emulator: unknown opcode 0x{0:02x}.".format(opcode))
+                continue
+            operands = self._receive(template.size - 1)
+            if operands is None:
+                break
+            values = template.struct.unpack(bytes(bytearray([opcode]) + operands))[1 : ]
+            payload = bytearray()
+            if opcode == compod12.WRITE_AREA:
+                payload = self._receive(values[1] or 0x100)
+                if payload is None:
+                    break
+            reply = self.dispatch(opcode, values, payload)
+            self.commandCount += 1
+            delay = self.commandLatency + self.byteLatency * (template.size + len(payload) + len(reply))
+            if self.turnaroundLatency and not self._pending():
+                delay += self.turnaroundLatency
+            if delay:
+                time.sleep(delay)
+            self._send(reply)
+
+    def _baudrateSupported(self):
+        if self.baudrates is None:
+            return True
+        speed = termios.tcgetattr(self._slave)[5]
+        return any(getattr(termios, "B{0:d}".format(rate), None) == speed for rate in self.baudrates)
+
+    def _pending(self):
+        readable, _, _ = select.select([self._master], [], [], 0)
+        return bool(readable)
+
+    def dispatch(self, opcode, operands, payload = None):
+        """ ..  py:method:: dispatch(opcode, operands, payload = None)
+
+                Execute a single decoded command.
+
+                :returns: Reply bytes.
+        """
+        target = self.target
+        ack = bytearray([compod12.com(opcode)])
+        if opcode == compod12.RESET:
+            target.reset()
+            return ack
+        elif opcode == compod12.VERSION:
+            return bytearray(self.VERSION)
+        elif opcode == compod12.READ_AREA:
+            addr, count = operands
+            count = min(count or 0x100, self.readLimit or 0x100)
+            return bytearray(target.readByte(addr + i) for i in range(count))
+        elif opcode == compod12.WRITE_AREA:
+            addr = operands[0]
+            for i, value in enumerate(payload):
+                target.writeByte(addr + i, value)
+            return ack
+        elif opcode in (bdm.READ_BD_BYTE, bdm.READ_BYTE):
+            return bytearray([target.readByte(operands[0], opcode == bdm.READ_BD_BYTE)])
+        elif opcode in (bdm.READ_BD_WORD, bdm.READ_WORD):
+            value = target.readWord(operands[0], opcode == bdm.READ_BD_WORD)
+            return bytearray([value >> 8, value & 0xff])
+        elif opcode in (bdm.WRITE_BD_BYTE, bdm.WRITE_BYTE):
+            target.writeByte(operands[0], operands[1], opcode == bdm.WRITE_BD_BYTE)
+            return ack
+        elif opcode in (bdm.WRITE_BD_WORD, bdm.WRITE_WORD):
+            target.writeWord(operands[0], operands[1], opcode == bdm.WRITE_BD_WORD)
+            return ack
+        elif opcode == bdm.READ_NEXT:
+            target.cpu['X'] = (target.cpu['X'] + 2) & 0xffff
+            value = target.readWord(target.cpu['X'])
+            return bytearray([value >> 8, value & 0xff])
+        elif opcode == bdm.WRITE_NEXT:
+            target.cpu['X'] = (target.cpu['X'] + 2) & 0xffff
+            target.writeWord(target.cpu['X'], operands[0])
+            return ack
+        elif opcode in FIRMWARE_REGISTERS:
+            register = FIRMWARE_REGISTERS[opcode]
+            if operands:
+                target.cpu[register] = operands[0]
+                return ack
+            value = target.cpu[register]
+            return bytearray([value >> 8, value & 0xff])
+        elif opcode == bdm.BACKGROUND:
+            target.background()
+        elif opcode == bdm.GO:
+            target.go(False)
+        elif opcode == bdm.GO_UNTIL:
+            target.go(True)
+        elif opcode == bdm.TRACE1:
+            target.trace1()
+        elif opcode == bdm.TAGGO:
+            target.go(False, True)
+        return ack
+
+
+def main():
+    emulator = ComPod12Emulator()
+    print("ComPOD12 emulator listening on '{0!s}'.".format(emulator.portName))
+    emulator.start()
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    emulator.stop()
+
+
+if __name__ == '__main__':
+    main()
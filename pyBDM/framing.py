@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import struct
+
+from pyBDM import bdm
+
+##
+##  Wire layout of BDM commands.
+##
+##  Every command is encoded into a single frame (opcode followed by big-endian
+##  operands), so it can be handed to the port with one write.
+##
+NO_OPERANDS     = ""
+ADDRESS         = "H"
+WORD            = "H"
+ADDRESS_BYTE    = "HB"
+ADDRESS_WORD    = "HH"
+
+
+class Template(object):
+    """ .. class:: Template
+
+        Describes request layout and expected reply of a single command.
+
+        :param name: Mnemonic, used for logging and statistics.
+        :param opcode: Command byte.
+        :param operands: `struct` format of the operands (without byte order).
+        :param replyLength: Number of bytes answered by the pod.
+        :param acked: Reply consists of the complemented opcode only.
+    """
+
+    def __init__(self, name, opcode, operands = NO_OPERANDS, replyLength = 1, acked = True):
+        self.name = name
+        self.opcode = opcode
+        self.struct = struct.Struct(">B{0}".format(operands))
+        self.replyLength = replyLength
+        self.acked = acked
+
+    @property
+    def size(self):
+        return self.struct.size
+
+    def __repr__(self):
+        return "Template({0!s}, 0x{1:02x}, size = {2:d}, replyLength = {3:d})".format(self.name, self.opcode,
+            self.size, self.replyLength
+        )
+
+
+def _reader(name, opcode, operands, replyLength):
+    return Template(name, opcode, operands, replyLength, acked = False)
+
+def _writer(name, opcode, operands = NO_OPERANDS):
+    return Template(name, opcode, operands, 1, acked = True)
+
+
+BDM_TEMPLATES = dict((t.opcode, t) for t in (
+    # Hardware Commands.
+    _writer("BACKGROUND",       bdm.BACKGROUND),
+    _writer("ACK_ENABLE",       bdm.ACK_ENABLE),
+    _writer("ACK_DISABLE",      bdm.ACK_DISABLE),
+    _reader("READ_BD_BYTE",     bdm.READ_BD_BYTE,   ADDRESS, 1),
+    _reader("READ_BD_WORD",     bdm.READ_BD_WORD,   ADDRESS, 2),
+    _reader("READ_BYTE",        bdm.READ_BYTE,      ADDRESS, 1),
+    _reader("READ_WORD",        bdm.READ_WORD,      ADDRESS, 2),
+    _writer("WRITE_BD_BYTE",    bdm.WRITE_BD_BYTE,  ADDRESS_BYTE),
+    _writer("WRITE_BD_WORD",    bdm.WRITE_BD_WORD,  ADDRESS_WORD),
+    _writer("WRITE_BYTE",       bdm.WRITE_BYTE,     ADDRESS_BYTE),
+    _writer("WRITE_WORD",       bdm.WRITE_WORD,     ADDRESS_WORD),
+    # Firmware Commands.
+    _reader("READ_NEXT",        bdm.READ_NEXT,      NO_OPERANDS, 2),
+    _reader("READ_PC",          bdm.READ_PC,        NO_OPERANDS, 2),
+    _reader("READ_D",           bdm.READ_D,         NO_OPERANDS, 2),
+    _reader("READ_X",           bdm.READ_X,         NO_OPERANDS, 2),
+    _reader("READ_Y",           bdm.READ_Y,         NO_OPERANDS, 2),
+    _reader("READ_SP",          bdm.READ_SP,        NO_OPERANDS, 2),
+    _writer("WRITE_NEXT",       bdm.WRITE_NEXT,     WORD),
+    _writer("WRITE_PC",         bdm.WRITE_PC,       WORD),
+    _writer("WRITE_D",          bdm.WRITE_D,        WORD),
+    _writer("WRITE_X",          bdm.WRITE_X,        WORD),
+    _writer("WRITE_Y",          bdm.WRITE_Y,        WORD),
+    _writer("WRITE_SP",         bdm.WRITE_SP,       WORD),
+    _writer("GO_UNTIL",         bdm.GO_UNTIL),
+    _writer("GO",               bdm.GO),
+    _writer("TRACE1",           bdm.TRACE1),
+    _writer("TAGGO",            bdm.TAGGO),
+))
+
+
+class Framer(object):
+    """ .. class:: Framer
+
+        Encodes commands into preallocated frames.
+
+        Every port owns its own `Framer`, the returned frames are only valid
+        until the next call of `encode` for the same opcode.
+
+        :param templates: Dictionary opcode -> :class:`Template`.
+        :param payloadOpcodes: Opcodes followed by a variable length payload
+                               (e.g. WRITE_AREA) mapped to the maximum payload size.
+    """
+
+    def __init__(self, templates, payloadOpcodes = None):
+        self.templates = templates
+        self._buffers = {}
+        for opcode, template in templates.items():
+            maxPayload = (payloadOpcodes or {}).get(opcode, 0)
+            self._buffers[opcode] = bytearray(template.size + maxPayload)
+            if template.size == 1:
+                template.struct.pack_into(self._buffers[opcode], 0, opcode)
+
+    def template(self, opcode):
+        """ ..  py:method:: template(opcode)
+
+                :rtype: :class:`Template`
+        """
+        try:
+            return self.templates[opcode]
+        except KeyError:
+            raise ValueError("Unknown opcode 0x{0:02x}.".format(opcode))
+
+    def encode(self, opcode, *operands):
+        """ ..  py:method:: encode(opcode, *operands)
+
+                Encode a fixed size command.
+
+                :rtype: bytearray
+        """
+        template = self.template(opcode)
+        frame = self._buffers[opcode]
+        if template.size > 1:
+            template.struct.pack_into(frame, 0, opcode, *operands)
+        return frame
+
+    def encodePayload(self, opcode, payload, *operands):
+        """ ..  py:method:: encodePayload(opcode, payload, *operands)
+
+                Encode a command followed by a variable length payload.
+
+                :rtype: memoryview
+        """
+        template = self.template(opcode)
+        frame = self._buffers[opcode]
+        size = template.size
+        length = len(payload)
+        if size + length > len(frame):
+            raise ValueError("Payload too large ({0:d} bytes).".format(length))
+        template.struct.pack_into(frame, 0, opcode, *operands)
+        frame[size : size + length] = payload
+        return memoryview(frame)[ : size + length]
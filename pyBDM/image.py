@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+##
+##  Memory image readers and writers.
+##
+##  All writers consume streams of `(address, data)` pairs (see
+##  `BDMBase.iterArea`) and emit each chunk as soon as it arrives, so memory
+##  use doesn't depend on the size of the image.
+##
+##  Readers return lists of `(address, data)` segments as found in the file,
+##  see `coalesce` for overlapping or adjacent ones.
+##
+
+import binascii
+from operator import itemgetter
+import os
+import struct
+
+RECORD_LENGTH   = 0x20
+
+
+class ImageError(Exception): pass
+
+
+def writeBinary(stream, fout):
+    """ ..  py:function:: writeBinary(stream, fout)
+
+            Write the raw bytes, gaps between chunks are not filled.
+
+            :returns: Number of bytes written.
+    """
+    total = 0
+    for _, data in stream:
+        fout.write(data)
+        total += len(data)
+    return total
+
+
+def _srecord(recordType, addressLength, address, data = b""):
+    record = bytearray([addressLength + len(data) + 1])
+    record.extend((address >> (8 * i)) & 0xff for i in reversed(range(addressLength)))
+    record.extend(data)
+    record.append(~sum(record) & 0xff)
+    return "S{0:d}{1!s}\n".format(recordType, binascii.hexlify(bytes(record)).decode("ascii").upper())
+
+
+def writeSRecords(stream, fout, header = "pyBDM", recordLength = RECORD_LENGTH):
+    """ ..  py:function:: writeSRecords(stream, fout, header = "pyBDM", recordLength = RECORD_LENGTH)
+
+            Write Motorola S-Records, S1/S2/S3 are chosen per record by address,
+            the termination record matches the widest one.
+
+            :returns: Number of data records written.
+    """
+    fout.write(_srecord(0, 2, 0, bytearray(header.encode("ascii"))))
+    count = 0
+    widest = 1
+    for address, data in stream:
+        for offset in range(0, len(data), recordLength):
+            current = address + offset
+            chunk = data[offset : offset + recordLength]
+            if current + len(chunk) <= 0x10000:
+                recordType, addressLength = 1, 2
+            elif current + len(chunk) <= 0x1000000:
+                recordType, addressLength = 2, 3
+            else:
+                recordType, addressLength = 3, 4
+            fout.write(_srecord(recordType, addressLength, current, chunk))
+            widest = max(widest, recordType)
+            count += 1
+    fout.write(_srecord(10 - widest, widest + 1, 0))
+    return count
+
+
+def _ihexRecord(recordType, address, data = b""):
+    record = bytearray([len(data), (address >> 8) & 0xff, address & 0xff, recordType])
+    record.extend(data)
+    record.append(-sum(record) & 0xff)
+    return ":{0!s}\n".format(binascii.hexlify(bytes(record)).decode("ascii").upper())
+
+
+def writeIntelHex(stream, fout, recordLength = RECORD_LENGTH):
+    """ ..  py:function:: writeIntelHex(stream, fout, recordLength = RECORD_LENGTH)
+
+            Write Intel HEX, addresses above 64K use extended linear address records.
+
+            :returns: Number of data records written.
+    """
+    upper = 0
+    count = 0
+    for address, data in stream:
+        offset = 0
+        while offset < len(data):
+            current = address + offset
+            if (current >> 16) != upper:
+                upper = current >> 16
+                fout.write(_ihexRecord(4, 0, bytearray([upper >> 8, upper & 0xff])))
+            size = min(recordLength, len(data) - offset, 0x10000 - (current & 0xffff))  # Don't cross 64K.
+            fout.write(_ihexRecord(0, current & 0xffff, data[offset : offset + size]))
+            offset += size
+            count += 1
+    fout.write(_ihexRecord(1, 0))
+    return count
+
+
+WRITERS = {
+    'bin':  writeBinary,
+    'srec': writeSRecords,
+    'ihex': writeIntelHex,
+}
+
+
+def _hexRecord(line, lineNumber):
+    try:
+        return bytearray(binascii.unhexlify(line))
+    except (binascii.Error, TypeError, ValueError):
+        raise ImageError("Line {0:d}: invalid hex digits.".format(lineNumber))
+
+
+def readSRecords(fin):
+    """ ..  py:function:: readSRecords(fin)
+
+            Parse Motorola S-Records (S1/S2/S3 data records), checksums are verified.
+
+            :rtype: list of (address, bytearray)
+    """
+    segments = []
+    for lineNumber, line in enumerate(fin, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] != 'S' or len(line) < 4:
+            raise ImageError("Line {0:d}: not an S-Record.".format(lineNumber))
+        record = _hexRecord(line[2 : ], lineNumber)
+        if record[0] != len(record) - 1:
+            raise ImageError("Line {0:d}: invalid length.".format(lineNumber))
+        if sum(record) & 0xff != 0xff:
+            raise ImageError("Line {0:d}: checksum error.".format(lineNumber))
+        addressLength = {'1': 2, '2': 3, '3': 4}.get(line[1])
+        if addressLength is None:
+            continue    # Header, count and termination records.
+        address = 0
+        for byte in record[1 : 1 + addressLength]:
+            address = (address << 8) | byte
+        segments.append((address, record[1 + addressLength : -1]))
+    return segments
+
+
+def readIntelHex(fin):
+    """ ..  py:function:: readIntelHex(fin)
+
+            Parse Intel HEX, including extended segment and linear address records.
+
+            :rtype: list of (address, bytearray)
+    """
+    segments = []
+    base = 0
+    for lineNumber, line in enumerate(fin, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] != ':':
+            raise ImageError("Line {0:d}: not an Intel HEX record.".format(lineNumber))
+        record = _hexRecord(line[1 : ], lineNumber)
+        if len(record) < 5 or record[0] != len(record) - 5:
+            raise ImageError("Line {0:d}: invalid length.".format(lineNumber))
+        if sum(record) & 0xff:
+            raise ImageError("Line {0:d}: checksum error.".format(lineNumber))
+        recordType, data = record[3], record[4 : -1]
+        if recordType == 0:
+            segments.append((base + ((record[1] << 8) | record[2]), data))
+        elif recordType == 1:
+            break
+        elif recordType == 2:
+            base = ((data[0] << 8) | data[1]) << 4
+        elif recordType == 4:
+            base = ((data[0] << 8) | data[1]) << 16
+    return segments
+
+
+PT_LOAD = 1
+
+def readElf(fin):
+    """ ..  py:function:: readElf(fin)
+
+            Loadable segments (PT_LOAD) of a 32-bit ELF file (binary mode), placed
+            at their physical (load) address.
+
+            :rtype: list of (address, bytearray)
+    """
+    image = fin.read()
+    if image[ : 4] != b'\x7fELF':
+        raise ImageError("Not an ELF file.")
+    if bytearray(image[4 : 5])[0] != 1:
+        raise ImageError("Only 32-bit ELF files are supported.")
+    order = {1: '<', 2: '>'}.get(bytearray(image[5 : 6])[0])
+    if order is None:
+        raise ImageError("Invalid ELF data encoding.")
+    phoff, = struct.unpack_from(order + 'I', image, 28)
+    phentsize, phnum = struct.unpack_from(order + 'HH', image, 42)
+    segments = []
+    for index in range(phnum):
+        pType, offset, _, paddr, filesz, _, _, _ = struct.unpack_from(order + '8I', image, phoff + index * phentsize)
+        if pType == PT_LOAD and filesz:
+            if offset + filesz > len(image):
+                raise ImageError("Segment {0:d} exceeds the file.".format(index))
+            segments.append((paddr, bytearray(image[offset : offset + filesz])))
+    return segments
+
+
+READERS = {
+    'srec': (readSRecords, 'r'),
+    'ihex': (readIntelHex, 'r'),
+    'elf':  (readElf, 'rb'),
+}
+
+EXTENSIONS = {
+    '.s19': 'srec', '.s28': 'srec', '.s37': 'srec', '.srec': 'srec', '.mot': 'srec', '.sx': 'srec',
+    '.hex': 'ihex', '.ihex': 'ihex',
+    '.elf': 'elf', '.abs': 'elf',
+}
+
+
+def readImage(filename, format = None):
+    """ ..  py:function:: readImage(filename, format = None)
+
+            :param format: Key of :data:`READERS`, default: guessed from the file extension.
+            :rtype: list of (address, bytearray)
+    """
+    if format is None:
+        format = EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+        if format is None:
+            raise ImageError("Unknown image format of '{0!s}'.".format(filename))
+    reader, mode = READERS[format]
+    with open(filename, mode) as fin:
+        return reader(fin)
+
+
+def coalesce(segments, alignment = 1, fill = 0xff):
+    """ ..  py:function:: coalesce(segments, alignment = 1, fill = 0xff)
+
+            Merge overlapping and adjacent segments, later segments take
+            precedence. Segments are extended to multiples of `alignment`
+            (e.g. the programming phrase), padded with `fill`.
+
+            :rtype: Sorted list of non-overlapping (address, bytearray)
+    """
+    extents = []
+    for index, (address, data) in enumerate(segments):
+        if len(data):
+            start = address - (address % alignment)
+            end = address + len(data)
+            end += -end % alignment
+            extents.append((start, end, index))
+    extents.sort(key = itemgetter(0, 2))
+    clusters = []
+    for start, end, index in extents:
+        if clusters and start <= clusters[-1][1]:
+            clusters[-1][1] = max(clusters[-1][1], end)
+            clusters[-1][2].append(index)
+        else:
+            clusters.append([start, end, [index]])
+    result = []
+    for start, end, indices in clusters:
+        block = bytearray([fill]) * (end - start)
+        for index in sorted(indices):
+            address, data = segments[index]
+            block[address - start : address - start + len(data)] = data
+        result.append((start, block))
+    return result
@@ -26,12 +26,15 @@ __copyright__ = """
   51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
 
-import serialport
-
-from bdm import BDMBase
-#from port import Port
+import struct
 import time
 
+from pyBDM import serialport
+from pyBDM.bdm import BDMBase, CommunicationError, RegisterContext, TargetTimeoutError, UnexpectedHaltError
+from pyBDM.calibration import probe, CANDIDATES, SCRATCH_ADDRESS
+from pyBDM.framing import Framer, Template, BDM_TEMPLATES, NO_OPERANDS
+from pyBDM.stats import timer
+
 SYNC                = 0x00
 RESET_CPU           = 0x01
 RESET_LOW           = 0x02
@@ -49,15 +52,62 @@ EXT_IOCTL           = 0x05
 EXT_MEMPUT          = 0x06
 EXT_EXTENDEDSPEED   = 0x07
 
+##
+##  Layout of the extended commands (sent after EXTENDED_COMMAND).
+##  MEMDUMP / MEMPUT move `count` words starting at an even address.
+##
+EXT_TEMPLATES = dict((t.opcode, t) for t in (
+    Template("EXT_VERSION",     EXT_VERSION,    NO_OPERANDS,    1, acked = False),
+    Template("EXT_REGDUMP",     EXT_REGDUMP,    NO_OPERANDS,    11, acked = False),  # -> PC D X Y SP CCR
+    Template("EXT_TRACETO",     EXT_TRACETO,    "H",            1, acked = False),   # ADDR -> status, when reached
+    Template("EXT_MEMDUMP",     EXT_MEMDUMP,    "HH",           0, acked = False),   # ADDR COUNT -> data
+    Template("EXT_MEMPUT",      EXT_MEMPUT,     "HH",           0, acked = False),   # ADDR COUNT data
+    Template("EXT_SETPARAM",    EXT_SETPARAM,   "BH",           0, acked = False),   # PARAMETER VALUE
+    Template("EXT_EXTENDEDSPEED", EXT_EXTENDEDSPEED, "B",       0, acked = False),   # ON/OFF
+))
+
+# EXT_TRACETO status.
+TRACE_REACHED       = 0x00
+
+# EXT_SETPARAM parameters.
+PARAM_BDM_TIMING    = 0x00  # BDM bit time, 0 is the fastest.
+
+BDM_TIMINGS         = (0, 1, 2, 3)
+DEFAULT_TIMING      = BDM_TIMINGS[-1]
+EXTENDED_SPEED_VERSION = (4, 5)
+
+REGDUMP             = struct.Struct(">HHHHHB")
+
+CTS_TIMEOUT         = 0.1
+POLL_INTERVAL       = 0.0005
+
+
 class KevinRoBDM12(BDMBase, serialport.Port):
-    MAX_PAYLOAD = 0xffff
+    MAX_PAYLOAD = 0xffff            # Bytes per EXT_MEMDUMP / EXT_MEMPUT (word aligned).
+    MAX_READ_PAYLOAD = 0x100    # Bytes per handshake block.
+    MAX_WRITE_PAYLOAD = 0x100
     DEVICE_NAME = "Kevin Ross BDM12"
 
+    def __init__(self, *args, **kwargs):
+        super(KevinRoBDM12, self).__init__(*args, **kwargs)
+        self.framer = Framer(BDM_TEMPLATES)
+
     def reset(self):
         self.logger.debug("RESET")
 
-    def connect(self):
+    def connect(self, highSpeed = False):
+        """ ..  py:method:: connect(highSpeed = False)
+
+                Open the port and detect the firmware, with `highSpeed` extended
+                speed and the fastest working BDM timing are negotiated.
+
+                Negotiation reads and writes RAM at `SCRATCH_ADDRESS`, so only ask
+                for it with a powered and halted target. Otherwise call
+                `negotiateSpeed` after halting or resetting it.
+        """
         super(KevinRoBDM12, self).connect()
+        self.extendedSpeed = False
+        self.bdmTiming = DEFAULT_TIMING
         self.port.dtrdsr = 0
         self.port.rtscts = 0
 
@@ -66,50 +116,220 @@ class KevinRoBDM12(BDMBase, serialport.Port):
         time.sleep(0.01)
         if not self.port.getCTS():
             self.logger.error("Nothing attached. Check cable and BDM12 power.")
-            raise BDM.CommunicationError()
+            raise CommunicationError()
         self.port.setRTS(0)
         time.sleep(0.01)
         if self.port.getCTS():
             self.extendedCommandsSupported = self.ctsRtsControl = True     # >= v4.5
         else:
             self.extendedCommandsSupported = self.ctsRtsControl = False    # <= v4.4
+        if highSpeed and self.extendedCommandsSupported:
+            self.negotiateSpeed()
+
+    def _waitCTS(self, state, timeout):
+        deadline = timer() + timeout
+        while self.port.getCTS() != state:
+            if timer() > deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
+        return True
 
     def write(self, data):
-        startTime = 0
-        timeSpan = 0
-        waitCTSToClearTimeout = self.ctsRtsControl and 0.100 or 0.02
-
-        for ch in data:
-            if self.ctsRtsControl:
-                self.port.setRTS(1)
-            startTime = time.time()
-            timeSpan = -1.0
-            while timeSpan < 0.1:
-                if self.port.getCTS():
-                    break
-                timeSpan = time.time() - startTime
-            if not self.port.getCTS():
-                self.logger.error("CTS not asserted by BDM interface. Check cable and BDM12 power.")
-                raise BDM.CommunicationError()
-            self.port.write(ch)
-            startTime = time.time()
-            timeSpan = -1.0
-            while timeSpan<waitCTSToClearTimeout:
-                if not self.port.getCTS():
-                    break
-                timeSpan = time.time() - startTime
-            if self.ctsRtsControl:
-                self.port.setRTS(0)
-                if self.port.getCTS():
-                    self.logger.debug("CTS not cleared.")
-
-    def extendedCommand(self, code, *operands):
-        pass
+        """ ..  py:method:: write(data)
+
+                Send `data` as one block with a single RTS/CTS handshake (firmware >= v4.5),
+                older firmware paces every byte with CTS.
+        """
+        if isinstance(data, int):
+            data = (data, )
+        data = bytearray(data)
+        if self.ctsRtsControl:
+            self._writeBlock(data)
+        else:
+            for offset in range(len(data)):
+                self._writeBlock(data[offset : offset + 1])
+
+    def _writeBlock(self, data):
+        """Send `data` with a single CTS handshake."""
+        if self.ctsRtsControl:
+            self.port.setRTS(1)
+        if not self._waitCTS(True, CTS_TIMEOUT):
+            self.logger.error("CTS not asserted by BDM interface. Check cable and BDM12 power.")
+            raise CommunicationError()
+        start = timer()
+        self.port.write(data)
+        self.transportStatistics.record(self.transportStatistics.PORT, len(data), 0, timer() - start)
+        self._waitCTS(False, self.ctsRtsControl and 0.100 or 0.02)
+        if self.ctsRtsControl:
+            self.port.setRTS(0)
+            if self.port.getCTS():
+                self.logger.debug("CTS not cleared.")
+
+    def command(self, cmd, *operands):
+        """ ..  py:method:: command(cmd, *operands)
+
+                BDM commands are passed through verbatim, the pod answers read
+                commands only.
+        """
+        template = self.framer.template(cmd)
+        start = timer()
+        self.write(self.framer.encode(cmd, *operands))
+        data = None if template.acked else self._readBlock(template.replyLength)
+        self.transportStatistics.record(template.name, template.size, 0 if data is None else len(data),
+            timer() - start
+        )
+        return data
+
+    def _readBlock(self, length, timeout = None):
+        """Read exactly `length` bytes, allowing for the transfer time of the block."""
+        deadline = timer() + (self.timeout if timeout is None else timeout) + (length * 10.0 / self.baudrate)
+        data = bytearray()
+        while len(data) < length and timer() < deadline:
+            data.extend(self.read(length - len(data)))
+        if len(data) != length:
+            raise CommunicationError("Expected {0:d} bytes got {1:d}.".format(length, len(data)))
+        return data
+
+    def extendedCommand(self, code, *operands, **kws):
+        """ ..  py:method:: extendedCommand(code, *operands, replyLength = None, payload = None, timeout = None)
+
+                Execute an extended command (firmware >= v4.5).
+
+                :returns: Reply data (`replyLength` bytes, default: according to the template).
+        """
+        if not self.extendedCommandsSupported:
+            raise CommunicationError("Extended commands require firmware v4.5 or later.")
+        template = EXT_TEMPLATES[code]
+        replyLength = kws.get('replyLength')
+        if replyLength is None:
+            replyLength = template.replyLength
+        frame = bytearray([EXTENDED_COMMAND]) + template.struct.pack(code, *operands)
+        payload = kws.get('payload')
+        if payload is not None:
+            frame.extend(payload)
+        start = timer()
+        self.write(frame)
+        data = self._readBlock(replyLength, kws.get('timeout')) if replyLength else None
+        self.transportStatistics.record(template.name, len(frame), replyLength, timer() - start)
+        return data
+
+    def firmwareVersion(self):
+        """ ..  py:method:: firmwareVersion()
+
+                :returns: (major, minor), `None` for firmware older than v4.5.
+        """
+        if not self.extendedCommandsSupported:
+            return None
+        data = self.extendedCommand(EXT_VERSION)
+        return ((data[0] >> 4) & 0x07), (data[0] & 0x0f)
 
     def getPODVersion(self):
-        if self.extendedCommandsSupported:
-            data=self.extendedCommand(EXT_VERSION)
-            return "{0} v{1:02d}.{2:02d}".format(self.DEVICE_NAME, ((data[0] >> 4) & 0x07), (data[0] & 0x0f))
+        version = self.firmwareVersion()
+        if version:
+            return "{0} v{1:02d}.{2:02d}".format(self.DEVICE_NAME, version[0], version[1])
         else:
             return "{0} < v4.5".format(self.DEVICE_NAME)
 
+    def readRegisters(self):
+        """ ..  py:method:: readRegisters()
+
+                Fetch the complete CPU context with a single EXT_REGDUMP.
+
+                :rtype: :class:`pyBDM.bdm.RegisterContext`
+        """
+        if not self.extendedCommandsSupported:
+            return super(KevinRoBDM12, self).readRegisters()
+        return RegisterContext(*REGDUMP.unpack(bytes(self.extendedCommand(EXT_REGDUMP))))
+
+    def setParameter(self, parameter, value):
+        self.logger.debug("EXT_SETPARAM[0x{0:02x}]=0x{1:04x}".format(parameter, value))
+        self.extendedCommand(EXT_SETPARAM, parameter, value)
+
+    def setExtendedSpeed(self, enable):
+        self.logger.debug("EXT_EXTENDEDSPEED[{0:d}]".format(bool(enable)))
+        self.extendedCommand(EXT_EXTENDEDSPEED, 1 if enable else 0)
+        self.extendedSpeed = bool(enable)
+
+    def negotiateSpeed(self, timings = BDM_TIMINGS):
+        """ ..  py:method:: negotiateSpeed(timings = BDM_TIMINGS)
+
+                Switch to extended speed and try the BDM `timings` from the
+                fastest on, each confirmed by a read-back pattern test in RAM
+                (restored afterwards). Falls back to standard speed and the
+                slowest timing.
+
+                :returns: `True` if extended speed is in use.
+        """
+        version = self.firmwareVersion()
+        if version is None or version < EXTENDED_SPEED_VERSION:
+            return False
+        saved = self._readChunk(SCRATCH_ADDRESS, CANDIDATES[0])     # At the current, trusted speed.
+        self.setExtendedSpeed(True)
+        for timing in sorted(timings):
+            self.setParameter(PARAM_BDM_TIMING, timing)
+            if probe(self, CANDIDATES[0], SCRATCH_ADDRESS, 1) is not None:
+                self.bdmTiming = timing
+                self.logger.info("Extended speed, BDM timing {0:d}.".format(timing))
+                break
+            self.transportStatistics.recordRetry("EXT_SETPARAM")
+        else:
+            self.logger.warn("Extended speed not usable, falling back to standard speed.")
+            self.setExtendedSpeed(False)
+            self.setParameter(PARAM_BDM_TIMING, DEFAULT_TIMING)
+            self.bdmTiming = DEFAULT_TIMING
+        self._writeChunk(SCRATCH_ADDRESS, saved)
+        return self.extendedSpeed
+
+    def runTo(self, addr, timeout = 1.0):
+        """ ..  py:method:: runTo(addr, timeout = 1.0)
+
+                Let the pod trace the target until the program counter reaches
+                `addr` (EXT_TRACETO), falls back to a hardware breakpoint on
+                firmware older than v4.5.
+
+                :returns: The program counter.
+                :raises TargetTimeoutError: `addr` wasn't reached within `timeout` seconds.
+                :raises UnexpectedHaltError: The pod reported a failure or the target stopped elsewhere.
+        """
+        if not self.extendedCommandsSupported:
+            return super(KevinRoBDM12, self).runTo(addr, timeout)
+        self.logger.debug("EXT_TRACETO[0x{0:04x}]".format(addr))
+        try:
+            status = self.extendedCommand(EXT_TRACETO, addr, timeout = timeout)[0]
+        except CommunicationError:
+            self.purge()
+            self.write(SYNC)    # Abort tracing.
+            raise TargetTimeoutError("0x{0:04x} not reached within {1:.3f}s.".format(addr, timeout))
+        pc = self.readPC()
+        if status != TRACE_REACHED or pc != addr:
+            raise UnexpectedHaltError("Trace stopped at 0x{0:04x} (status 0x{1:02x}) before reaching 0x{2:04x}.".format(
+                pc, status, addr)
+            )
+        return pc
+
+    def _checkPayload(self, name, words):
+        if words * 2 > self.MAX_PAYLOAD:
+            raise ValueError("{0!s}: {1:d} bytes exceed MAX_PAYLOAD ({2:d}).".format(name, words * 2, self.MAX_PAYLOAD))
+
+    def _readChunk(self, addr, length):
+        """Read up to `MAX_READ_PAYLOAD` bytes with a single EXT_MEMDUMP."""
+        if not self.extendedCommandsSupported:
+            return super(KevinRoBDM12, self)._readChunk(addr, length)
+        start = addr & ~1
+        words = (addr + length - start + 1) // 2
+        self._checkPayload("EXT_MEMDUMP", words)
+        data = self.extendedCommand(EXT_MEMDUMP, start, words, replyLength = words * 2)
+        return data[addr - start : addr - start + length]
+
+    def _writeChunk(self, addr, data):
+        """Write up to `MAX_WRITE_PAYLOAD` bytes with a single EXT_MEMPUT."""
+        if not self.extendedCommandsSupported:
+            return super(KevinRoBDM12, self)._writeChunk(addr, data)
+        data = bytearray(data)
+        start = addr & ~1
+        if start != addr:                   # Merge unaligned head ...
+            data[0 : 0] = self._readChunk(start, 1)
+        if len(data) & 1:                   # ... and tail.
+            data.extend(self._readChunk(start + len(data), 1))
+        self._checkPayload("EXT_MEMPUT", len(data) // 2)
+        self.extendedCommand(EXT_MEMPUT, start, len(data) // 2, payload = data)
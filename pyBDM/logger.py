@@ -36,11 +36,12 @@ class Logger(object):
     def __init__(self, level = logging.WARN):
         self.logger = logging.getLogger("{0}".format(self.LOGGER_BASE_NAME))
         self.logger.setLevel(level)
-        handler = logging.StreamHandler()
-        handler.setLevel(level)
-        formatter = logging.Formatter(self.FORMAT)
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
+        if not self.logger.handlers:    # Shared by all pods and modules.
+            handler = logging.StreamHandler()
+            handler.setLevel(level)
+            formatter = logging.Formatter(self.FORMAT)
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
         self.lastSeverity = None
         self.lastMessage = None
 
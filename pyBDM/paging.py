@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+##
+##  Access to banked flash through the PPAGE window.
+##
+##  Global (linear) addresses are PPAGE * 0x4000 + offset, e.g. 0xF8000 is
+##  offset 0x0000 of page 0x3E.
+##
+
+from operator import itemgetter
+
+from pyBDM.s12.mmcModule import PPAGE
+
+PAGE_SIZE       = 0x4000
+PAGE_WINDOW     = 0x8000
+FIXED_PAGES     = {0x4000: 0x3E, 0xC000: 0x3F}  # Non-banked flash at $4000 and $C000.
+BANKED_MINIMUM  = 0x100000                      # PPAGE:offset notation (e.g. $3C8000) starts here.
+
+
+def splitAddress(addr):
+    """ ..  py:function:: splitAddress(addr)
+
+            :returns: (page, local address inside the PPAGE window)
+    """
+    return addr // PAGE_SIZE, PAGE_WINDOW + (addr % PAGE_SIZE)
+
+
+def globalAddress(page, local):
+    """ ..  py:function:: globalAddress(page, local)
+
+            Inverse of :func:`splitAddress`.
+    """
+    return (page * PAGE_SIZE) + (local - PAGE_WINDOW)
+
+
+def resolveAddress(addr, page = None):
+    """ ..  py:function:: resolveAddress(addr, page = None)
+
+            Global address of an address as found in image files:
+
+            - Local CPU addresses (< $10000), `page` is used for the PPAGE window.
+            - Banked PPAGE:offset notation, e.g. $3C8000 (>= :data:`BANKED_MINIMUM`).
+            - Global addresses otherwise.
+
+            :raises ValueError: Not a paged (flash) address.
+    """
+    if addr < 0x10000:
+        window = addr & 0xC000
+        if window in FIXED_PAGES:
+            return FIXED_PAGES[window] * PAGE_SIZE + (addr & (PAGE_SIZE - 1))
+        if window == PAGE_WINDOW and page is not None:
+            return globalAddress(page, addr)
+        raise ValueError("0x{0:04x} isn't a paged address.".format(addr))
+    if addr >= BANKED_MINIMUM:
+        local = addr & 0xffff
+        if not PAGE_WINDOW <= local < PAGE_WINDOW + PAGE_SIZE:
+            raise ValueError("0x{0:06x} isn't a PPAGE:offset address.".format(addr))
+        return globalAddress(addr >> 16, local)
+    return addr
+
+
+def resolveSegments(segments, page = None):
+    """ ..  py:function:: resolveSegments(segments, page = None)
+
+            Apply :func:`resolveAddress` to `(address, data)` segments, split at
+            16K boundaries (a local or banked segment may cover several pages).
+    """
+    result = []
+    for addr, data in segments:
+        if addr >= BANKED_MINIMUM:
+            addr = resolveAddress(addr)     # Continues on the next page, not at PPAGE:$C000.
+        offset = 0
+        while offset < len(data):
+            size = min(len(data) - offset, PAGE_SIZE - ((addr + offset) % PAGE_SIZE))
+            result.append((resolveAddress(addr + offset, page), data[offset : offset + size]))
+            offset += size
+    return result
+
+
+def _pieces(addr, length):
+    """Split a global range at page boundaries into (page, local, offset, size)."""
+    offset = 0
+    while offset < length:
+        page, local = splitAddress(addr + offset)
+        size = min(length - offset, PAGE_WINDOW + PAGE_SIZE - local)
+        yield page, local, offset, size
+        offset += size
+
+
+class PagedReader(object):
+    """ .. class:: PagedReader
+
+        Read banked memory by global address.
+
+        PPAGE is only written if the page actually changes and restored when
+        the outermost operation (or `with` block) is done, so reading a whole
+        device costs one PPAGE write per page.
+
+        :param pod: :class:`pyBDM.bdm.BDMBase` instance.
+    """
+
+    def __init__(self, pod):
+        self.pod = pod
+        self._saved = None
+        self._current = None
+        self._nesting = 0
+
+    def __enter__(self):
+        if self._nesting == 0:
+            self._saved = self._current = self.pod.readBDByte(PPAGE)
+        self._nesting += 1
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self._nesting -= 1
+        if self._nesting == 0 and self._current != self._saved:
+            self.pod.writeBDByte(PPAGE, self._saved)
+            self._current = self._saved
+        return False
+
+    def select(self, page):
+        """ ..  py:method:: select(page)
+
+                Map `page` into the window (no-op if already mapped).
+        """
+        if page != self._current:
+            self.pod.writeBDByte(PPAGE, page)
+            self._current = page
+
+    def readInto(self, addr, buffer):
+        """ ..  py:method:: readInto(addr, buffer)
+
+                Fill `buffer` starting at global address `addr`.
+        """
+        view = memoryview(buffer)
+        if view.format != 'B' or view.ndim != 1:
+            view = view.cast('B')
+        with self:
+            for page, local, offset, size in _pieces(addr, len(view)):
+                self.select(page)
+                self.pod.readAreaInto(local, view[offset : offset + size])
+        return len(view)
+
+    def read(self, addr, length):
+        """ ..  py:method:: read(addr, length)
+
+                :rtype: bytearray
+        """
+        result = bytearray(length)
+        self.readInto(addr, result)
+        return result
+
+    def readMany(self, requests):
+        """ ..  py:method:: readMany(requests)
+
+                Read several `(address, length)` ranges, grouped by page (sorted
+                by page and address), i.e. independent of the order of `requests`.
+
+                :returns: List of bytearrays, in the order of `requests`.
+        """
+        results = []
+        pieces = []
+        for addr, length in requests:
+            result = bytearray(length)
+            results.append(result)
+            view = memoryview(result)
+            for page, local, offset, size in _pieces(addr, length):
+                pieces.append((page, local, view[offset : offset + size]))
+        pieces.sort(key = itemgetter(0, 1))
+        with self:
+            for page, local, view in pieces:
+                self.select(page)
+                self.pod.readAreaInto(local, view)
+        return results
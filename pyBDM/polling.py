@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+##
+##  Bounded, adaptive polling of status flags.
+##
+##  The first read happens right away (short commands are usually done after
+##  a single round trip), then the poller sleeps until the expected duration
+##  is almost over and backs off exponentially from there. Each operation
+##  has a deadline derived from its expected duration, measured durations
+##  replace the seeds over time.
+##
+
+import time
+
+from pyBDM.stats import timer
+
+MINIMUM_INTERVAL    = 0.0001    # First back-off step [s].
+MAXIMUM_INTERVAL    = 0.05      # Upper bound between two reads [s].
+TIMEOUT_FACTOR      = 10.0      # Deadline in multiples of the expected duration...
+MINIMUM_TIMEOUT     = 0.25      # ...but never shorter [s].
+SMOOTHING           = 0.25      # Weight of a new measurement.
+
+
+class PollTimeoutError(Exception): pass
+
+
+class Poller(object):
+    """ .. class:: Poller
+
+        :param expected: Dictionary key (e.g. a flash command) -> expected duration in seconds.
+        :param timeoutFactor: See :data:`TIMEOUT_FACTOR`.
+        :param minimumTimeout: See :data:`MINIMUM_TIMEOUT`.
+    """
+
+    def __init__(self, expected = None, timeoutFactor = TIMEOUT_FACTOR, minimumTimeout = MINIMUM_TIMEOUT):
+        self.expected = dict(expected or {})
+        self.timeoutFactor = timeoutFactor
+        self.minimumTimeout = minimumTimeout
+        self.measured = {}      # key -> (count, smoothed duration, maximum).
+
+    def expectedDuration(self, key):
+        """ ..  py:method:: expectedDuration(key)
+
+                Smoothed measured duration, the seed if not measured yet (0.0 if unknown).
+        """
+        if key in self.measured:
+            return self.measured[key][1]
+        return self.expected.get(key, 0.0)
+
+    def timeoutFor(self, key):
+        """ ..  py:method:: timeoutFor(key)
+        """
+        return max(self.minimumTimeout, self.timeoutFactor * max(self.expected.get(key, 0.0),
+            self.expectedDuration(key))
+        )
+
+    def record(self, key, duration):
+        """ ..  py:method:: record(key, duration)
+        """
+        if key in self.measured:
+            count, smoothed, maximum = self.measured[key]
+            self.measured[key] = (count + 1, smoothed + SMOOTHING * (duration - smoothed), max(maximum, duration))
+        else:
+            self.measured[key] = (1, duration, duration)
+
+    def wait(self, read, done, key = None, timeout = None, what = "Condition", start = None, record = True):
+        """ ..  py:method:: wait(read, done, key = None, timeout = None, what = "Condition", start = None, record = True)
+
+                Call `read` until `done(value)` is true.
+
+                :param key: Selects the expected duration and records the measured one.
+                :param timeout: Seconds, default: :meth:`timeoutFor`.
+                :param start: `pyBDM.stats.timer` value the operation was started at (default: now).
+                :param record: Record the duration under `key`, disable for waits
+                               covering only part of the operation.
+                :returns: The last value read.
+                :raises PollTimeoutError: Not done within `timeout` seconds.
+        """
+        if start is None:
+            start = timer()
+        if timeout is None:
+            timeout = self.timeoutFor(key)
+        expected = self.expectedDuration(key)
+        deadline = start + timeout
+        interval = MINIMUM_INTERVAL
+        first = True
+        while True:
+            value = read()
+            now = timer()
+            if done(value):
+                if record and key is not None:
+                    self.record(key, now - start)
+                return value
+            if now > deadline:
+                raise PollTimeoutError("{0!s} within {1:.3f}s.".format(what, timeout))
+            if first and now - start < expected:
+                delay = expected - (now - start)    # Sleep through the rest of the expected duration.
+            else:
+                delay = interval
+                interval = min(interval * 2, MAXIMUM_INTERVAL)
+            first = False
+            time.sleep(max(0.0, min(delay, deadline - now)))
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+##
+##  Target resident helper routines.
+##
+##  Small CPU12 routines are downloaded to RAM, parameterized through the CPU
+##  registers and run with GO_UNTIL; they end with BGND, so the host just
+##  waits for active background mode.
+##
+
+import binascii
+from collections import namedtuple
+
+from pyBDM.calibration import SCRATCH_ADDRESS
+from pyBDM.paging import PagedReader, splitAddress
+from pyBDM.s12.BdmpModule import CC_I, CC_S, CC_X
+
+LOAD_ADDRESS    = SCRATCH_ADDRESS
+MAX_LOOP_COUNT  = 0xffff     # 16-bit loop counter (Y).
+
+
+class Routine(object):
+    """ .. class:: Routine
+
+        Position independent machine code, entered at the first byte.
+
+        :param name: Used for logging.
+        :param code: Machine code.
+    """
+
+    def __init__(self, name, code):
+        self.name = name
+        self.code = bytearray(code)
+
+    def __len__(self):
+        return len(self.code)
+
+    def __repr__(self):
+        return "Routine({0!s}, {1:d} bytes)".format(self.name, len(self.code))
+
+
+##  X: start address (even), Y: number of words (> 0), D: fill pattern.
+FILL_WORDS = Routine("FILL_WORDS", (
+    0x6C, 0x31,             # loop:   STD     2,X+
+    0x04, 0x36, 0xFB,       #         DBNE    Y,loop
+    0x00,                   #         BGND
+))
+
+
+##  X: start address, Y: number of bytes (> 0), D: 0xFFFF.
+##  Returns CRC-16/CCITT (polynomial 0x1021, MSB first) in D.
+CRC16_INIT = 0xffff
+
+CRC16 = Routine("CRC16", bytearray((
+    0xA8, 0x30,             # loop:   EORA    1,X+
+)) + bytearray((
+    0x59,                   # 8x      ASLD
+    0x24, 0x04,             #         BCC     *+6
+    0x88, 0x10,             #         EORA    #$10
+    0xC8, 0x21,             #         EORB    #$21
+)) * 8 + bytearray((
+    0x04, 0x36, 0xC3,       #         DBNE    Y,loop
+    0x00,                   #         BGND
+)))
+
+Mismatch = namedtuple('Mismatch', 'address expected actual')
+
+
+def crc16(data, crc = CRC16_INIT):
+    """ ..  py:function:: crc16(data, crc = CRC16_INIT)
+
+            Host side reference of :data:`CRC16`.
+    """
+    return binascii.crc_hqx(bytes(data), crc)
+
+
+def restoreContext(pod, context):
+    """ ..  py:function:: restoreContext(pod, context)
+
+            Write back a :class:`pyBDM.bdm.RegisterContext` (except SP).
+    """
+    pod.writePC(context.pc)
+    pod.writeD(context.d)
+    pod.writeX(context.x)
+    pod.writeY(context.y)
+    pod.writeCCR(context.ccr)
+
+
+def execute(pod, routine, addr = LOAD_ADDRESS, timeout = 1.0, download = True, preserve = True, **registers):
+    """ ..  py:function:: execute(pod, routine, addr = LOAD_ADDRESS, timeout = 1.0, download = True, preserve = True, **registers)
+
+            Run `routine` at `addr` with the registers given as keywords (`x`,
+            `y`, `d`), interrupts masked. With `download` the routine is written
+            to `addr` first and the RAM there is restored afterwards, as is the
+            CPU context with `preserve`.
+
+            :returns: CPU context at the final BGND.
+            :rtype: :class:`pyBDM.bdm.RegisterContext`
+            :raises TargetTimeoutError: The routine didn't finish within `timeout` seconds.
+    """
+    pod.logger.debug("Executing {0!r} @ 0x{1:04x}.".format(routine, addr))
+    saved = pod.readRegisters() if preserve else None
+    ram = None
+    if download:
+        ram = pod.readArea(addr, len(routine))
+        pod.writeArea(addr, routine.code)
+    try:
+        pod.writePC(addr)
+        pod.writeCCR(CC_S | CC_X | CC_I)    # No user ISR may run on top of the routine.
+        for name, writer in (('x', pod.writeX), ('y', pod.writeY), ('d', pod.writeD)):
+            if name in registers:
+                writer(registers[name])
+        pod.targetGoUntil()
+        pod.waitHalted(timeout, "{0!s} did not finish".format(routine.name))
+        return pod.readRegisters()
+    finally:
+        if ram is not None:
+            pod.writeArea(addr, ram)
+        if saved is not None:
+            restoreContext(pod, saved)
+
+
+def _excluding(start, end, holeStart, holeEnd):
+    """Parts of [start, end) outside of [holeStart, holeEnd)."""
+    if holeEnd <= start or end <= holeStart:
+        return [(start, end)]
+    return [(s, e) for s, e in ((start, holeStart), (holeEnd, end)) if s < e]
+
+
+def fillOnTarget(pod, addr, value, length, loadAddress = LOAD_ADDRESS, timeout = 1.0):
+    """ ..  py:function:: fillOnTarget(pod, addr, value, length, loadAddress = LOAD_ADDRESS, timeout = 1.0)
+
+            Fill RAM with `value` at CPU speed using :data:`FILL_WORDS`.
+
+            The routine occupies `len(FILL_WORDS)` bytes at `loadAddress`, which
+            are restored (or filled, if inside the area) afterwards. Odd edges
+            are written by the host.
+    """
+    end = addr + length
+    routineEnd = loadAddress + len(FILL_WORDS)
+    saved = pod.readArea(loadAddress, len(FILL_WORDS))
+    pod.writeArea(loadAddress, FILL_WORDS.code)
+    pattern = (value << 8) | value
+    try:
+        for start, stop in _excluding(addr, end, loadAddress, routineEnd):
+            if start & 1:
+                pod.writeByte(start, value)
+                start += 1
+            if (stop - start) & 1:
+                stop -= 1
+                pod.writeByte(stop, value)
+            while start < stop:
+                words = min((stop - start) // 2, MAX_LOOP_COUNT)
+                execute(pod, FILL_WORDS, loadAddress, timeout, download = False, x = start, y = words, d = pattern)
+                start += words * 2
+    finally:
+        for offset in range(len(saved)):
+            if addr <= loadAddress + offset < end:
+                saved[offset] = value
+        pod.writeArea(loadAddress, saved)
+
+
+def crcOnTarget(pod, addr, length, loadAddress = LOAD_ADDRESS, timeout = 1.0, download = True):
+    """ ..  py:function:: crcOnTarget(pod, addr, length, loadAddress = LOAD_ADDRESS, timeout = 1.0, download = True)
+
+            CRC-16 of `length` (1..0xffff) bytes at the local address `addr`,
+            computed by the target. The RAM at `loadAddress` is restored.
+    """
+    return execute(pod, CRC16, loadAddress, timeout, download, x = addr, y = length, d = CRC16_INIT).d
+
+
+def sectorRanges(addr, length, sectorSize):
+    """ ..  py:function:: sectorRanges(addr, length, sectorSize)
+
+            Split a range at sector boundaries into (address, size) pairs.
+    """
+    offset = 0
+    while offset < length:
+        start = addr + offset
+        size = min(sectorSize - (start % sectorSize), length - offset)
+        yield start, size
+        offset += size
+
+
+def sectorChecksums(pod, addr, length, sectorSize = 1024, paged = False, loadAddress = LOAD_ADDRESS, timeout = 1.0):
+    """ ..  py:function:: sectorChecksums(pod, addr, length, sectorSize = 1024, paged = False, loadAddress = LOAD_ADDRESS, timeout = 1.0)
+
+            CRC-16 of every sector of a range, computed by the target. With
+            `paged` `addr` is a global address (see :mod:`pyBDM.paging`).
+
+            The range must not overlap the routine at `loadAddress`, whose RAM
+            content is restored afterwards, as is the CPU context.
+
+            :returns: List of (address, size, crc).
+    """
+    result = []
+    context = pod.readRegisters()
+    saved = pod.readArea(loadAddress, len(CRC16))
+    pod.writeArea(loadAddress, CRC16.code)
+    try:
+        with PagedReader(pod) as reader:
+            for start, size in sectorRanges(addr, length, sectorSize):
+                if paged:
+                    page, local = splitAddress(start)
+                    reader.select(page)
+                else:
+                    local = start
+                result.append((start, size, crcOnTarget(pod, local, size, loadAddress, timeout, download = False)))
+    finally:
+        pod.writeArea(loadAddress, saved)
+        restoreContext(pod, context)
+    return result
+
+
+def verifyOnTarget(pod, addr, data, sectorSize = 1024, paged = False, loadAddress = LOAD_ADDRESS, timeout = 1.0):
+    """ ..  py:function:: verifyOnTarget(pod, addr, data, sectorSize = 1024, paged = False, loadAddress = LOAD_ADDRESS, timeout = 1.0)
+
+            Compare target memory against `data` sector by sector, see
+            :func:`sectorChecksums`. Only mismatching sectors are read back.
+
+            :returns: List of :class:`Mismatch` (empty if everything matches).
+    """
+    view = memoryview(data)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    mismatches = []
+    for start, size, crc in sectorChecksums(pod, addr, len(view), sectorSize, paged, loadAddress, timeout):
+        expected = view[start - addr : start - addr + size]
+        if crc != crc16(expected):
+            pod.logger.debug("CRC mismatch @ 0x{0:05x}.".format(start))
+            actual = PagedReader(pod).read(start, size) if paged else pod.readArea(start, size)
+            mismatches.append(Mismatch(start, bytes(expected), bytes(actual)))
+    return mismatches
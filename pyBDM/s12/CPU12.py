@@ -1642,9 +1642,6 @@ class PostbyteDecoder(object):
 
 
 
-from objutils.SRecords import Reader
-
-
 class Reader0(object):
     def __init__(self, data):
         self._data = data
@@ -1657,6 +1654,8 @@ class Reader0(object):
                 return data.data[a0 : a0 + length]
 
 def test():
+    from objutils.SRecords import Reader
+
     pd = preDecode(0x0000, [0x1a, 0xe5, 0x19, 0xed, 0x18, 0x06])
 
     hr = Reader(file(r'C:\projekte\csProjects\yOBJl\2CB_12.s19'))
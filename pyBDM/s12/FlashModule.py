@@ -27,7 +27,11 @@ __copyright__ = \
   51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
 
+from collections import namedtuple
+
 from pyBDM.module import Module
+from pyBDM.polling import Poller, PollTimeoutError
+from pyBDM.stats import timer
 
 
 ##
@@ -118,6 +122,84 @@ PROGRAM         = 0x20
 SECTOR_ERASE    = 0x40
 MASS_ERASE      = 0x41
 
+##
+##  Typical command durations (seconds), seed the status polling.
+##
+COMMAND_DURATIONS = {
+    ERASE_VERIFY:   35e-6,
+    PROGRAM:        45e-6,
+    SECTOR_ERASE:   20e-3,
+    MASS_ERASE:     100e-3,
+}
+
+class FlashError(Exception): pass
+class ProtectionViolationError(FlashError): pass
+class AccessError(FlashError): pass
+class CommandTimeoutError(FlashError): pass
+
+def errorNames(status):
+    return '|'.join(name for name, mask in (('PVIOL', PVIOL), ('ACCERR', ACCERR)) if status & mask)
+
+def raiseOnErrors(status, what):
+    """ ..  py:function:: raiseOnErrors(status, what)
+
+            :raises AccessError: ACCERR set (takes precedence).
+            :raises ProtectionViolationError: PVIOL set.
+    """
+    if status & ACCERR:
+        raise AccessError("{0!s}: {1!s}.".format(what, errorNames(status)))
+    if status & PVIOL:
+        raise ProtectionViolationError("{0!s}: {1!s}.".format(what, errorNames(status)))
+
+
+##
+##  Geometry of the FTS flash modules.
+##
+FlashGeometry = namedtuple('FlashGeometry', 'name size blocks sectorSize')
+
+FTS32K      = FlashGeometry("FTS32K",   32 * 1024,  1, 512)
+FTS64K      = FlashGeometry("FTS64K",   64 * 1024,  1, 512)
+FTS128K     = FlashGeometry("FTS128K",  128 * 1024, 2, 512)
+FTS128K1    = FlashGeometry("FTS128K1", 128 * 1024, 1, 1024)
+FTS256K     = FlashGeometry("FTS256K",  256 * 1024, 4, 1024)
+FTS512K     = FlashGeometry("FTS512K",  512 * 1024, 4, 1024)
+
+GEOMETRIES = dict((g.name, g) for g in (FTS32K, FTS64K, FTS128K, FTS128K1, FTS256K, FTS512K))
+
+##  PARTID[11:8] -> flash module.
+MEMORY_IDS = {
+    0x0: FTS256K,
+    0x1: FTS128K,
+    0x2: FTS64K,
+    0x3: FTS32K,
+    0x4: FTS512K,
+}
+
+PAGE_SIZE       = 0x4000
+
+
+def geometryFromPartID(partID):
+    """ ..  py:function:: geometryFromPartID(partID)
+
+            :rtype: :class:`FlashGeometry` or `None` if unknown.
+    """
+    return MEMORY_IDS.get((partID >> 8) & 0x0f)
+
+def firstPage(geometry):
+    """ ..  py:function:: firstPage(geometry)
+
+            Lowest PPAGE value, flash pages always end at $3F.
+    """
+    return 0x40 - (geometry.size // PAGE_SIZE)
+
+def blockOfPage(geometry, page):
+    """ ..  py:function:: blockOfPage(geometry, page)
+
+            Flash block (BKSEL value) a page belongs to, block 0 holds the highest pages.
+    """
+    pagesPerBlock = (geometry.size // geometry.blocks) // PAGE_SIZE
+    return (geometry.blocks - 1) - ((page - firstPage(geometry)) // pagesPerBlock)
+
 
 class Flash(Module):
     __REGISTERS8__ = (
@@ -145,6 +227,10 @@ class Flash(Module):
     HRS_8K      = 0x02
     HRS_16K     = 0x03
 
+    def __init__(self, port, poller = None):
+        super(Flash, self).__init__(port)
+        self.poller = poller or Poller(COMMAND_DURATIONS)
+
     def selectBank(self, bank):
         tmp = self.fcnfg & (CBEIE | CCIE | KEYACC)
         tmp |= bank
@@ -181,34 +267,108 @@ class Flash(Module):
 
         self.fprot = tmp
 
-    def _waitReady(self):
-        while (self.fstat & CBEIF) == 0x00:
-            pass    ## TODO: timeout!
+    def _waitFor(self, flag, command, start = None):
+        try:
+            status = self.poller.wait(lambda: self.fstat, lambda value: value & (flag | PVIOL | ACCERR), command,
+                what = "Flash command 0x{0:02x} not finished".format(command or 0), start = start,
+                record = start is not None     # Only waits from the launch on measure the whole command.
+            )
+        except PollTimeoutError as e:
+            raise CommandTimeoutError(str(e))
+        self._checkErrors(status, "Flash command 0x{0:02x}".format(command or 0))
+        return status
+
+    def _waitReady(self, command = None):
+        """ ..  py:method:: _waitReady(command = None)
+
+                Wait for a free command buffer (CBEIF), `command` is the one in progress
+                (its duration isn't recorded, the wait doesn't start with the command).
+        """
+        return self._waitFor(CBEIF, command)
+
+    def _waitCompletion(self, command = None, start = None):
+        """ ..  py:method:: _waitCompletion(command = None, start = None)
 
-    def _waitCompletion(self):
-        while (self.fstat & CCIF) == 0x00:
-            pass    ## TODO: timeout!
+                Wait for all commands to complete (CCIF). The duration of `command`
+                is recorded if it was launched at `start`.
+
+                :raises CommandTimeoutError: Not completed in time.
+                :raises FlashError: PVIOL or ACCERR, see :func:`raiseOnErrors`.
+        """
+        return self._waitFor(CCIF, command, start)
+
+    def _checkErrors(self, status, what):
+        if status & (PVIOL | ACCERR):
+            self.clearErrors()
+            raiseOnErrors(status, what)
+
+    def _launch(self, command):
+        self.fcmd = command
+        self.fstat = CBEIF  # Start command.
+        return timer()
 
     def _flashCommand(self, command, addr, data):
-        print("FCnfg: %#x" % self.fcnfg)
-        print("Fprot: %#x" % self.fprot)
-        print("Fstat: %#x %#x" % (self.fstat, self.errors()))
+        self.logger.debug("Flash command 0x{0:02x} @ 0x{1:04x} [0x{2:04x}].".format(command, addr, data))
         self._waitReady()
         ## TODO: Check for Address alignment!!!
         self._port.writeWord(addr, data)
+        start = self._launch(command)
+        self._checkErrors(self.fstat, "Flash command 0x{0:02x} @ 0x{1:04x}".format(command, addr))
+        self._waitCompletion(command, start)
 
-        print("Fstat: %#x %#x" % (self.fstat, self.errors()))
-        self.fcmd = command
-        print("Fstat: %#x %#x" % (self.fstat, self.errors()))
-        self.fstat = CBEIF  # Start command.
-        print("Fstat: %#x %#x" % (self.fstat, self.errors()))
-        errors = self.errors()
-        if errors:
-            # TODO: Vernnftiges Errorhandling!!!
-            print("Errors while flashing: %#x" % errors)
-        else:
-            print("Fstat: %#x %#x" % (self.fstat, self.errors()))
-            self._waitCompletion()
+    def programWords(self, addr, data, progress = None, skipErased = True):
+        """ ..  py:method:: programWords(addr, data, progress = None, skipErased = True)
+
+                Program `data` (even length) starting at the (local) address `addr`,
+                bank and page have to be selected.
+
+                The next word is launched as soon as CBEIF signals a free command
+                buffer, i.e. while the previous one is still programming. Pods
+                with batches need a single round trip per word.
+
+                :param progress: Called with (bytes done, bytes total).
+                :param skipErased: Don't program $FFFF words (into an erased sector).
+                :raises FlashError: Protection violation or access error.
+                :raises CommandTimeoutError: The flash controller got stuck.
+        """
+        port = self._port
+        batched = hasattr(port, 'batch')
+        total = len(data)
+        status = self.fstat
+        for offset in range(0, total, 2):
+            word = (data[offset] << 8) | data[offset + 1]
+            if not (skipErased and word == 0xffff):
+                if not status & CBEIF:
+                    status = self._waitReady(PROGRAM)
+                if batched:
+                    with port.batch() as batch:
+                        batch.writeWord(addr + offset, word)
+                        batch.writeBDByte(FCMD, PROGRAM)
+                        batch.writeBDByte(FSTAT, CBEIF)
+                        future = batch.readBDByte(FSTAT)
+                    status = future.result()
+                else:
+                    port.writeWord(addr + offset, word)
+                    self.fcmd = PROGRAM
+                    self.fstat = CBEIF
+                    status = self.fstat
+                self._checkErrors(status, "Programming 0x{0:04x}".format(addr + offset))
+            if progress:
+                progress(offset + 2, total)
+        self._waitCompletion(PROGRAM)
+
+    def sectorErase(self, addr):
+        """ ..  py:method:: sectorErase(addr)
+
+                Erase the sector containing the (local) address `addr`,
+                bank and page have to be selected.
+        """
+        self._flashCommand(SECTOR_ERASE, addr & ~1, 0xffff)
+
+    def programWord(self, addr, data):
+        """ ..  py:method:: programWord(addr, data)
+        """
+        self._flashCommand(PROGRAM, addr, data)
 
     def eraseBlock(self, block):
         self._flashCommand(MASS_ERASE, 0x8000, 0xaffe)
@@ -235,10 +395,7 @@ class Flash(Module):
         self.writeAll()
         self.fprot = FPOPEN | FPHDIS | FPLDIS
         self._port.writeWord(0xc000, 0xaffe)
-        self.fcmd = MASS_ERASE
-        self.fstat = CBEIF
-        while (self.fstat & CCIF) == 0x00:
-            pass
+        self._waitCompletion(MASS_ERASE, self._launch(MASS_ERASE))
 
     def lockUnsecure(self):
         """
@@ -253,11 +410,8 @@ class Flash(Module):
         self.fcnfg = 0x00
         self.fprot = FPOPEN | FPHDIS | FPLDIS
         self._port.writeWord(0xFF0E, 0xFFFE)
-        self.fcmd = PROGRAM
-        self.fstat = CBEIF
-        while (self.fstat & CCIF) == 0x00:
-            pass
-        print("Finished.")
+        self._waitCompletion(PROGRAM, self._launch(PROGRAM))
+        self.logger.debug("Finished.")
 
 """
 FTS256:
@@ -27,6 +27,9 @@ __copyright__ = """
 """
 
 from pyBDM.module import Module
+from pyBDM.polling import Poller, PollTimeoutError
+from pyBDM.s12.FlashModule import CommandTimeoutError, raiseOnErrors
+from pyBDM.stats import timer
 
 
 ##
@@ -86,6 +89,19 @@ SECTOR_ERASE    = 0x40
 MASS_ERASE      = 0x41
 SECTOR_MODIFY   = 0x60
 
+SECTOR_SIZE     = 4         # Bytes erased by SECTOR_ERASE/SECTOR_MODIFY.
+
+##
+##  Typical command durations (seconds), seed the status polling.
+##
+COMMAND_DURATIONS = {
+    ERASE_VERIFY:   35e-6,
+    WORD_PROGRAM:   45e-6,
+    SECTOR_ERASE:   20e-3,
+    MASS_ERASE:     100e-3,
+    SECTOR_MODIFY:  20e-3 + 45e-6,
+}
+
 #
 # 4K EEPROM from $0000 - $0FFF.
 #
@@ -104,6 +120,10 @@ class EEP(Module):
         ('edatah', EDATAHI)
     )
 
+    def __init__(self, port, poller = None):
+        super(EEP, self).__init__(port)
+        self.poller = poller or Poller(COMMAND_DURATIONS)
+
     def clearErrors(self):
         self.estat = (PVIOL | ACCERR)
 
@@ -125,34 +145,107 @@ class EEP(Module):
 
         self.fprot = tmp
 
-    def _waitReady(self):
-        while (self.estat & CBEIF) == 0x00:
-            pass    ## TODO: timeout!
+    def _waitFor(self, flag, command, start = None):
+        try:
+            status = self.poller.wait(lambda: self.estat, lambda value: value & (flag | PVIOL | ACCERR), command,
+                what = "EEPROM command 0x{0:02x} not finished".format(command or 0), start = start,
+                record = start is not None
+            )
+        except PollTimeoutError as e:
+            raise CommandTimeoutError(str(e))
+        self._checkErrors(status, "EEPROM command 0x{0:02x}".format(command or 0))
+        return status
+
+    def _waitReady(self, command = None):
+        """ ..  py:method:: _waitReady(command = None)
+
+                Wait for a free command buffer (CBEIF), `command` is the one in progress
+                (its duration isn't recorded, the wait doesn't start with the command).
+        """
+        return self._waitFor(CBEIF, command)
+
+    def _waitCompletion(self, command = None, start = None):
+        """ ..  py:method:: _waitCompletion(command = None, start = None)
 
-    def _waitCompletion(self):
-        while (self.estat & CCIF) == 0x00:
-            pass    ## TODO: timeout!
+                Wait for all commands to complete (CCIF). The duration of `command`
+                is recorded if it was launched at `start`.
+
+                :raises pyBDM.s12.FlashModule.CommandTimeoutError: Not completed in time.
+                :raises pyBDM.s12.FlashModule.FlashError: PVIOL or ACCERR.
+        """
+        return self._waitFor(CCIF, command, start)
+
+    def _checkErrors(self, status, what):
+        if status & (PVIOL | ACCERR):
+            self.clearErrors()
+            raiseOnErrors(status, what)
+
+    def _launch(self, command):
+        self.ecmd = command
+        self.estat = CBEIF  # Start command.
+        return timer()
 
     def _eepromCommand(self, command, addr, data):
-        print("ECnfg: %#x" % self.ecnfg)
-        print("Eprot: %#x" % self.eprot)
-        print("Estat: %#x %#x" % (self.estat, self.errors()))
+        self.logger.debug("EEPROM command 0x{0:02x} @ 0x{1:04x} [0x{2:04x}].".format(command, addr, data))
         self._waitReady()
         ## TODO: Check for Address alignment!!!
         self._port.writeWord(addr, data)
+        start = self._launch(command)
+        self._checkErrors(self.estat, "EEPROM command 0x{0:02x} @ 0x{1:04x}".format(command, addr))
+        self._waitCompletion(command, start)
 
-        print("Fstat: %#x %#x" % (self.fstat, self.errors()))
-        self.ecmd = command
-        print("Fstat: %#x %#x" % (self.fstat, self.errors()))
-        self.estat = CBEIF  # Start command.
-        print("Fstat: %#x %#x" % (self.fstat, self.errors()))
-        errors = self.errors()
-        if errors:
-            # TODO: Vernnftiges Errorhandling!!!
-            print("Errors while flashing: %#x" % errors)
+    def startCommand(self, command, addr, data, previous = None):
+        """ ..  py:method:: startCommand(command, addr, data, previous = None)
+
+                Launch `command` as soon as the command buffer is free, without
+                waiting for its completion (see :meth:`finish`). Pods
+                with batches need a single round trip.
+
+                :param previous: Command still in progress, for the status polling.
+                :returns: Status after launching.
+        """
+        status = self.estat
+        if not status & CBEIF:
+            self._waitReady(previous)
+        port = self._port
+        if hasattr(port, 'batch'):
+            with port.batch() as batch:
+                batch.writeWord(addr, data)
+                batch.writeBDByte(ECMD, command)
+                batch.writeBDByte(ESTAT, CBEIF)
+                future = batch.readBDByte(ESTAT)
+            status = future.result()
         else:
-            print("Fstat: %#x %#x" % (self.estat, self.errors()))
-            #self._waitCompletion()
+            port.writeWord(addr, data)
+            self._launch(command)
+            status = self.estat
+        self._checkErrors(status, "EEPROM command 0x{0:02x} @ 0x{1:04x}".format(command, addr))
+        return status
+
+    def finish(self, command = None):
+        """ ..  py:method:: finish(command = None)
+
+                Wait until the commands launched by :meth:`startCommand` are
+                completed, `command` is the last one.
+        """
+        return self._waitCompletion(command)
+
+    def sectorModify(self, addr, data):
+        """ ..  py:method:: sectorModify(addr, data)
+
+                Erase the sector containing `addr` and program the word `data` at `addr`.
+        """
+        self._eepromCommand(SECTOR_MODIFY, addr & ~1, data)
+
+    def sectorErase(self, addr):
+        """ ..  py:method:: sectorErase(addr)
+        """
+        self._eepromCommand(SECTOR_ERASE, addr & ~1, 0xffff)
+
+    def programWord(self, addr, data):
+        """ ..  py:method:: programWord(addr, data)
+        """
+        self._eepromCommand(WORD_PROGRAM, addr & ~1, data)
 
     def eraseBlock(self, block):
         self._eepromCommand(MASS_ERASE, 0x8000, 0xaffe)
@@ -167,12 +260,5 @@ class EEP(Module):
         #self.ftstmod = WRALL
         self.eprot = EPOPEN | EPDIS
         self._port.writeWord(0x0f80, 0xaffe)
-
-        print("Estat: %#x %#x" % (self.estat, self.errors()))
-        self.ecmd = MASS_ERASE
-        self.estat = CBEIF
-
-        print("Estat: %#x %#x" % (self.estat, self.errors()))
-        while (self.estat & CCIF) == 0x00:
-            pass
+        self._waitCompletion(MASS_ERASE, self._launch(MASS_ERASE))
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+##
+##  Programming EEPROM images sector by sector.
+##
+
+from pyBDM.routines import verifyOnTarget
+from pyBDM.s12.eepModule import EEP, SECTOR_MODIFY, SECTOR_SIZE, WORD_PROGRAM
+
+CHECK_BLOCK_SIZE    = 0x100     # Granularity of the on-target comparison.
+
+
+def _words(data):
+    return [(data[offset] << 8) | data[offset + 1] for offset in range(0, len(data), 2)]
+
+
+class EepromProgrammer(object):
+    """ .. class:: EepromProgrammer
+
+        Updates EEPROM with as few commands (and as little wear) as possible:
+
+        - Sectors already holding the image are skipped. With `onTarget` the
+          comparison is done by CRC-16 on the target, only differing blocks
+          are read back.
+        - If only erased words change, they are programmed without erasing
+          (a word can't be programmed again before the sector is erased).
+        - Otherwise SECTOR_MODIFY erases the sector and programs its first word
+          with a single command, followed by WORD_PROGRAM for the second one
+          (if not erased).
+
+        Commands are launched as soon as the command buffer is free.
+
+        :param pod: :class:`pyBDM.bdm.BDMBase` instance, target halted.
+        :param onTarget: Compare on the target instead of reading everything back.
+    """
+
+    def __init__(self, pod, onTarget = True):
+        self.pod = pod
+        self.eep = EEP(pod)
+        self.onTarget = onTarget
+
+    def _current(self, start, image):
+        """Current content of the range covered by `image`."""
+        if not self.onTarget:
+            return self.pod.readArea(start, len(image))
+        current = bytearray(image)
+        for mismatch in verifyOnTarget(self.pod, start, image, CHECK_BLOCK_SIZE):
+            offset = mismatch.address - start
+            current[offset : offset + len(mismatch.actual)] = mismatch.actual
+        return current
+
+    def plan(self, addr, data):
+        """ ..  py:method:: plan(addr, data)
+
+                :returns: List of (sector address, [(command, address, word), ...])
+                          for the sectors that need to change.
+        """
+        start = addr - (addr % SECTOR_SIZE)
+        end = addr + len(data)
+        end += -end % SECTOR_SIZE
+        image = bytearray(end - start)
+        if start < addr:
+            image[ : SECTOR_SIZE] = self.pod.readArea(start, SECTOR_SIZE)
+        if end > addr + len(data):
+            image[-SECTOR_SIZE : ] = self.pod.readArea(end - SECTOR_SIZE, SECTOR_SIZE)
+        image[addr - start : addr - start + len(data)] = data
+        current = self._current(start, image)
+        result = []
+        for offset in range(0, len(image), SECTOR_SIZE):
+            sector = start + offset
+            old = _words(current[offset : offset + SECTOR_SIZE])
+            new = _words(image[offset : offset + SECTOR_SIZE])
+            if old == new:
+                continue
+            if all(o == 0xffff for o, n in zip(old, new) if o != n):   # Words can't be programmed twice.
+                commands = [(WORD_PROGRAM, sector + 2 * index, n) for index, (o, n) in enumerate(zip(old, new)) if o != n]
+            else:
+                commands = [(SECTOR_MODIFY, sector, new[0])]
+                commands.extend((WORD_PROGRAM, sector + 2 * index, n) for index, n in enumerate(new) if index and n != 0xffff)
+            result.append((sector, commands))
+        return result
+
+    def program(self, addr, data, progress = None):
+        """ ..  py:method:: program(addr, data, progress = None)
+
+                Write `data` to the EEPROM at (local) address `addr`, bytes of
+                partially covered sectors keep their content.
+
+                :param progress: Called with (sectors done, sectors to modify).
+                :returns: Addresses of the modified sectors.
+                :raises pyBDM.s12.FlashModule.FlashError: PVIOL, ACCERR or timeout.
+        """
+        plan = self.plan(addr, data)
+        previous = None
+        for index, (sector, commands) in enumerate(plan):
+            self.pod.logger.debug("Updating EEPROM sector 0x{0:04x}.".format(sector))
+            for command, address, word in commands:
+                self.eep.startCommand(command, address, word, previous)
+                previous = command
+            if progress:
+                progress(index + 1, len(plan))
+        if previous is not None:
+            self.eep.finish(previous)
+        return [sector for sector, _ in plan]
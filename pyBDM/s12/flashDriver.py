@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+##
+##  RAM resident flash programming driver.
+##
+##  The driver runs on the target and takes its work from two descriptors
+##  (double buffering): while it programs one, the host streams the next one
+##  via BDM, which is executed in parallel to the CPU (cycle stealing).
+##
+##  Descriptor layout:
+##
+##      +0  flag        EMPTY / FULL / QUIT, set to ERROR by the driver.
+##      +1  PPAGE
+##      +2  FCNFG       Block select.
+##      +3  command     PROGRAM, SECTOR_ERASE, ...
+##      +4  address     Local (16-bit) destination.
+##      +6  count       Number of words, > 0.
+##      +8  data
+##
+
+from pyBDM.bdm import TargetTimeoutError
+from pyBDM.paging import splitAddress
+from pyBDM.polling import Poller, PollTimeoutError
+from pyBDM.routines import LOAD_ADDRESS, restoreContext
+from pyBDM.s12.BdmpModule import CC_I, CC_S, CC_X
+from pyBDM.s12.FlashModule import FCNFG, FSTAT, FCMD, CBEIF, CCIF, PVIOL, ACCERR, FlashError, blockOfPage, errorNames
+from pyBDM.s12.mmcModule import PPAGE
+
+EMPTY       = 0x00
+FULL        = 0x01
+ERROR       = 0x40
+QUIT        = 0x80
+
+HEADER_SIZE     = 8
+BUFFER_SIZE     = 0x200     # Data bytes per descriptor.
+CODE_OFFSET     = 0x08      # Driver variables come first.
+DESCRIPTOR_OFFSET = 0x100
+
+
+def _assemble(origin, source):
+    """Resolve labels (strings) and 8-bit relative branches (`('rel', label)`)."""
+    labels = {}
+    pc = origin
+    for item in source:
+        if isinstance(item, str):
+            labels[item] = pc
+        else:
+            pc += 1
+    code = bytearray()
+    for item in source:
+        if isinstance(item, str):
+            continue
+        if isinstance(item, tuple):
+            offset = labels[item[1]] - (origin + len(code) + 1)
+            if not -0x80 <= offset < 0x80:
+                raise ValueError("Branch to '{0!s}' out of range.".format(item[1]))
+            item = offset & 0xff
+        code.append(item)
+    return code
+
+
+def driverCode(base):
+    """ ..  py:function:: driverCode(base)
+
+            Machine code of the driver for a given load address, variables at
+            `base`, entry point at `base` + :data:`CODE_OFFSET`.
+    """
+    cur, cnt, cmd = base, base + 2, base + 4
+    first = base + DESCRIPTOR_OFFSET
+    toggle = first ^ (first + HEADER_SIZE + BUFFER_SIZE)
+    hi, lo = lambda value: (value >> 8) & 0xff, lambda value: value & 0xff
+    return _assemble(base + CODE_OFFSET, (
+        'main',
+        0xFE, hi(cur), lo(cur),                 # LDX     CUR
+        'wait',
+        0xA6, 0x00,                             # LDAA    0,X
+        0x27, ('rel', 'wait'),                  # BEQ     wait
+        0x2B, ('rel', 'quit'),                  # BMI     quit
+        0xA6, 0x01,                             # LDAA    1,X
+        0x7A, hi(PPAGE), lo(PPAGE),             # STAA    PPAGE
+        0xA6, 0x02,                             # LDAA    2,X
+        0x7A, hi(FCNFG), lo(FCNFG),             # STAA    FCNFG
+        0xA6, 0x03,                             # LDAA    3,X
+        0x7A, hi(cmd), lo(cmd),                 # STAA    CMD
+        0xED, 0x04,                             # LDY     4,X
+        0xEC, 0x06,                             # LDD     6,X
+        0x7C, hi(cnt), lo(cnt),                 # STD     CNT
+        0x1A, 0x08,                             # LEAX    8,X
+        'next',
+        0x1F, hi(FSTAT), lo(FSTAT), CBEIF, ('rel', 'next'),    # BRCLR FSTAT,#CBEIF,next
+        0xEC, 0x31,                             # LDD     2,X+
+        0x6C, 0x71,                             # STD     2,Y+
+        0x18, 0x0C, hi(cmd), lo(cmd), hi(FCMD), lo(FCMD),   # MOVB CMD,FCMD
+        0x18, 0x0B, CBEIF, hi(FSTAT), lo(FSTAT),            # MOVB #CBEIF,FSTAT
+        0xB6, hi(FSTAT), lo(FSTAT),             # LDAA    FSTAT
+        0x85, PVIOL | ACCERR,                   # BITA    #PVIOL|ACCERR
+        0x26, ('rel', 'error'),                 # BNE     error
+        0xFC, hi(cnt), lo(cnt),                 # LDD     CNT
+        0x83, 0x00, 0x01,                       # SUBD    #1
+        0x7C, hi(cnt), lo(cnt),                 # STD     CNT
+        0x26, ('rel', 'next'),                  # BNE     next
+        0xFE, hi(cur), lo(cur),                 # LDX     CUR
+        0x69, 0x00,                             # CLR     0,X       ; Hand back the descriptor.
+        0xFC, hi(cur), lo(cur),                 # LDD     CUR
+        0x88, hi(toggle),                       # EORA    #toggle
+        0xC8, lo(toggle),                       # EORB    #toggle
+        0x7C, hi(cur), lo(cur),                 # STD     CUR
+        0x20, ('rel', 'main'),                  # BRA     main
+        'error',
+        0xFE, hi(cur), lo(cur),                 # LDX     CUR
+        0x86, ERROR,                            # LDAA    #ERROR
+        0x6A, 0x00,                             # STAA    0,X
+        'quit',
+        0x00,                                   # BGND
+    ))
+
+
+class FlashDriver(object):
+    """ .. class:: FlashDriver
+
+        Stream flash commands to the RAM resident driver, use as context
+        manager::
+
+            with FlashDriver(pod, geometry) as driver:
+                driver.submit(0xf8000, PROGRAM, data)
+
+        The driver runs with interrupts masked. The RAM used
+        (:data:`DESCRIPTOR_OFFSET` + two descriptors), the CPU context, PPAGE
+        and FCNFG are restored on exit.
+
+        :param pod: :class:`pyBDM.bdm.BDMBase` instance, target halted.
+        :param geometry: :class:`pyBDM.s12.FlashModule.FlashGeometry`.
+        :param base: Load address in RAM.
+        :param timeout: Seconds to wait for a free descriptor.
+    """
+
+    def __init__(self, pod, geometry, base = LOAD_ADDRESS, timeout = 1.0):
+        self.pod = pod
+        self.geometry = geometry
+        self.base = base
+        self.timeout = timeout
+        self.descriptors = (base + DESCRIPTOR_OFFSET, base + DESCRIPTOR_OFFSET + HEADER_SIZE + BUFFER_SIZE)
+        self.size = DESCRIPTOR_OFFSET + 2 * (HEADER_SIZE + BUFFER_SIZE)
+        self._saved = None
+        self._next = 0
+        self._commands = [None, None]
+        self._blocks = set()
+        self.poller = Poller()
+
+    def __enter__(self):
+        pod = self.pod
+        self._saved = (pod.readArea(self.base, self.size), pod.readRegisters(), pod.readBDByte(PPAGE),
+            pod.readBDByte(FCNFG)
+        )
+        code = driverCode(self.base)
+        variables = bytearray(CODE_OFFSET)
+        variables[0], variables[1] = self.descriptors[0] >> 8, self.descriptors[0] & 0xff
+        pod.writeArea(self.base, variables + code)
+        for descriptor in self.descriptors:
+            pod.writeByte(descriptor, EMPTY)
+        self._next = 0
+        self._commands = [None, None]
+        self._blocks = set()
+        pod.writePC(self.base + CODE_OFFSET)
+        pod.writeCCR(CC_S | CC_X | CC_I)    # User ISRs would run from the flash being programmed.
+        pod.targetGo()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        pod = self.pod
+        ram, context, ppage, fcnfg = self._saved
+        try:
+            if excType is None:
+                if not pod.isHalted():
+                    self._send(QUIT, bytearray(HEADER_SIZE - 1))
+                    pod.waitHalted(self.timeout, "Flash driver did not finish")
+                self._checkDescriptors()
+                for block in sorted(self._blocks):
+                    pod.writeBDByte(FCNFG, block)
+                    self._waitIdle()
+        finally:
+            if not pod.isHalted():
+                pod.targetHalt()
+            pod.writeArea(self.base, ram)
+            restoreContext(pod, context)
+            pod.writeBDByte(PPAGE, ppage)
+            pod.writeBDByte(FCNFG, fcnfg)
+        return False
+
+    def _poll(self, ready, what, key = None):
+        try:
+            return self.poller.wait(ready, lambda value: value is not None, key, self.timeout, what)
+        except PollTimeoutError as e:
+            raise TargetTimeoutError(str(e))
+
+    def _raiseErrors(self, status):
+        errors = status & (PVIOL | ACCERR)
+        if errors:
+            self.pod.writeBDByte(FSTAT, errors)
+            raise FlashError("Flash driver: {0!s}.".format(errorNames(errors)))
+
+    def _waitIdle(self):
+        def idle():
+            status = self.pod.readBDByte(FSTAT)
+            return status if status & CCIF else None
+
+        self._raiseErrors(self._poll(idle, "Flash command not finished"))
+
+    def _checkDescriptors(self):
+        for descriptor in self.descriptors:
+            if self.pod.readByte(descriptor) == ERROR:
+                self._raiseErrors(self.pod.readBDByte(FSTAT))
+                raise FlashError("Flash driver: error flagged.")
+
+    def _send(self, flag, header, data = b''):
+        """Wait for the next descriptor to become free, fill it and hand it over (flag last)."""
+        pod = self.pod
+        index = self._next
+        descriptor = self.descriptors[index]
+        self._next ^= 1
+
+        def free():
+            value = pod.readByte(descriptor)
+            if value == ERROR:
+                self._checkDescriptors()
+            if value == EMPTY:
+                return True
+            if pod.isHalted():
+                raise FlashError("Flash driver stopped unexpectedly.")
+            return None
+
+        self._poll(free, "Flash driver busy", self._commands[index])   # Adapts to the previous command.
+        pod.writeArea(descriptor + 1, bytearray(header) + bytearray(data))
+        pod.writeByte(descriptor, flag)
+        self._commands[index] = header[2] if flag == FULL else None
+
+    def submit(self, addr, command, data):
+        """ ..  py:method:: submit(addr, command, data)
+
+                Queue `command` for the words in `data` (even length, at most
+                :data:`BUFFER_SIZE` bytes) at global address `addr`, returns as
+                soon as the data is on the target.
+
+                :raises FlashError: The driver signalled an error.
+        """
+        length = len(data)
+        if length & 1 or not 0 < length <= BUFFER_SIZE:
+            raise ValueError("Invalid data length {0:d}.".format(length))
+        page, local = splitAddress(addr)
+        block = blockOfPage(self.geometry, page)
+        self._blocks.add(block)
+        words = length // 2
+        header = (page, block, command, local >> 8, local & 0xff, words >> 8, words & 0xff)
+        self._send(FULL, header, data)
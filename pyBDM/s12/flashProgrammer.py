@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+##
+##  Differential programming of the paged FTS flash.
+##
+
+from collections import namedtuple
+
+from pyBDM.image import coalesce
+from pyBDM.paging import PagedReader, resolveSegments, splitAddress, PAGE_SIZE
+from pyBDM.routines import crc16, sectorChecksums, sectorRanges
+from pyBDM.s12.FlashModule import Flash, PROGRAM, SECTOR_ERASE, blockOfPage, firstPage, geometryFromPartID
+from pyBDM.s12.flashDriver import BUFFER_SIZE, FlashDriver
+from pyBDM.s12.flashScheduler import BlockScheduler
+
+
+PHRASE_SIZE = 2     # FTS flash programs aligned words.
+
+##
+##  One sector to erase and program, `data` covers the whole sector.
+##
+SectorUnit = namedtuple('SectorUnit', 'address page local data')
+
+
+def planSectors(segments, geometry, page = None, phraseSize = PHRASE_SIZE, fill = 0xff):
+    """ ..  py:function:: planSectors(segments, geometry, page = None, phraseSize = PHRASE_SIZE, fill = 0xff)
+
+            Turn image segments (see :mod:`pyBDM.image`) into per-sector work
+            units: addresses are resolved (see :func:`pyBDM.paging.resolveAddress`,
+            `page` maps local $8000-$BFFF addresses), overlapping records merged,
+            everything aligned to the programming phrase and padded with `fill`.
+
+            :rtype: list of :class:`SectorUnit`, sorted by address.
+            :raises ValueError: Segments outside of the flash.
+    """
+    start = firstPage(geometry) * PAGE_SIZE
+    end = start + geometry.size
+    sectorSize = geometry.sectorSize
+    sectors = {}
+    for addr, data in coalesce(resolveSegments(segments, page), phraseSize, fill):
+        if addr < start or addr + len(data) > end:
+            raise ValueError("0x{0:05x}-0x{1:05x} outside of flash (0x{2:05x}-0x{3:05x}).".format(addr,
+                addr + len(data), start, end)
+            )
+        for sector, size in sectorRanges(addr, len(data), sectorSize):
+            base = sector - (sector % sectorSize)
+            if base not in sectors:
+                sectors[base] = bytearray([fill]) * sectorSize
+            sectors[base][sector - base : sector - base + size] = data[sector - addr : sector - addr + size]
+    units = []
+    for sector in sorted(sectors):
+        page, local = splitAddress(sector)
+        units.append(SectorUnit(sector, page, local, sectors[sector]))
+    return units
+
+
+def _offsetProgress(progress, done, total):
+    """Map the progress of a single sector onto the whole operation."""
+    if progress is None:
+        return None
+    return lambda current, _: progress(done + current, total)
+
+
+def _programmedRange(data):
+    """Word aligned (start, stop) of `data` without leading and trailing erased words."""
+    start, stop = 0, len(data)
+    while start < stop and data[start : start + 2] == b'\xff\xff':
+        start += 2
+    while stop > start and data[stop - 2 : stop] == b'\xff\xff':
+        stop -= 2
+    return start, stop
+
+
+class FlashProgrammer(object):
+    """ .. class:: FlashProgrammer
+
+        Programs images given by global address (see :mod:`pyBDM.paging`),
+        sector by sector.
+
+        Unless disabled, every sector is fingerprinted first (CRC-16 computed
+        on the target, or read back with `onTarget = False`) and only sectors
+        differing from the image are erased and programmed. Bytes of
+        partially covered sectors keep their current content.
+
+        :param pod: :class:`pyBDM.bdm.BDMBase` instance, target halted.
+        :param geometry: :class:`pyBDM.s12.FlashModule.FlashGeometry` (default: derived from PARTID).
+        :param onTarget: Fingerprint sectors on the target.
+        :param driver: Program through the RAM resident :class:`pyBDM.s12.flashDriver.FlashDriver`
+                       instead of burst programming via BDM.
+        :param concurrent: Erase and program all flash blocks at once (see
+                           :class:`pyBDM.s12.flashScheduler.BlockScheduler`).
+    """
+
+    def __init__(self, pod, geometry = None, onTarget = True, driver = False, concurrent = False):
+        self.pod = pod
+        self.geometry = geometry or geometryFromPartID(pod.getPartID())
+        if self.geometry is None:
+            raise ValueError("Unknown flash module, specify geometry.")
+        self.flash = Flash(pod)
+        self.paging = PagedReader(pod)
+        self.onTarget = onTarget
+        self.driver = driver
+        self.concurrent = concurrent
+        self._block = None
+
+    @property
+    def start(self):
+        return firstPage(self.geometry) * PAGE_SIZE
+
+    @property
+    def end(self):
+        return self.start + self.geometry.size
+
+    def _checkRange(self, addr, length):
+        if addr < self.start or addr + length > self.end:
+            raise ValueError("0x{0:05x}-0x{1:05x} outside of flash (0x{2:05x}-0x{3:05x}).".format(addr,
+                addr + length, self.start, self.end)
+            )
+
+    def fingerprints(self, addr, length):
+        """ ..  py:method:: fingerprints(addr, length)
+
+                :returns: List of (address, size, crc) per sector.
+        """
+        sectorSize = self.geometry.sectorSize
+        if self.onTarget:
+            return sectorChecksums(self.pod, addr, length, sectorSize, paged = True)
+        return [(start, size, crc16(self.paging.read(start, size))) for start, size in sectorRanges(addr, length,
+            sectorSize)
+        ]
+
+    def changedSectors(self, addr, data):
+        """ ..  py:method:: changedSectors(addr, data)
+
+                :returns: Start addresses of the sectors differing from `data`.
+        """
+        view = memoryview(data)
+        return [start for start, size, crc in self.fingerprints(addr, len(view))
+            if crc != crc16(view[start - addr : start - addr + size])
+        ]
+
+    def select(self, page):
+        """ ..  py:method:: select(page)
+
+                Map `page` and select the flash block it belongs to.
+        """
+        self.paging.select(page)
+        block = blockOfPage(self.geometry, page)
+        if block != self._block:
+            self.flash.selectBank(block)
+            self.flash.clearErrors()
+            self._block = block
+
+    def eraseSector(self, addr):
+        """ ..  py:method:: eraseSector(addr)
+        """
+        page, local = splitAddress(addr)
+        self.select(page)
+        self.flash.sectorErase(local)
+
+    def massErase(self, blocks = None):
+        """ ..  py:method:: massErase(blocks = None)
+
+                Erase `blocks` (default: all) at once.
+        """
+        scheduler = BlockScheduler(self.pod, self.geometry, self.flash)
+        for block in (range(self.geometry.blocks) if blocks is None else blocks):
+            scheduler.massErase(block)
+        scheduler.run()
+        self._block = None
+
+    def programSector(self, addr, data, progress = None):
+        """ ..  py:method:: programSector(addr, data, progress = None)
+
+                Erase the sector at `addr` and burst program `data` (a whole
+                sector), erased words are skipped.
+
+                :param progress: Called with (bytes done, bytes total).
+        """
+        local = splitAddress(addr)[1]
+        self.eraseSector(addr)
+        self.flash.programWords(local, data, progress)
+
+    def program(self, addr, data, differential = True, progress = None):
+        """ ..  py:method:: program(addr, data, differential = True, progress = None)
+
+                Program `data` at global address `addr`.
+
+                :param progress: Called with (bytes done, bytes total) of the
+                                 sectors to program.
+
+                :returns: Start addresses of the programmed sectors.
+        """
+        view = memoryview(data)
+        length = len(view)
+        self._checkRange(addr, length)
+        sectorSize = self.geometry.sectorSize
+        with self.paging:
+            self._block = None
+            if differential:
+                sectors = self.changedSectors(addr, view)
+            else:
+                sectors = [start for start, _ in sectorRanges(addr, length, sectorSize)]
+            sectors = [start - (start % sectorSize) for start in sectors]
+            contents = []
+            for sector in sectors:
+                begin, stop = max(sector, addr), min(sector + sectorSize, addr + length)
+                if begin == sector and stop == sector + sectorSize:
+                    content = view[begin - addr : stop - addr]
+                else:
+                    content = self.paging.read(sector, sectorSize)
+                    content[begin - sector : stop - sector] = view[begin - addr : stop - addr]
+                contents.append((sector, content))
+            self._programContents(contents, progress)
+        return sectors
+
+    def programUnits(self, units, differential = True, progress = None):
+        """ ..  py:method:: programUnits(units, differential = True, progress = None)
+
+                Program a plan made by :func:`planSectors`, sectors not in the
+                plan are left alone.
+
+                :returns: Start addresses of the programmed sectors.
+        """
+        sectorSize = self.geometry.sectorSize
+        with self.paging:
+            self._block = None
+            if differential:
+                changed = set()
+                run = []
+                for unit in list(units) + [None]:     # Fingerprint contiguous runs at once.
+                    if run and (unit is None or unit.address != run[-1].address + sectorSize):
+                        changed.update(self.changedSectors(run[0].address,
+                            bytearray().join(bytes(item.data) for item in run))
+                        )
+                        run = []
+                    if unit is not None:
+                        run.append(unit)
+                units = [unit for unit in units if unit.address in changed]
+            self._programContents([(unit.address, unit.data) for unit in units], progress)
+        return [unit.address for unit in units]
+
+    def programImage(self, segments, page = None, differential = True, progress = None):
+        """ ..  py:method:: programImage(segments, page = None, differential = True, progress = None)
+
+                Plan (see :func:`planSectors`) and program the segments read by
+                e.g. :func:`pyBDM.image.readImage`.
+        """
+        return self.programUnits(planSectors(segments, self.geometry, page), differential, progress)
+
+    def _programContents(self, contents, progress = None):
+        """Erase and program (sector, data) pairs of whole sectors."""
+        if self.driver:
+            self._programWithDriver(contents, progress)
+            return
+        if self.concurrent:
+            scheduler = BlockScheduler(self.pod, self.geometry, self.flash)
+            for sector, content in contents:
+                scheduler.eraseSector(sector)
+                scheduler.programWords(sector, content)
+            scheduler.run(progress)
+            self._block = None
+            return
+        sectorSize = self.geometry.sectorSize
+        done, total = 0, len(contents) * sectorSize
+        for sector, content in contents:
+            self.pod.logger.debug("Programming sector 0x{0:05x}.".format(sector))
+            self.programSector(sector, content, _offsetProgress(progress, done, total))
+            done += sectorSize
+
+    def _programWithDriver(self, contents, progress = None):
+        """Erase and program whole sectors, the data is streamed while the target programs."""
+        sectorSize = self.geometry.sectorSize
+        total = len(contents) * sectorSize
+        with FlashDriver(self.pod, self.geometry) as driver:
+            for index, (sector, content) in enumerate(contents):
+                self.pod.logger.debug("Programming sector 0x{0:05x} (driver).".format(sector))
+                driver.submit(sector, SECTOR_ERASE, b'\xff\xff')
+                for offset in range(0, sectorSize, BUFFER_SIZE):
+                    chunk = bytes(content[offset : offset + BUFFER_SIZE])
+                    start, stop = _programmedRange(chunk)
+                    if start < stop:
+                        driver.submit(sector + offset + start, PROGRAM, chunk[start : stop])
+                    if progress:
+                        progress(index * sectorSize + offset + len(chunk), total)
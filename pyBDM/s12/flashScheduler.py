@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+##
+##  Concurrent erase/program of the independent blocks of the FTS flash.
+##
+##  Every block has its own command state machine (selected via FCNFG
+##  BKSEL), so commands are dealt out to all blocks with a free
+##  command buffer; wait times of the blocks overlap instead of adding up.
+##  Selecting a block, launching a command and reading back the status is a
+##  single exchange on pods with batches.
+##
+
+from collections import deque
+import time
+
+from pyBDM.paging import splitAddress, PAGE_SIZE
+from pyBDM.polling import MINIMUM_INTERVAL, MAXIMUM_INTERVAL
+from pyBDM.s12.FlashModule import (FCNFG, FSTAT, FCMD, CBEIF, CCIF, PVIOL, ACCERR, PROGRAM, SECTOR_ERASE, MASS_ERASE,
+    CommandTimeoutError, Flash, blockOfPage, firstPage, raiseOnErrors
+)
+from pyBDM.s12.mmcModule import PPAGE
+from pyBDM.stats import timer
+
+
+class _Direct(object):
+    """Stand-in for :class:`pyBDM.batch.Batch` on pods without batches."""
+
+    class Result(object):
+        def __init__(self, value):
+            self.value = value
+
+        def result(self):
+            return self.value
+
+    def __init__(self, pod):
+        self.pod = pod
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+    def __getattr__(self, name):
+        method = getattr(self.pod, name)
+        return lambda *args: self.Result(method(*args))
+
+
+class BlockScheduler(object):
+    """ .. class:: BlockScheduler
+
+        Queue erase and program commands by global address, then `run` them::
+
+            scheduler = BlockScheduler(pod, geometry)
+            for block in range(geometry.blocks):
+                scheduler.massErase(block)
+            scheduler.run()
+
+        Commands of a block are executed in the order queued.
+
+        :param pod: :class:`pyBDM.bdm.BDMBase` instance, target halted.
+        :param geometry: :class:`pyBDM.s12.FlashModule.FlashGeometry`.
+        :param flash: :class:`pyBDM.s12.FlashModule.Flash`, supplies the expected command durations.
+    """
+
+    def __init__(self, pod, geometry, flash = None):
+        self.pod = pod
+        self.geometry = geometry
+        self.flash = flash or Flash(pod)
+        self.queues = dict((block, deque()) for block in range(geometry.blocks))
+        self._total = 0
+
+    def _queue(self, addr, command, word, weight):
+        page, local = splitAddress(addr)
+        operation = [page, local, command, word, weight]
+        self.queues[blockOfPage(self.geometry, page)].append(operation)
+        self._total += weight
+        return operation
+
+    def eraseSector(self, addr):
+        """ ..  py:method:: eraseSector(addr)
+        """
+        self._queue(addr & ~1, SECTOR_ERASE, 0xffff, 0)
+
+    def massErase(self, block):
+        """ ..  py:method:: massErase(block)
+        """
+        pagesPerBlock = (self.geometry.size // self.geometry.blocks) // PAGE_SIZE
+        page = firstPage(self.geometry) + (self.geometry.blocks - 1 - block) * pagesPerBlock
+        self._queue(page * PAGE_SIZE, MASS_ERASE, 0xffff, 0)
+
+    def programWords(self, addr, data, skipErased = True):
+        """ ..  py:method:: programWords(addr, data, skipErased = True)
+
+                Queue PROGRAM commands for `data` (even length, not crossing a
+                page) at global address `addr`.
+        """
+        pending, last = 0, None
+        for offset in range(0, len(data), 2):
+            word = (data[offset] << 8) | data[offset + 1]
+            pending += 2
+            if not (skipErased and word == 0xffff):
+                last = self._queue(addr + offset, PROGRAM, word, pending)
+                pending = 0
+        if pending:     # Account trailing erased words for progress.
+            if last is None:
+                last = self._queue(addr, None, None, 0)
+            last[4] += pending
+            self._total += pending
+
+    def _exchange(self):
+        return self.pod.batch() if hasattr(self.pod, 'batch') else _Direct(self.pod)
+
+    def _select(self, batch, block, page = None):
+        if block != self._block:
+            batch.writeBDByte(FCNFG, self._config | block)
+            self._block = block
+        if page is not None and page != self._page:
+            batch.writeBDByte(PPAGE, page)
+            self._page = page
+
+    def _check(self, block, status):
+        if status & (PVIOL | ACCERR):
+            with self._exchange() as batch:
+                self._select(batch, block)
+                batch.writeBDByte(FSTAT, PVIOL | ACCERR)
+            raiseOnErrors(status, "Flash block {0:d}".format(block))
+
+    def _update(self, block, status):
+        self._status[block] = status
+        if status & CCIF:
+            self._launched.pop(block, None)
+        self._check(block, status)
+
+    def _refresh(self, blocks):
+        """Read FSTAT of `blocks` in a single exchange."""
+        with self._exchange() as batch:
+            futures = []
+            for block in blocks:
+                self._select(batch, block)
+                futures.append((block, batch.readBDByte(FSTAT)))
+        for block, future in futures:
+            self._update(block, future.result())
+
+    def _launch(self, block, progress):
+        page, local, command, word, weight = self.queues[block].popleft()
+        if command is not None:
+            with self._exchange() as batch:
+                self._select(batch, block, page)
+                batch.writeWord(local, word)
+                batch.writeBDByte(FCMD, command)
+                batch.writeBDByte(FSTAT, CBEIF)
+                future = batch.readBDByte(FSTAT)
+            self._launched[block] = (command, timer())
+            self._used.add(block)
+            self._update(block, future.result())
+        self._done += weight
+        if progress and weight:
+            progress(self._done, self._total)
+
+    def _wait(self, idle, now, latest = False):
+        """Sleep until the first (or `latest`) command in flight is expected to finish, check deadlines."""
+        poller = self.flash.poller
+        delay = 0.0
+        for index, (block, (command, started)) in enumerate(sorted(self._launched.items())):
+            if now - started > 2 * poller.timeoutFor(command):     # A buffered command may wait for its predecessor.
+                raise CommandTimeoutError("Flash block {0:d}: command 0x{1:02x} not finished within {2:.3f}s.".format(
+                    block, command, now - started)
+                )
+            remaining = started + poller.expectedDuration(command) - now
+            delay = remaining if index == 0 else (max if latest else min)(delay, remaining)
+        time.sleep(max(delay, min(MINIMUM_INTERVAL * (2 ** idle), MAXIMUM_INTERVAL)))
+
+    def run(self, progress = None):
+        """ ..  py:method:: run(progress = None)
+
+                Execute all queued commands and wait for their completion.
+                PPAGE and FCNFG are restored afterwards.
+
+                :param progress: Called with (bytes done, bytes total).
+                :raises pyBDM.s12.FlashModule.FlashError: PVIOL, ACCERR or timeout (CommandTimeoutError).
+        """
+        pod = self.pod
+        poller = self.flash.poller
+        commands = set(operation[2] for queue in self.queues.values() for operation in queue)
+        # No command buffer got free for as long as the longest command may take (buffered behind its predecessor).
+        stallTimeout = 2 * max(poller.timeoutFor(command) for command in commands) if commands else 0.0
+        savedPage, savedConfig = pod.readBDByte(PPAGE), pod.readBDByte(FCNFG)
+        self._mask = self.geometry.blocks - 1
+        self._config = savedConfig & ~self._mask
+        self._page, self._block = savedPage, savedConfig & self._mask
+        self._status = {}
+        self._launched = {}
+        self._used = set()
+        self._done = 0
+        try:
+            self._refresh([block for block, queue in sorted(self.queues.items()) if queue])
+            idle = 0
+            stalled = timer()
+            while any(self.queues.values()):
+                launched = False
+                for block, queue in sorted(self.queues.items()):
+                    while queue and self._status[block] & CBEIF:  # Stay with a block as long as it accepts commands.
+                        self._launch(block, progress)
+                        launched = True
+                if launched:
+                    idle = 0
+                    stalled = timer()
+                    continue
+                now = timer()
+                if now - stalled > stallTimeout:
+                    blocks = [block for block, queue in sorted(self.queues.items()) if queue]
+                    raise CommandTimeoutError("Flash block(s) {0!s}: command buffer not free within {1:.3f}s.".format(
+                        ", ".join(str(block) for block in blocks), now - stalled)
+                    )
+                self._wait(idle, now)
+                idle += 1
+                self._refresh(sorted(set(self._launched) | set(block for block, queue in self.queues.items() if queue)))
+            idle = 0
+            while True:
+                busy = [block for block in sorted(self._used) if not self._status[block] & CCIF]
+                if not busy:
+                    break
+                self._wait(idle, timer(), latest = True)
+                idle += 1
+                self._refresh(busy)
+        finally:
+            for queue in self.queues.values():
+                queue.clear()
+            self._total = 0
+            with self._exchange() as batch:
+                self._select(batch, savedConfig & self._mask, savedPage)
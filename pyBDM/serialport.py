@@ -26,9 +26,10 @@ __copyright__ = """
   51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
 
-import port
 import serial
-import types
+
+from pyBDM import port
+from pyBDM.stats import TransportStatistics, Measurement, timer
 
 class PortException(serial.SerialException): pass
 from pyBDM.utils import slicer
@@ -46,6 +47,7 @@ class Port(port.Port):
         self.parity = parity
         self.stopbits = stopbits
         self.timeout = timeout
+        self.transportStatistics = TransportStatistics()
 
     def connect(self):
         try:
@@ -63,18 +65,60 @@ class Port(port.Port):
 #            print("Closed COM-Port.")
 
     def write(self, data):
-        if not isinstance(data, (types.ListType, types.TupleType)):
-            data = [data]
-        self.port.write(bytearray(data))
+        if isinstance(data, int):
+            data = (data, )
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytearray(data)
+        start = timer()
+        self.port.write(data)
+        self.transportStatistics.record(TransportStatistics.PORT, len(data), 0, timer() - start)
         #self.port.flush()
 
     def read(self, length):
+        start = timer()
         data = self.port.read(length)
+        self.transportStatistics.record(TransportStatistics.PORT, 0, len(data), timer() - start, len(data) < length)
         #return bytearray(data)
         #print("Serial::read: '%s' [%s]." % (dumpa(data), hexDump(bytearray(data))))
         #self.port.flush()
         return bytearray(data)
 
+    def readinto(self, buffer):
+        """ ..  py:method:: readinto(buffer)
+
+                Read up to `len(buffer)` bytes directly into the writable `buffer`.
+
+                :returns: Number of bytes read.
+        """
+        start = timer()
+        length = len(buffer)
+        received = self.port.readinto(buffer)
+        self.transportStatistics.record(TransportStatistics.PORT, 0, received, timer() - start, received < length)
+        return received
+
+    def purge(self):
+        """ ..  py:method:: purge()
+
+                Discard pending input, e.g. to resynchronize after a failed exchange.
+        """
+        if self.port:
+            self.port.reset_input_buffer()
+
+    def stats(self):
+        """ ..  py:method:: stats()
+
+                :returns: Snapshot of the per command transport statistics.
+                :rtype: :class:`pyBDM.stats.TransportStatistics`
+        """
+        return self.transportStatistics.snapshot()
+
+    def measure(self):
+        """ ..  py:method:: measure()
+
+                Context manager measuring the statistics of the enclosed block.
+        """
+        return Measurement(self.transportStatistics)
+
     def close(self):
         if self.port and not self.port.closed:
             self.port.close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import copy
+import time
+
+timer = getattr(time, "perf_counter", time.time)
+
+HISTOGRAM_BUCKETS = 24  # Powers of two of microseconds, up to ~8s.
+
+
+class CommandStatistics(object):
+    """ .. class:: CommandStatistics
+
+        Counters of a single command (or of the raw port, see `PORT`).
+
+        `histogram[n]` counts round trips with a latency of less than 2**n
+        microseconds (and at least 2**(n-1)).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.bytesWritten = 0
+        self.bytesRead = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.totalTime = 0.0
+        self.minTime = None
+        self.maxTime = None
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def record(self, written, read, elapsed, timeout = False):
+        self.calls += 1
+        self.bytesWritten += written
+        self.bytesRead += read
+        if timeout:
+            self.timeouts += 1
+        self.totalTime += elapsed
+        self.minTime = elapsed if self.minTime is None else min(self.minTime, elapsed)
+        self.maxTime = elapsed if self.maxTime is None else max(self.maxTime, elapsed)
+        bucket = min(int(elapsed * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+    @property
+    def meanTime(self):
+        return self.totalTime / self.calls if self.calls else 0.0
+
+    def __sub__(self, other):
+        result = copy.deepcopy(self)
+        for attr in ('calls', 'bytesWritten', 'bytesRead', 'timeouts', 'retries', 'totalTime'):
+            setattr(result, attr, getattr(self, attr) - getattr(other, attr))
+        result.histogram = [a - b for a, b in zip(self.histogram, other.histogram)]
+        if other.calls:
+            result.minTime = result.maxTime = None    # Extrema of the difference are unknown.
+        return result
+
+    def __str__(self):
+        return "{0:<14s} {1:8d} {2:10d} {3:10d} {4:9.3f} {5:9.3f} {6:6d} {7:6d}".format(self.name, self.calls,
+            self.bytesWritten, self.bytesRead, self.meanTime * 1e3, (self.maxTime or 0.0) * 1e3, self.timeouts,
+            self.retries
+        )
+
+    __repr__ = __str__
+
+
+class TransportStatistics(object):
+    """ .. class:: TransportStatistics
+
+        Per command statistics of a pod, keyed by command name.
+        The raw serial traffic is accounted under `PORT`.
+    """
+
+    PORT = "<port>"
+    HEADER = "{0:<14s} {1:>8s} {2:>10s} {3:>10s} {4:>9s} {5:>9s} {6:>6s} {7:>6s}".format("Command", "Calls",
+        "Written", "Read", "Mean[ms]", "Max[ms]", "T/O", "Retry"
+    )
+
+    def __init__(self):
+        self.enabled = True
+        self.reset()
+
+    def reset(self):
+        self.commands = {}
+        self.startTime = timer()
+        self.endTime = None
+
+    def __getitem__(self, name):
+        entry = self.commands.get(name)
+        if entry is None:
+            entry = self.commands[name] = CommandStatistics(name)
+        return entry
+
+    def __contains__(self, name):
+        return name in self.commands
+
+    def __iter__(self):
+        return iter(sorted(self.commands.values(), key = lambda s: s.name))
+
+    def record(self, name, written, read, elapsed, timeout = False):
+        if self.enabled:
+            self[name].record(written, read, elapsed, timeout)
+
+    def recordRetry(self, name):
+        if self.enabled:
+            self[name].retries += 1
+
+    @property
+    def elapsedTime(self):
+        return (self.endTime or timer()) - self.startTime
+
+    def snapshot(self):
+        """ ..  py:method:: snapshot()
+
+                :returns: Frozen copy of the current state.
+        """
+        result = copy.deepcopy(self)
+        result.endTime = timer()
+        return result
+
+    def __sub__(self, other):
+        result = self.snapshot()
+        result.startTime = other.endTime or other.startTime
+        for name, entry in self.commands.items():
+            if name in other.commands:
+                entry = entry - other.commands[name]
+                if entry.calls:
+                    result.commands[name] = entry
+                else:
+                    del result.commands[name]
+        return result
+
+    def __str__(self):
+        result = [self.HEADER]
+        result.extend(str(entry) for entry in self if entry.name != self.PORT)
+        if self.PORT in self.commands:
+            result.append(str(self.commands[self.PORT]))
+        result.append("Elapsed: {0:.3f}s".format(self.elapsedTime))
+        return '\n'.join(result)
+
+
+class Measurement(object):
+    """ .. class:: Measurement
+
+        Context manager for scoped measurements::
+
+            with pod.measure() as m:
+                pod.readArea(0x4000, 0x4000)
+            print(m.result)
+    """
+
+    def __init__(self, statistics):
+        self._statistics = statistics
+        self._start = None
+        self.result = None
+
+    def __enter__(self):
+        self._start = self._statistics.snapshot()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.result = self._statistics.snapshot() - self._start
+        return False
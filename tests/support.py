@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+import unittest
+
+try:
+    from pyBDM.emulator import ComPod12Emulator, S12Target
+except ImportError:     # No pseudo-terminals (Windows).
+    ComPod12Emulator = None
+
+from pyBDM.compod12 import ComPod12
+from pyBDM.kevinro import KevinRoBDM12
+
+
+@unittest.skipIf(ComPod12Emulator is None, "ComPod12 emulator requires pseudo-terminals.")
+class EmulatedTestCase(unittest.TestCase):
+    """Runs every test against a halted target behind a fresh ComPod12 emulator."""
+
+    timeScale = 0.01    # NVM commands run a hundred times faster than on silicon.
+
+    def setUp(self):
+        self.target = S12Target(timeScale = self.timeScale)
+        self.emulator = ComPod12Emulator(self.target)
+        self.emulator.start()
+        self.pod = ComPod12(self.emulator.portName, 115200, timeout = 1.0)
+        self.pod.connect()
+        self.pod.MAX_READ_PAYLOAD = 0x80
+        self.pod.targetHalt()
+
+    def tearDown(self):
+        self.pod.close()
+        self.emulator.stop()
+
+    def flashContent(self, addr, length):
+        """Emulated flash array at global address `addr`."""
+        index = addr - self.target.firstPage * 0x4000
+        return self.target.flash[index : index + length]
+
+
+class FakeSerial(object):
+    """Records the frames written, replies from a canned byte string."""
+
+    def __init__(self, replies = b''):
+        self.frames = []
+        self.replies = bytearray(replies)
+        self.cts = True
+
+    def getCTS(self):
+        return self.cts
+
+    def setRTS(self, state):
+        pass
+
+    def write(self, data):
+        self.frames.append(bytes(bytearray(data)))
+
+    def read(self, length):
+        data = self.replies[ : length]
+        del self.replies[ : length]
+        return bytes(data)
+
+    def reset_input_buffer(self):
+        self.replies = bytearray()
+
+    def isOpen(self):
+        return False
+
+
+def makeKevinRo(replies = b'', extended = True):
+    """Kevin Ross BDM12 on a :class:`FakeSerial`, `extended`: firmware >= v4.5."""
+    pod = KevinRoBDM12('fake', 115200)
+    pod.port = FakeSerial(replies)
+    pod.extendedCommandsSupported = pod.ctsRtsControl = extended
+    return pod
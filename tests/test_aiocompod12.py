@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyBDM.aiocompod12 import AsyncComPod12
+from pyBDM.calibration import PayloadCache
+from pyBDM.compod12 import ComPod12
+from pyBDM.stats import TransportStatistics
+
+from tests.support import EmulatedTestCase
+
+
+class TestPayload(EmulatedTestCase):
+
+    def setUp(self):
+        super(TestPayload, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.cache = PayloadCache(os.path.join(self.directory, "payload.json"))
+
+    def tearDown(self):
+        super(TestPayload, self).tearDown()
+        shutil.rmtree(self.directory)
+
+    def loadPayload(self):
+        async def session():
+            pod = AsyncComPod12(self.emulator.portName, 115200)
+            pod.connect()
+            try:
+                return await pod.loadPayload(self.cache), await pod.readArea(0x1000, 0x100)
+            finally:
+                pod.close()
+        return asyncio.run(session())
+
+    def testCalibratedPayload(self):
+        self.pod.writeArea(0x1000, bytearray(range(256)))
+        calibrated = self.pod.calibrate(self.cache, force = True)
+        self.pod.close()
+        payload, data = self.loadPayload()
+        self.assertEqual(payload, calibrated)
+        self.assertEqual(data, bytearray(range(256)))
+
+    def testDefaults(self):
+        self.pod.close()
+        payload, _ = self.loadPayload()
+        self.assertEqual(payload, (ComPod12.MAX_READ_PAYLOAD, ComPod12.MAX_WRITE_PAYLOAD))
+
+
+class TestStatistics(EmulatedTestCase):
+
+    def testPortTraffic(self):
+        self.pod.close()
+        async def session():
+            pod = AsyncComPod12(self.emulator.portName, 115200)
+            pod.connect()
+            try:
+                with pod.measure() as m:
+                    await pod.readArea(0x1000, 0x40)
+                return m.result
+            finally:
+                pod.close()
+        result = asyncio.run(session())
+        port = result[TransportStatistics.PORT]
+        self.assertEqual((port.bytesWritten, port.bytesRead), (result['READ_AREA'].bytesWritten, 0x40))
+        self.assertEqual(port.calls, 2 * result['READ_AREA'].calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
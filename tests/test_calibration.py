@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyBDM.calibration import SCRATCH_ADDRESS, PayloadCache, calibratePayload, verifyLink
+
+from tests.support import EmulatedTestCase
+
+
+class TestCalibration(EmulatedTestCase):
+
+    def setUp(self):
+        super(TestCalibration, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.cache = PayloadCache(os.path.join(self.directory, "payload.json"))
+
+    def tearDown(self):
+        super(TestCalibration, self).tearDown()
+        shutil.rmtree(self.directory)
+
+    def testReadAndWriteSeparately(self):
+        self.emulator.readLimit = 64
+        self.emulator.commandLatency = 0.002    # Larger payloads are faster.
+        self.pod.MAX_READ_PAYLOAD = 16
+        ram = bytearray(os.urandom(0x100))
+        self.pod.writeArea(SCRATCH_ADDRESS, ram)
+        read, write = calibratePayload(self.pod, self.cache, force = True)
+        self.assertEqual(read, 64)
+        self.assertGreater(write, 64)
+        self.assertEqual(self.target.ram[ : len(ram)], ram)
+
+    def testVerifyLinkRestoresAfterFallback(self):
+        ram = bytearray(os.urandom(16))
+        self.pod.writeArea(SCRATCH_ADDRESS, ram)
+        readChunk = self.pod._readChunk
+        reads = []
+        def corruptReadBack(addr, length):
+            reads.append(addr)
+            data = readChunk(addr, length)
+            return bytearray(length) if len(reads) == 2 else data    # Second read is the pattern.
+        self.pod._readChunk = corruptReadBack
+        seen = []
+        self.assertFalse(verifyLink(self.pod, fallback = lambda: seen.append(bytearray(self.target.ram[ : 16]))))
+        self.assertEqual(len(seen), 1)
+        self.assertNotEqual(seen[0], ram)     # Still the pattern.
+        self.assertEqual(self.target.ram[ : 16], ram)
+
+
+if __name__ == '__main__':
+    unittest.main()
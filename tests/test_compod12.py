@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import os
+import unittest
+
+from pyBDM import bdm
+from pyBDM.bdm import CommunicationError, UnexpectedHaltError
+from pyBDM.framing import BDM_TEMPLATES, Framer
+from pyBDM.s12.BdmpModule import BDMSTS
+from pyBDM.s12.bkpModule import BKBDM, BKEN, BKP0H, BKP0L, BKPCT0
+
+from tests.support import EmulatedTestCase
+
+
+class TestFraming(unittest.TestCase):
+
+    def setUp(self):
+        self.framer = Framer(BDM_TEMPLATES)
+
+    def testEncode(self):
+        self.assertEqual(bytes(self.framer.encode(bdm.READ_PC)), bytes(bytearray([bdm.READ_PC])))
+        self.assertEqual(bytes(self.framer.encode(bdm.WRITE_BD_BYTE, 0xff01, 0xc4)),
+            bytes(bytearray([bdm.WRITE_BD_BYTE, 0xff, 0x01, 0xc4]))
+        )
+        self.assertEqual(bytes(self.framer.encode(bdm.WRITE_WORD, 0x1000, 0x1234)),
+            bytes(bytearray([bdm.WRITE_WORD, 0x10, 0x00, 0x12, 0x34]))
+        )
+
+    def testEncodePayload(self):
+        self.framer = Framer(BDM_TEMPLATES, {bdm.WRITE_WORD: 4})
+        frame = self.framer.encodePayload(bdm.WRITE_WORD, b'\xaa\xbb', 0x1000, 0x1234)
+        self.assertEqual(bytes(frame), bytes(bytearray([bdm.WRITE_WORD, 0x10, 0x00, 0x12, 0x34, 0xaa, 0xbb])))
+        self.assertRaises(ValueError, self.framer.encodePayload, bdm.WRITE_WORD, b'\x00' * 5, 0x1000, 0x1234)
+
+    def testUnknownOpcode(self):
+        self.assertRaises(ValueError, self.framer.encode, 0x01)
+
+
+class TestCommands(EmulatedTestCase):
+
+    def testReadCommand(self):
+        self.pod.writePC(0x1234)
+        self.assertEqual(self.pod.readCommand(bdm.READ_PC, 2), b'\x12\x34')
+        self.assertRaises(ValueError, self.pod.readCommand, bdm.READ_PC, 3)
+
+
+class TestBatch(EmulatedTestCase):
+
+    def testResults(self):
+        pod = self.pod
+        pod.writePC(0xc123)
+        pod.writeD(0x1234)
+        pod.writeX(0x5678)
+        with pod.measure() as m:
+            with pod.batch() as b:
+                futures = [b.readPC(), b.readD(), b.readX(), b.readBDByte(BDMSTS), b.writeY(0x9abc)]
+        self.assertEqual([f.result() for f in futures[ : 3]], [0xc123, 0x1234, 0x5678])
+        self.assertEqual(futures[3].result(), pod.readBDByte(BDMSTS))
+        self.assertEqual(pod.readY(), 0x9abc)
+        self.assertEqual(m.result['BATCH'].calls, 1)
+
+    def testLargeBatchIsSplit(self):
+        pod = self.pod
+        pod.writeArea(0x1000, bytearray(range(256)))
+        with pod.batch() as b:
+            futures = [b.readByte(0x1000 + i) for i in range(256)]
+        self.assertEqual([f.result() for f in futures], list(range(256)))
+
+    def testFailedGroupAbortsBatch(self):
+        pod = self.pod
+        exchange = pod.exchange
+        calls = []
+        def failSecond(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise CommunicationError("Line down.")
+            return exchange(*args)
+        pod.exchange = failSecond
+        futures = []
+        with self.assertRaises(CommunicationError):
+            with pod.batch() as b:
+                futures = [b.readByte(0x1000 + i) for i in range(256)]
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(all(f.done() for f in futures))
+        self.assertEqual(futures[0].exception(), None)
+        self.assertIsInstance(futures[-1].exception(), CommunicationError)
+
+
+class TestTransfers(EmulatedTestCase):
+
+    def testUnalignedReadWrite(self):
+        data = bytearray(os.urandom(1000))
+        self.pod.writeArea(0x1001, data)
+        self.assertEqual(self.pod.readArea(0x1001, len(data)), data)
+        self.assertEqual(len(self.pod.readArea(0x1001, 0)), 0)
+
+    def testChunkedReadWrite(self):
+        data = bytearray(os.urandom(0x1000))
+        with self.pod.measure() as m:
+            self.pod.writeArea(0x1000, data)
+            self.assertEqual(self.pod.readArea(0x1000, len(data)), data)
+        self.assertEqual(m.result['READ_AREA'].calls, len(data) // self.pod.MAX_READ_PAYLOAD)
+        self.assertEqual(self.target.ram[ : len(data)], data)
+
+    def testLegacyWriteArea(self):
+        self.pod.writeArea(0x1000, 3, b'\x01\x02\x03')
+        self.assertEqual(self.pod.readArea(0x1000, 3), b'\x01\x02\x03')
+        self.assertRaises(ValueError, self.pod.writeArea, 0x1000, 4, b'\x01\x02\x03')
+
+    def testReadAreaInto(self):
+        data = bytearray(os.urandom(300))
+        self.pod.writeArea(0x1000, data)
+        buffer = bytearray(len(data))
+        self.pod.readAreaInto(0x1000, buffer)
+        self.assertEqual(buffer, data)
+        chunks = [(addr, bytes(view)) for addr, view in self.pod.iterArea(0x1000, len(data), 64)]
+        self.assertEqual([addr for addr, _ in chunks], list(range(0x1000, 0x1000 + len(data), 64)))
+        self.assertEqual(bytearray().join(view for _, view in chunks), data)
+
+    def testFillArea(self):
+        self.pod.writeArea(0x1000, b'\x00' * 0x400)
+        self.pod.fillArea(0x1003, 0xa5, 777)
+        self.assertEqual(self.pod.readArea(0x1003, 777), bytearray([0xa5]) * 777)
+        self.assertEqual(self.pod.readArea(0x1002, 1), bytearray(1))
+        self.assertEqual(self.pod.readArea(0x1003 + 777, 1), bytearray(1))
+
+
+class TestRunTo(EmulatedTestCase):
+
+    def testBreakpoint(self):
+        self.pod.writeArea(0x2000, b'\xa7' * 0x10 + b'\x00')     # NOPs, BGND.
+        self.pod.writePC(0x2000)
+        self.assertEqual(self.pod.runTo(0x2008), 0x2008)
+        self.assertTrue(self.pod.isHalted())
+
+    def testForcedBreakpointFiresOnPrefetch(self):
+        self.pod.writeArea(0x2000, b'\xa7' * 0x10 + b'\x00')
+        self.pod.writePC(0x2000)
+        self.pod.writeBDByte(BKP0H, 0x20)
+        self.pod.writeBDByte(BKP0L, 0x08)
+        self.pod.writeBDByte(BKPCT0, BKEN | BKBDM)
+        self.pod.targetGo()
+        self.pod.waitHalted()
+        self.assertLess(self.pod.readPC(), 0x2008)
+
+    def testHaltedElsewhere(self):
+        self.pod.writeArea(0x2000, b'\xa7' * 4 + b'\x00')
+        self.pod.writePC(0x2000)
+        self.assertRaises(UnexpectedHaltError, self.pod.runTo, 0x2008)
+        self.assertTrue(self.pod.isHalted())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+import time
+import unittest
+
+from pyBDM.emulator import FLASH_TIMING, NvmController
+from pyBDM.s12.FlashModule import ACCERR, CBEIF, CCIF, FCLKDIV, SECTOR_ERASE
+from pyBDM.s12.mmcModule import PPAGE
+
+from tests.support import EmulatedTestCase
+
+BANK_SIZE = 0x10000
+
+
+class TestNvmController(unittest.TestCase):
+
+    def setUp(self):
+        self.array = bytearray(2 * BANK_SIZE)
+        self.controller = NvmController(self.array, FCLKDIV, 2, 1024, FLASH_TIMING)
+        self.bank = self.controller.selectedBank()     # Block 0, the upper half of the array.
+
+    def launch(self, index, command, word = 0xffff):
+        self.controller.arrayWrite(index, word)
+        self.controller.writeRegister(NvmController.CMD, command)
+        self.controller.writeRegister(NvmController.STAT, CBEIF)
+
+    def testCommandBuffer(self):
+        self.launch(BANK_SIZE, SECTOR_ERASE)
+        self.assertEqual(self.controller.status(self.bank) & (CBEIF | CCIF), CBEIF)
+        self.launch(BANK_SIZE + 1024, SECTOR_ERASE)
+        self.assertEqual(self.controller.status(self.bank) & (CBEIF | CCIF), 0)
+        self.controller.update(time.time() + 1.0)
+        self.assertEqual(self.controller.status(self.bank) & (CBEIF | CCIF), CBEIF | CCIF)
+        self.assertEqual(self.array[BANK_SIZE : BANK_SIZE + 2048], b'\xff' * 2048)
+        self.assertEqual(self.array.count(0xff), 2048)
+
+    def testUnselectedBlock(self):
+        self.launch(0, SECTOR_ERASE)
+        self.assertTrue(self.controller.status(self.bank) & ACCERR)
+        self.controller.update(time.time() + 1.0)
+        self.assertEqual(self.array.count(0xff), 0)
+
+    def testLaunchWithoutArrayWrite(self):
+        self.controller.writeRegister(NvmController.CMD, SECTOR_ERASE)
+        self.controller.writeRegister(NvmController.STAT, CBEIF)
+        self.assertTrue(self.controller.status(self.bank) & ACCERR)
+
+
+class TestEmulator(EmulatedTestCase):
+
+    def testVersion(self):
+        self.assertTrue(self.pod.getPODVersion().endswith("v01.05"))
+
+    def testMemoryMap(self):
+        self.pod.writeArea(0x1000, b'\x12\x34\x56')
+        self.assertEqual(self.target.ram[ : 3], b'\x12\x34\x56')
+        self.target.eeprom[ : 2] = b'\xa5\x5a'
+        self.assertEqual(self.pod.readArea(0x400, 2), b'\xa5\x5a')
+        self.target.flash[ : ] = bytearray(i >> 14 for i in range(len(self.target.flash)))   # Page number per page.
+        self.assertEqual(self.pod.readByte(0x8000), 0)
+        self.pod.writeByte(PPAGE, self.target.firstPage + 5)
+        self.assertEqual(self.pod.readByte(0x8000), 5)
+        self.assertEqual(self.pod.readByte(0x4000), 0x3E - self.target.firstPage)
+        self.assertEqual(self.pod.readByte(0xC000), 0x3F - self.target.firstPage)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import os
+import unittest
+
+from pyBDM.paging import PagedReader
+from pyBDM.s12.BdmpModule import CC_I, CC_X
+from pyBDM.s12.eepModule import EEP
+from pyBDM.s12.eepromProgrammer import EepromProgrammer
+from pyBDM.s12.FlashModule import AccessError, CommandTimeoutError, Flash, GEOMETRIES, MASS_ERASE, PROGRAM
+from pyBDM.s12.flashDriver import FlashDriver
+from pyBDM.s12.flashProgrammer import FlashProgrammer, planSectors
+from pyBDM.s12.flashScheduler import BlockScheduler
+from pyBDM.s12.mmcModule import PPAGE
+
+from tests.support import EmulatedTestCase
+
+SECTOR_SIZE = 1024
+
+
+class TestFlash(EmulatedTestCase):
+
+    def testProgramWords(self):
+        flash = Flash(self.pod)
+        data = bytearray(os.urandom(256))
+        data[16 : 20] = b'\xff' * 4
+        flash.programWords(0xC000, data)
+        self.assertEqual(self.flashContent(0xFC000, len(data)), data)
+
+    def testOnlyWholeCommandsAreMeasured(self):
+        flash = Flash(self.pod)
+        flash.programWords(0xC000, os.urandom(64))     # Waits in and after a burst cover parts of commands.
+        self.assertNotIn(PROGRAM, flash.poller.measured)
+        flash.programWord(0xC100, 0x1234)
+        self.assertEqual(flash.poller.measured[PROGRAM][0], 1)
+
+    def testProgrammedWordIsRejected(self):
+        flash = Flash(self.pod)
+        flash.programWord(0xC000, 0x1234)
+        self.assertRaises(AccessError, flash.programWord, 0xC000, 0x1030)
+        self.assertEqual(self.pod.readWord(0xC000), 0x1234)
+
+    def testWrongBank(self):
+        flash = Flash(self.pod)
+        flash.selectBank(2)
+        self.assertRaises(AccessError, flash.programWords, 0xC000, b'\x12\x34')
+
+
+class TestFlashProgrammer(EmulatedTestCase):
+
+    def testDifferential(self):
+        programmer = FlashProgrammer(self.pod)
+        addr = 0xF8200
+        data = bytearray(os.urandom(0x1400))
+        sectors = programmer.program(addr, data)
+        self.assertEqual(sectors, list(range(0xF8000, 0xF9800, SECTOR_SIZE)))
+        self.assertEqual(self.flashContent(addr, len(data)), data)
+        self.assertEqual(self.flashContent(0xF8000, 0x200), b'\xff' * 0x200)
+        data[0x900] ^= 0x55
+        self.assertEqual(programmer.program(addr, data), [0xF8800])
+        self.assertEqual(self.flashContent(addr, len(data)), data)
+        self.assertEqual(programmer.program(addr, data), [])
+        self.assertEqual(self.pod.readBDByte(PPAGE), self.target.firstPage)
+
+    def testProgress(self):
+        seen = []
+        FlashProgrammer(self.pod).program(0xF8000, os.urandom(3000), progress = lambda done, total: seen.append((done, total)))
+        self.assertEqual(seen[-1], (3 * SECTOR_SIZE, 3 * SECTOR_SIZE))
+
+    def testDriver(self):
+        self.pod.writeX(0x1234)
+        self.pod.writePC(0x4567)
+        self.pod.writeArea(0x1000, b'\x55' * 0x600)
+        data = bytearray(os.urandom(5000))
+        data[1000 : 1600] = b'\xff' * 600
+        sectors = FlashProgrammer(self.pod, driver = True).program(0xE0100, data, differential = False)
+        self.assertEqual(len(sectors), 6)
+        self.assertEqual(PagedReader(self.pod).read(0xE0100, len(data)), data)
+        self.assertEqual((self.pod.readX(), self.pod.readPC()), (0x1234, 0x4567))
+        self.assertEqual(self.pod.readArea(0x1000, 0x600), b'\x55' * 0x600)
+
+    def testDriverStreaming(self):
+        data = bytearray(os.urandom(256))
+        with FlashDriver(self.pod, GEOMETRIES['FTS256K']) as driver:
+            driver.submit(0xF8000, 0x20, data)
+        self.assertEqual(self.flashContent(0xF8000, len(data)), data)
+
+    def testDriverMasksInterrupts(self):
+        self.pod.writeCCR(0x00)
+        with FlashDriver(self.pod, GEOMETRIES['FTS256K']):
+            self.assertEqual(self.target.core.ccr & (CC_X | CC_I), CC_X | CC_I)
+        self.assertEqual(self.pod.readCCR(), 0x00)
+
+    def testProgramImage(self):
+        programmer = FlashProgrammer(self.pod)
+        data = bytearray(os.urandom(3000))
+        self.assertEqual(programmer.programImage([(0x3D8100, data)]), [0xF4000, 0xF4400, 0xF4800, 0xF4C00])
+        self.assertEqual(self.flashContent(0xF4100, len(data)), data)
+        self.assertEqual(programmer.programImage([(0x3D8100, data)]), [])
+
+    def testPlanSectors(self):
+        units = planSectors([(0x3C8000, b'\x01' * 3), (0xFFFFE, b'\x12\x34'), (0xC3FF, b'\x55')], GEOMETRIES['FTS256K'])
+        self.assertEqual([(unit.address, unit.page, unit.local) for unit in units],
+            [(0xF0000, 0x3C, 0x8000), (0xFC000, 0x3F, 0x8000), (0xFFC00, 0x3F, 0xBC00)]
+        )
+        self.assertEqual(units[0].data[ : 4], b'\x01\x01\x01\xff')
+
+
+class TestBlockScheduler(EmulatedTestCase):
+
+    def testConcurrentBlocks(self):
+        self.target.flash[ : ] = b'\x00' * len(self.target.flash)
+        programmer = FlashProgrammer(self.pod, concurrent = True)
+        programmer.massErase()
+        self.assertEqual(self.target.flash.count(0xff), len(self.target.flash))
+        data = bytearray(os.urandom(SECTOR_SIZE))
+        pages = (0x30, 0x34, 0x38, 0x3C)   # One sector in every block.
+        seen = []
+        sectors = programmer.programImage([(page * 0x4000, data) for page in pages], differential = False,
+            progress = lambda done, total: seen.append((done, total))
+        )
+        self.assertEqual(sectors, [page * 0x4000 for page in pages])
+        self.assertEqual(seen[-1], (4 * SECTOR_SIZE, 4 * SECTOR_SIZE))
+        for page in pages:
+            self.assertEqual(self.flashContent(page * 0x4000, SECTOR_SIZE), data)
+        self.assertEqual(self.pod.readBDByte(PPAGE), self.target.firstPage)
+
+    def testErrorsAreRaised(self):
+        scheduler = BlockScheduler(self.pod, GEOMETRIES['FTS256K'])
+        scheduler.programWords(0xFC000, b'\x12\x34')
+        scheduler.run()
+        scheduler.programWords(0xFC000, b'\x10\x30')
+        self.assertRaises(AccessError, scheduler.run)
+
+    def testStuckBlock(self):
+        bank = self.target.flashController.banks[0]
+        bank.active = (MASS_ERASE, 0, 0xffff, float('inf'))    # Command buffer never frees up.
+        bank.buffered = (MASS_ERASE, 0, 0xffff)
+        scheduler = BlockScheduler(self.pod, GEOMETRIES['FTS256K'])
+        scheduler.programWords(0xFC000, b'\x12\x34')
+        self.assertRaises(CommandTimeoutError, scheduler.run)
+        self.assertEqual(self.pod.readBDByte(PPAGE), self.target.firstPage)
+
+
+class TestEeprom(EmulatedTestCase):
+
+    timeScale = 0.1
+
+    def testProgram(self):
+        self.pod.writePC(0x4321)
+        programmer = EepromProgrammer(self.pod)
+        data = bytearray(os.urandom(1024))
+        self.assertEqual(len(programmer.program(0x400, data)), 256)
+        self.assertEqual(self.target.eeprom[ : len(data)], data)
+        data[10] = 0x00
+        data[601] ^= 0xff
+        self.assertEqual(programmer.program(0x400, data), [0x408, 0x658])
+        self.assertEqual(self.target.eeprom[ : len(data)], data)
+        self.assertEqual(programmer.plan(0x400, data), [])
+        self.assertEqual(self.pod.readPC(), 0x4321)
+
+    def testOnlyErasedWordsAreProgrammed(self):
+        self.target.eeprom[0 : 4] = b'\x12\x34\xff\xff'
+        programmer = EepromProgrammer(self.pod, onTarget = False)
+        self.assertEqual(programmer.plan(0x400, b'\x12\x34\x56\x78'), [(0x400, [(0x20, 0x402, 0x5678)])])
+        self.assertEqual(programmer.plan(0x400, b'\x12\x30\xff\xff'), [(0x400, [(0x60, 0x400, 0x1230)])])
+        self.assertEqual(programmer.plan(0x400, b'\x12\x30\x56\x78'),
+            [(0x400, [(0x60, 0x400, 0x1230), (0x20, 0x402, 0x5678)])]
+        )
+
+    def testUnaligned(self):
+        self.target.eeprom[0 : 8] = b'\x01\x02\x03\x04\x05\x06\x07\x08'
+        programmer = EepromProgrammer(self.pod, onTarget = False)
+        self.assertEqual(programmer.program(0x403, b'\x00\x11\x22'), [0x400, 0x404])
+        self.assertEqual(self.target.eeprom[0 : 8], b'\x01\x02\x03\x00\x11\x22\x07\x08')
+
+    def testProgrammedWordIsRejected(self):
+        eep = EEP(self.pod)
+        eep.programWord(0x400, 0x1234)
+        self.assertRaises(AccessError, eep.programWord, 0x400, 0x1030)
+        self.assertEqual(self.pod.readWord(0x400), 0x1234)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from pyBDM import image
+
+
+SEGMENTS = [(0xC0000, bytearray(os.urandom(100))), (0xC0050, bytearray(b'\x11' * 3)), (0xC0103, bytearray(b'\x22' * 2))]
+
+
+def elfImage(order, segments):
+    """32-bit ELF executable with one PT_LOAD program header per `(paddr, data)`."""
+    header = b'\x7fELF' + bytearray([1, {'<': 1, '>': 2}[order], 1]) + b'\x00' * 9
+    phoff = 52
+    offset = phoff + 32 * len(segments)
+    header += struct.pack(order + 'HHIIIIIHHHHHH', 2, 53, 1, 0, phoff, 0, 0, 52, 32, len(segments), 0, 0, 0)
+    programHeaders = payload = b''
+    for paddr, data in segments:
+        programHeaders += struct.pack(order + '8I', image.PT_LOAD, offset + len(payload), paddr, paddr, len(data),
+            len(data), 5, 1
+        )
+        payload += bytes(data)
+    return header + programHeaders + payload
+
+
+class TestWriters(unittest.TestCase):
+
+    def testBinary(self):
+        out = io.BytesIO()
+        self.assertEqual(image.writeBinary(iter(SEGMENTS), out), 105)
+        self.assertEqual(out.getvalue(), b''.join(bytes(data) for _, data in SEGMENTS))
+
+    def testSRecords(self):
+        out = io.StringIO()
+        self.assertEqual(image.writeSRecords(iter([(0x1000, b'\xaa\xbb')]), out), 1)
+        self.assertEqual(out.getvalue().splitlines()[1 : ], ["S1051000AABB85", "S9030000FC"])
+
+    def testSRecordTypeOfShortRecord(self):
+        out = io.StringIO()
+        image.writeSRecords(iter([(0xFFFE, b'\xaa\xbb')]), out)
+        self.assertEqual(out.getvalue().splitlines()[1 : ], ["S105FFFEAABB98", "S9030000FC"])
+
+    def testIntelHex(self):
+        out = io.StringIO()
+        self.assertEqual(image.writeIntelHex(iter([(0x31000, b'\xaa\xbb')]), out), 1)
+        self.assertEqual(out.getvalue().splitlines(), [":020000040003F7", ":02100000AABB89", ":00000001FF"])
+
+
+class TestRoundTrip(unittest.TestCase):
+
+    def roundTrip(self, writer, reader):
+        out = io.StringIO()
+        writer(iter(SEGMENTS), out)
+        return reader(io.StringIO(out.getvalue()))
+
+    def testSRecords(self):
+        self.assertEqual(image.coalesce(self.roundTrip(image.writeSRecords, image.readSRecords)),
+            image.coalesce(SEGMENTS)
+        )
+
+    def testIntelHex(self):
+        self.assertEqual(image.coalesce(self.roundTrip(image.writeIntelHex, image.readIntelHex)),
+            image.coalesce(SEGMENTS)
+        )
+
+
+class TestReaders(unittest.TestCase):
+
+    def testSRecordChecksum(self):
+        self.assertEqual(image.readSRecords(io.StringIO(u"S1051000AABB85\n")), [(0x1000, bytearray(b'\xaa\xbb'))])
+        self.assertRaises(image.ImageError, image.readSRecords, io.StringIO(u"S1051000AABB86\n"))
+        self.assertRaises(image.ImageError, image.readSRecords, io.StringIO(u"S1061000AABB85\n"))
+
+    def testIntelHexExtendedAddresses(self):
+        records = u":020000040003F7\n:02100000AABB89\n:020000021000EC\n:0100000055AA\n:00000001FF\n:0100000066FF\n"
+        self.assertEqual(image.readIntelHex(io.StringIO(records)),
+            [(0x31000, bytearray(b'\xaa\xbb')), (0x10000, bytearray(b'\x55'))]
+        )
+        self.assertRaises(image.ImageError, image.readIntelHex, io.StringIO(u":02100000AABB88\n"))
+
+    def testElf(self):
+        segments = [(0x3C8000, b'\xaa\xbb\xcc\xdd'), (0xFC000, b'\x01\x02')]
+        for order in '<>':
+            self.assertEqual(image.readElf(io.BytesIO(elfImage(order, segments))),
+                [(addr, bytearray(data)) for addr, data in segments]
+            )
+        self.assertRaises(image.ImageError, image.readElf, io.BytesIO(b'\x7fELF\x02' + b'\x00' * 60))
+        self.assertRaises(image.ImageError, image.readElf, io.BytesIO(b'MZ' + b'\x00' * 60))
+
+    def testReadImage(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "image.s19")
+            with open(filename, "w") as fout:
+                image.writeSRecords(iter(SEGMENTS[ : 1]), fout)
+            self.assertEqual(image.coalesce(image.readImage(filename)), image.coalesce(SEGMENTS[ : 1]))
+            self.assertRaises(image.ImageError, image.readImage, os.path.join(directory, "image.bin"))
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestCoalesce(unittest.TestCase):
+
+    def testPrecedenceAndAlignment(self):
+        result = image.coalesce(SEGMENTS, 2)
+        self.assertEqual([(addr, len(data)) for addr, data in result], [(0xC0000, 100), (0xC0102, 4)])
+        self.assertEqual(result[0][1][0x50 : 0x53], b'\x11' * 3)
+        self.assertEqual(result[1][1], bytearray(b'\xff\x22\x22\xff'))
+
+    def testAdjacentSegments(self):
+        self.assertEqual(image.coalesce([(0x10, b'\x01'), (0x11, b'\x02'), (0x20, b'')]), [(0x10, bytearray(b'\x01\x02'))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import unittest
+
+from pyBDM import bdm
+from pyBDM.bdm import UnexpectedHaltError
+from pyBDM.kevinro import EXTENDED_COMMAND, EXT_REGDUMP, EXT_TRACETO
+
+from tests.support import makeKevinRo
+
+
+class TestReadRegisters(unittest.TestCase):
+
+    def testSingleFrame(self):
+        pod = makeKevinRo(b'\xc0\x00\x12\x34\x56\x78\x9a\xbc\x3f\xf0\xd0')
+        context = pod.readRegisters()
+        self.assertEqual(pod.port.frames, [bytes(bytearray([EXTENDED_COMMAND, EXT_REGDUMP]))])
+        self.assertEqual(tuple(context), (0xc000, 0x1234, 0x5678, 0x9abc, 0x3ff0, 0xd0))
+
+    def testFallbackBeforeV45(self):
+        pod = makeKevinRo(b'\xc0\x00\x12\x34\x56\x78\x9a\xbc\x3f\xf0\xd0', extended = False)
+        context = pod.readRegisters()
+        self.assertEqual(tuple(context), (0xc000, 0x1234, 0x5678, 0x9abc, 0x3ff0, 0xd0))
+        self.assertNotIn(bytes(bytearray([EXTENDED_COMMAND, EXT_REGDUMP])), pod.port.frames)
+
+
+class TestWrite(unittest.TestCase):
+
+    def testBlockWithHandshake(self):
+        pod = makeKevinRo()
+        pod.write(b'\x01\x02\x03')
+        self.assertEqual(pod.port.frames, [b'\x01\x02\x03'])
+
+    def testPerByteBeforeV45(self):
+        pod = makeKevinRo(extended = False)
+        pod.write(b'\x01\x02\x03')
+        self.assertEqual(pod.port.frames, [b'\x01', b'\x02', b'\x03'])
+
+    def testPayloadLimit(self):
+        pod = makeKevinRo()
+        pod.MAX_PAYLOAD = 0x10
+        self.assertRaises(ValueError, pod.readArea, 0x1001, 0x10)    # 9 words.
+        self.assertRaises(ValueError, pod.writeArea, 0x1000, b'\x00' * 0x12)
+        self.assertEqual(pod.port.frames, [])
+
+
+class TestRunTo(unittest.TestCase):
+
+    def testReturnsProgramCounter(self):
+        pod = makeKevinRo(b'\x00\xc1\x23')
+        self.assertEqual(pod.runTo(0xc123), 0xc123)
+        self.assertEqual(pod.port.frames, [bytes(bytearray([EXTENDED_COMMAND, EXT_TRACETO, 0xc1, 0x23])),
+            bytes(bytearray([bdm.READ_PC]))]
+        )
+
+    def testFailureStatus(self):
+        pod = makeKevinRo(b'\x01\xc1\x23')
+        self.assertRaises(UnexpectedHaltError, pod.runTo, 0xc123)
+
+    def testHaltedElsewhere(self):
+        pod = makeKevinRo(b'\x00\xc1\x00')
+        self.assertRaises(UnexpectedHaltError, pod.runTo, 0xc123)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+
+import os
+import unittest
+
+from pyBDM.paging import PagedReader, globalAddress, resolveAddress, resolveSegments, splitAddress
+from pyBDM.s12.mmcModule import PPAGE
+
+from tests.support import EmulatedTestCase
+
+
+class TestAddresses(unittest.TestCase):
+
+    def testSplitAddress(self):
+        self.assertEqual(splitAddress(0xF8000), (0x3E, 0x8000))
+        self.assertEqual(splitAddress(0xC3FFF), (0x30, 0xBFFF))
+        for addr in (0xC0000, 0xC3FFF, 0xF8001, 0xFFFFF):
+            self.assertEqual(globalAddress(*splitAddress(addr)), addr)
+
+    def testResolveAddress(self):
+        self.assertEqual(resolveAddress(0x3C8000), 0xF0000)
+        self.assertEqual(resolveAddress(0xC000), 0xFC000)
+        self.assertEqual(resolveAddress(0x4001), 0xF8001)
+        self.assertEqual(resolveAddress(0x9000, 0x3D), 0xF5000)
+        self.assertEqual(resolveAddress(0xF0000), 0xF0000)
+        self.assertRaises(ValueError, resolveAddress, 0x9000)
+        self.assertRaises(ValueError, resolveAddress, 0x3C4000)
+
+    def testResolveSegments(self):
+        segments = resolveSegments([(0x3CBFFE, b'\x01\x02\x03\x04')])
+        self.assertEqual(segments, [(0xF3FFE, b'\x01\x02'), (0xF4000, b'\x03\x04')])
+
+
+class TestPagedReader(EmulatedTestCase):
+
+    def setUp(self):
+        super(TestPagedReader, self).setUp()
+        self.target.flash[ : ] = os.urandom(len(self.target.flash))
+
+    def testReadAcrossPages(self):
+        page = self.pod.getPPage()
+        self.assertEqual(self.pod.readGlobal(0xF8000 - 0x10, 0x20), self.flashContent(0xF8000 - 0x10, 0x20))
+        self.assertEqual(self.pod.getPPage(), page)
+
+    def testOneWritePerPage(self):
+        pages = 4
+        with self.pod.measure() as m:
+            data = PagedReader(self.pod).read(0xC0000, pages * 0x4000)
+        self.assertEqual(data, self.flashContent(0xC0000, pages * 0x4000))
+        # First page is already mapped, PPAGE is restored at the end.
+        self.assertEqual(m.result['WRITE_BD_BYTE'].calls, pages)
+        self.assertEqual(self.pod.readBDByte(PPAGE), self.target.firstPage)
+
+    def testReadMany(self):
+        requests = [(0xF8000, 4), (0xC0000, 4), (0xF8004, 4), (0xC4000 - 2, 4)]
+        results = PagedReader(self.pod).readMany(requests)
+        self.assertEqual(results, [self.flashContent(addr, length) for addr, length in requests])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+    (C) 2010-2016 by Christoph Schueler <github.com/Christoph2, cpu12.gems@googlemail.com>
+
+    All Rights Reserved
+
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along
+    with this program; if not, write to the Free Software Foundation, Inc.,
+    51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+
+import binascii
+import os
+import unittest
+
+from pyBDM.routines import CRC16_INIT, FILL_WORDS, LOAD_ADDRESS, crc16, crcOnTarget, execute, sectorRanges
+from pyBDM.s12.BdmpModule import CC_I, CC_X
+
+from tests.support import EmulatedTestCase
+
+
+class TestHostSide(unittest.TestCase):
+
+    def testCrc16(self):
+        data = os.urandom(1000)
+        self.assertEqual(crc16(data), binascii.crc_hqx(data, CRC16_INIT))
+        self.assertEqual(crc16(b'123456789'), 0x29b1)     # CRC-16/CCITT-FALSE check value.
+
+    def testSectorRanges(self):
+        self.assertEqual(list(sectorRanges(0x3fe, 0x404, 0x400)), [(0x3fe, 2), (0x400, 0x400), (0x800, 2)])
+
+
+class TestRoutines(EmulatedTestCase):
+
+    def testCrcOnTarget(self):
+        data = os.urandom(0x1000)
+        self.pod.writeArea(0x2000, data)
+        scratch = os.urandom(0x40)
+        self.pod.writeArea(LOAD_ADDRESS, scratch)
+        for length in (1, 0x3ff, 0x1000):
+            self.assertEqual(crcOnTarget(self.pod, 0x2000, length), binascii.crc_hqx(data[ : length], CRC16_INIT))
+        self.assertEqual(self.pod.readArea(LOAD_ADDRESS, len(scratch)), scratch)
+
+    def testFillOnTarget(self):
+        self.pod.writeX(0x1234)
+        self.pod.writeD(0x5678)
+        self.pod.writePC(0x4321)
+        for addr, length in ((0x1801, 0x2001), (0x1000, 0x3000), (0x1002, 0x80), (0x1000 + len(FILL_WORDS) - 1, 3)):
+            ram = bytearray(os.urandom(0x3000))
+            self.pod.writeArea(0x1000, ram)
+            self.pod.fillArea(addr, 0x5a, length, onTarget = True)
+            ram[addr - 0x1000 : addr - 0x1000 + length] = bytearray([0x5a]) * length
+            self.assertEqual(self.pod.readArea(0x1000, 0x3000), ram)
+        self.assertEqual((self.pod.readX(), self.pod.readD(), self.pod.readPC()), (0x1234, 0x5678, 0x4321))
+        self.assertTrue(self.pod.isHalted())
+
+    def testInterruptsMasked(self):
+        self.pod.writeCCR(0x00)
+        context = execute(self.pod, FILL_WORDS, x = 0x2000, y = 1, d = 0)
+        self.assertEqual(context.ccr & (CC_X | CC_I), CC_X | CC_I)
+        self.assertEqual(self.pod.readCCR(), 0x00)
+
+    def testVerifyArea(self):
+        data = bytearray(os.urandom(0x800))
+        self.pod.writeArea(0x2000, data)
+        scratch = os.urandom(0x40)
+        self.pod.writeArea(LOAD_ADDRESS, scratch)
+        self.assertEqual(self.pod.verifyArea(0x2000, data), [])
+        data[0x500] ^= 0x01
+        mismatches = self.pod.verifyArea(0x2000, data)
+        self.assertEqual([m.address for m in mismatches], [0x2400])
+        self.assertEqual(self.pod.readArea(LOAD_ADDRESS, len(scratch)), scratch)
+
+    def testVerifyPaged(self):
+        self.target.flash[ : ] = os.urandom(len(self.target.flash))
+        image = bytearray(self.flashContent(0xC8000, 0x1000))
+        image[0x123] ^= 0x80
+        mismatches = self.pod.verifyArea(0xC8000, image, paged = True)
+        self.assertEqual([m.address for m in mismatches], [0xC8000])
+        self.assertEqual(self.pod.getPPage(), self.target.firstPage)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -31,7 +31,7 @@ from pyBDM.s12.autoprobe import autoprobe
 
 def main():
     pod = ComPod12("COM24", 38400)
-    pod.connect()
+    pod.connect(ComPod12.BAUDRATES)
     pod.reset()
     pod.targetHalt()
     print(autoprobe(pod))
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__version__ = "0.1.0"
+
+__copyright__ = """
+    pyBDM - Library for the Motorola/Freescale Background Debugging Mode.
+
+   (C) 2010-2016 by Christoph Schueler <github.com/Christoph2,
+                                        cpu12.gems@googlemail.com>
+
+   All Rights Reserved
+
+  This program is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 2 of the License, or
+  (at your option) any later version.
+
+  This program is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License along
+  with this program; if not, write to the Free Software Foundation, Inc.,
+  51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+##
+##  Reproducible benchmarks of the pyBDM hot paths against the ComPOD12 emulator.
+##
+##  Every benchmark runs a fixed workload and reports the (median) wall clock
+##  time, the number of pod round trips, of serial syscalls and of bytes on the
+##  wire. These counts are deterministic and must never exceed the baseline;
+##  wall clock times depend on the host and are only gated with `--check-time`
+##  (allowing `--tolerance` percent slowdown).
+##
+
+import json
+from optparse import OptionParser, make_option
+import os
+import platform
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # Benchmark this checkout.
+
+from pyBDM.compod12 import ComPod12
+from pyBDM.emulator import ComPod12Emulator, S12Target
+from pyBDM.s12 import CPU12
+from pyBDM.s12.BdmpModule import BDMSTS
+from pyBDM.s12.FlashModule import Flash, FPOPEN, FPHDIS, FPLDIS, PROGRAM, geometryFromPartID
+from pyBDM.s12.flashDriver import FlashDriver
+from pyBDM.s12.flashProgrammer import FlashProgrammer
+from pyBDM.stats import TransportStatistics, timer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pybdm_benchmark_baseline.json")
+
+RAM_START       = 0x1000
+AREA_SIZE       = 0x1000
+AREA_BLOCK      = 0x80
+POLL_LOOPS      = 64
+FLASH_START     = 0x4000
+FLASH_GLOBAL    = 0xF8000   # FLASH_START as global address (page 0x3E).
+FLASH_WORDS     = 128
+DISASM_SIZE     = 0x4000
+
+##
+##  Workloads.
+##
+def benchReadArea(pod):
+    for offset in range(0, AREA_SIZE, AREA_BLOCK):
+        pod.readArea(RAM_START + offset, AREA_BLOCK)
+
+def benchWriteArea(pod):
+    data = bytearray(i & 0xff for i in range(AREA_BLOCK))
+    for offset in range(0, AREA_SIZE, AREA_BLOCK):
+        pod.writeArea(RAM_START + offset, data)
+
+def benchFillArea(pod):
+    pod.fillArea(RAM_START, 0x55, AREA_SIZE)
+
+def benchFillAreaOnTarget(pod):
+    pod.fillArea(RAM_START, 0x55, AREA_SIZE, onTarget = True)
+
+def benchRegisterPolling(pod):
+    for _ in range(POLL_LOOPS):
+        pod.readBDByte(BDMSTS)
+        pod.readPC()
+        pod.readD()
+        pod.readX()
+        pod.readY()
+        pod.readSP()
+
+def benchRegisterPollingBatch(pod):
+    for _ in range(POLL_LOOPS):
+        with pod.batch() as b:
+            b.readBDByte(BDMSTS)
+            b.readPC()
+            b.readD()
+            b.readX()
+            b.readY()
+            b.readSP()
+
+def benchFlashProgram(pod):
+    flash = Flash(pod)
+    flash.fcnfg = 0x00
+    flash.fprot = FPOPEN | FPHDIS | FPLDIS
+    for idx in range(FLASH_WORDS):
+        flash.test(FLASH_START + (idx * 2), idx)
+
+def benchFlashProgramBurst(pod):
+    flash = Flash(pod)
+    flash.fcnfg = 0x00
+    flash.fprot = FPOPEN | FPHDIS | FPLDIS
+    flash.programWords(FLASH_START, bytearray(range(FLASH_WORDS)) * 2)
+
+def benchFlashProgramDriver(pod):
+    flash = Flash(pod)
+    flash.fcnfg = 0x00
+    flash.fprot = FPOPEN | FPHDIS | FPLDIS
+    with FlashDriver(pod, geometryFromPartID(pod.getPartID())) as driver:
+        driver.submit(FLASH_GLOBAL, PROGRAM, bytearray(range(FLASH_WORDS)) * 2)
+
+def benchFlashMassErase(pod):
+    FlashProgrammer(pod, geometryFromPartID(pod.getPartID())).massErase()
+
+# Fixed instruction mix: LDAA #, STAA ext, STD 2,X+, DBNE Y, NOP, ABA, LDD #, EORA 1,X+, ASLD, BCC.
+DISASM_PATTERN = bytearray([0x86, 0x12, 0x7a, 0x10, 0x00, 0x6c, 0x31, 0x04, 0x36, 0xfb, 0xa7, 0x18, 0x06,
+    0xcc, 0x12, 0x34, 0xa8, 0x30, 0x59, 0x24, 0x04
+])
+
+def benchDisassembler(pod):
+    image = (DISASM_PATTERN * (DISASM_SIZE // len(DISASM_PATTERN) + 1))[ : DISASM_SIZE]
+    image.extend(b'\x00' * 8)   # BGNDs as padding for the last decoding.
+    memory = CPU12.CachedMemory(lambda addr, length: image[addr : addr + length])
+    pc = 0
+    while pc < DISASM_SIZE:
+        pc += CPU12.preDecode(pc, memory).totalSize
+
+BENCHMARKS = (
+    ("readArea",                benchReadArea,              True),
+    ("writeArea",               benchWriteArea,             True),
+    ("fillArea",                benchFillArea,              True),
+    ("fillAreaOnTarget",        benchFillAreaOnTarget,      True),
+    ("registerPolling",         benchRegisterPolling,       True),
+    ("registerPollingBatch",    benchRegisterPollingBatch,  True),
+    ("flashProgram",            benchFlashProgram,          True),
+    ("flashProgramBurst",       benchFlashProgramBurst,     True),
+    ("flashProgramDriver",      benchFlashProgramDriver,    True),
+    ("flashMassErase",          benchFlashMassErase,        True),
+    ("disassembler",            benchDisassembler,          False),
+)
+
+
+def runBenchmark(function, needsPod, options):
+    times = []
+    roundTrips = syscalls = wireBytes = 0
+    for _ in range(options.repeat):
+        if not needsPod:
+            start = timer()
+            function(None)
+            times.append(timer() - start)
+            continue
+        target = S12Target(timeScale = options.timeScale)
+        with ComPod12Emulator(target, baudrate = options.baudrate, commandLatency = options.commandLatency,
+                turnaroundLatency = options.turnaroundLatency) as emu:
+            pod = ComPod12(emu.portName, options.baudrate, timeout = 1.0)
+            pod.connect()
+            pod.MAX_READ_PAYLOAD = ComPod12.MAX_WRITE_PAYLOAD   # What calibrate() settles on, the emulator has no limit.
+            pod.reset()
+            pod.targetHalt()
+            with pod.measure() as m:
+                start = timer()
+                function(pod)
+                times.append(timer() - start)
+            pod.close()
+        stats = m.result
+        roundTrips = sum(entry.calls for entry in stats if entry.name != TransportStatistics.PORT)
+        if TransportStatistics.PORT in stats:
+            port = stats[TransportStatistics.PORT]
+            syscalls = port.calls
+            wireBytes = port.bytesWritten + port.bytesRead
+    times.sort()
+    return dict(seconds = times[len(times) // 2], roundTrips = roundTrips, syscalls = syscalls, wireBytes = wireBytes)
+
+
+def compare(results, baseline, tolerance, checkTime = False):
+    failures = []
+    for name, result in sorted(results.items()):
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key in ('roundTrips', 'syscalls', 'wireBytes'):
+            if key in reference and result[key] > reference[key]:
+                failures.append("{0!s}: {1!s} {2:d} > baseline {3:d}.".format(name, key, result[key], reference[key]))
+        if not checkTime:
+            continue
+        limit = reference['seconds'] * (1.0 + tolerance / 100.0)
+        if result['seconds'] > limit:
+            failures.append("{0!s}: {1:.4f}s > baseline {2:.4f}s (+{3:.0f}%).".format(name, result['seconds'],
+                reference['seconds'], tolerance)
+            )
+    return failures
+
+
+def main():
+    option_list = [
+        make_option("-b", "--baudrate", help = "simulated baud rate", dest = "baudrate", type = "int", default = 115200),
+        make_option("-l", "--latency", help = "simulated processing time per command [ms]", dest = "latency",
+            type = "float", default = 0.05),
+        make_option("-u", "--turnaround", help = "simulated latency per host round trip [ms]", dest = "turnaround",
+            type = "float", default = 1.0),
+        make_option("-t", "--time-scale", help = "scale factor of the simulated NVM command durations",
+            dest = "timeScale", type = "float", default = 1.0),
+        make_option("-r", "--repeat", help = "runs per benchmark (median is reported)", dest = "repeat",
+            type = "int", default = 3),
+        make_option("-k", "--only", help = "comma separated list of benchmarks to run", dest = "only", default = ""),
+        make_option("-o", "--output", help = "also write results as JSON to this file ('-': stdout)", dest = "output",
+            default = None),
+        make_option("--baseline", help = "baseline to compare against", dest = "baseline", default = DEFAULT_BASELINE),
+        make_option("--save-baseline", help = "store results as new baseline", dest = "saveBaseline",
+            action = "store_true", default = False),
+        make_option("--check-time", help = "also gate wall clock times against the baseline", dest = "checkTime",
+            action = "store_true", default = False),
+        make_option("--tolerance", help = "allowed slowdown against the baseline with --check-time [%]",
+            dest = "tolerance", type = "float", default = 25.0),
+    ]
+    op = OptionParser(usage = "%prog [options]", version = '%prog ' + __version__,
+        description = 'pyBDM benchmarks against the ComPOD12 emulator', option_list = option_list)
+    (options, args) = op.parse_args()
+    options.commandLatency = options.latency / 1000.0
+    options.turnaroundLatency = options.turnaround / 1000.0
+    only = [name for name in options.only.split(',') if name]
+
+    results = {}
+    for name, function, needsPod in BENCHMARKS:
+        if only and name not in only:
+            continue
+        results[name] = runBenchmark(function, needsPod, options)
+        print("{0:<22s} {1:9.4f}s {2:7d} round trips {3:7d} syscalls {4:8d} bytes".format(name,
+            results[name]['seconds'], results[name]['roundTrips'], results[name]['syscalls'], results[name]['wireBytes'])
+        )
+    document = dict(
+        python = platform.python_version(),
+        model = dict(baudrate = options.baudrate, latency = options.latency, turnaround = options.turnaround,
+            timeScale = options.timeScale),
+        results = results
+    )
+    if options.output == "-":
+        json.dump(document, sys.stdout, indent = 4, sort_keys = True)
+        print("")
+    elif options.output:
+        with open(options.output, "w") as fout:
+            json.dump(document, fout, indent = 4, sort_keys = True)
+
+    if options.saveBaseline:
+        with open(options.baseline, "w") as fout:
+            json.dump(document, fout, indent = 4, sort_keys = True)
+        print("Baseline saved to '{0!s}'.".format(options.baseline))
+        return 0
+    if not os.path.exists(options.baseline):
+        print("No baseline '{0!s}'.".format(options.baseline))
+        return 0
+    with open(options.baseline) as fin:
+        baseline = json.load(fin)
+    if baseline.get('model') != document['model']:
+        print("WARNING: baseline was recorded with a different latency model {0!r}.".format(baseline.get('model')))
+    failures = compare(results, baseline['results'], options.tolerance, options.checkTime)
+    for failure in failures:
+        print("REGRESSION: {0!s}".format(failure))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
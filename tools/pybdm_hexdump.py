@@ -35,15 +35,21 @@ from optparse import OptionParser, make_option
 import re
 import os
 import sys
-import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # Use this checkout.
+
 from pyBDM.compod12 import ComPod12
-from pyBDM.KevinRo import KevinRoBDM12
+from pyBDM.image import WRITERS
+from pyBDM.kevinro import KevinRoBDM12
+from pyBDM.stats import timer
 
 
 PODs = {'compod12': ComPod12, 'kevinro': KevinRoBDM12}
 
 VALID_BYTE_COUNTS = (0x01, 0x02, 0x04, 0x08)
 
+CHUNK_SIZE = 0x400  # Bytes per streamed chunk.
+
 def arrayToWord(arr):
     return functools.reduce(lambda v, accum: (v * 256) + accum, arr)
 
@@ -59,47 +65,57 @@ def slicer(iteratable, sliceLength, resultType = None):
 isprintable = lambda ch: 0x1F < ch < 127
 
 class Dumper(object):
+    LINE_LENGTH = 0x10
+
     def __init__(self, fout = sys.stdout, numAddressBits = 24):
         self._fout = fout
         self._rolloverMask = 2 ** numAddressBits
         self._nibbles = numAddressBits >> 2
         self._addressMask = "%%0%ux " % self._nibbles
 
-    def dumpRow(self, row):
+    def dumpRow(self, row, startAddr):
         pass
 
+    def dumpStream(self, stream):
+        """Dump `(address, data)` chunks as they arrive, rows may span chunks."""
+        pending = bytearray()
+        rowAddr = None
+        for address, data in stream:
+            if rowAddr is None or rowAddr + len(pending) != address:
+                if pending:
+                    self.dumpRow(pending, rowAddr)
+                del pending[ : ]
+                rowAddr = address
+            pending.extend(data)
+            complete = len(pending) - (len(pending) % self.LINE_LENGTH)
+            for offset in range(0, complete, self.LINE_LENGTH):
+                self.dumpRow(pending[offset : offset + self.LINE_LENGTH], rowAddr + offset)
+            del pending[ : complete]
+            rowAddr += complete
+            self._fout.flush()
+        if pending:
+            self.dumpRow(pending, rowAddr)
+
 class CanonicalDumper(Dumper):
-    LINE_LENGTH = 0x10
 
     def printHexBytes(self, row):
-        print '|%s|' % ('%s' * len(row) % unpack(*[isprintable(x) and chr(x) or '.' for x in row]))
+        self._fout.write('|%s|\n' % ''.join([isprintable(x) and chr(x) or '.' for x in row]))
 
     def dumpRow(self, row, startAddr):
-        startPos = 0
-        print self._addressMask % ((startPos + startAddr) % self._rolloverMask),
-        print '%02x ' * len(row) % unpack(*row),
+        self._fout.write(self._addressMask % (startAddr % self._rolloverMask))
+        self._fout.write('%02x ' * len(row) % unpack(*row))
         self.printHexBytes(row)
 
 
 def dumpData(dumper, data, offset = 0):
-    end = len(data)
-    startPos = 0x00
-    #startPos = startAddr
-    endPos = 0x10
-    while endPos < end:
-        row = data[startPos : endPos]
-        dumper.dumpRow(row, startPos)
-        startPos = endPos
-        endPos = endPos + 0x10
-    row = data[startPos : endPos]
-    dumper.dumpRow(row, startPos)
+    dumper.dumpStream([(offset, data)])
 
 
 class OneByteOctalDumper(Dumper):
     def dumpRow(self, row, startAddr):
-        startPos = 0
-        print self._addressMask % ((startPos + startAddr) % self._rolloverMask),
-        print '%03o ' * len(row) % unpack(*row)
+        self._fout.write(self._addressMask % (startAddr % self._rolloverMask))
+        self._fout.write('%03o ' * len(row) % unpack(*row))
+        self._fout.write('\n')
 
 class TwoByteOctalDumper(Dumper): pass
 
@@ -116,112 +132,20 @@ class FormattedDumper(Dumper): pass
 ###
 ###
 
-BASE = r'C:\projekte\csProjects\pyBDM\pyBDM\S12\programmer'
-START_OF_RAM = 0x1000
-
-def formatBin(image):
-    return ' '.join(["0x%02x" % b for b in image])
-
-class Loader(object):
-
-    def __init__ (self, pod):
-        self.pod = pod
-        self.prolog()
-
-    def prolog(self):
-        self.pod.reset()
-        d = self.pod.getPODVersion()
-        d = self.pod.readBDByte(0xff01)
-        d = self.pod.readByte(0x000b)
-
-        d = self.pod.readBDByte(0xff01)
-        self.pod.writeBDByte(0xff01, 0xc4)
-        d = self.pod.readByte(0x0030)
-
-        d = self.pod.readBDByte(0xff01)
-
-
-
-        """
-        RP_MJ_WRITE     Serial0 SUCCESS Length 3: E8 FF FE      ; READ_WORD
-        RP_MJ_READ      Serial0 SUCCESS Length 2: 4B D9
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 1: 63            ; READ_PC
-        RP_MJ_READ      Serial0 SUCCESS Length 2: 4A 4D
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 1: 64            ; READ_D
-        RP_MJ_READ      Serial0 SUCCESS Length 2: 00 00
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 1: 65            ; READ_X
-        RP_MJ_READ      Serial0 SUCCESS Length 2: 00 00
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 1: 66            ; READ_Y
-        RP_MJ_READ      Serial0 SUCCESS Length 2: 00 00
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 1: 67            ; READ_SP
-        RP_MJ_READ      Serial0 SUCCESS Length 2: 00 00
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 3: E4 FF 06      ; READ_BD_BYTE
-        RP_MJ_READ      Serial0 SUCCESS Length 1: D8
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 3: 43 4B D9      ; WRITE_PC
-        RP_MJ_READ      Serial0 SUCCESS Length 1: BC
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 3: 44 00 00      ; WRITE_D
-        RP_MJ_READ      Serial0 SUCCESS Length 1: BB
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 3: 45 00 00      ; WRITE_X
-        RP_MJ_READ      Serial0 SUCCESS Length 1: BA
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 3: 46 00 00      ; WRITE_Y
-        RP_MJ_READ      Serial0 SUCCESS Length 1: B9
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 3: 47 00 00      ; WRITE_SP
-        RP_MJ_READ      Serial0 SUCCESS Length 1: B8
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 4: C4 FF 06 D8   ; WRITE_BD_BYTE
-        RP_MJ_READ      Serial0 SUCCESS Length 1: 3B
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 3: E0 00 0B      ; READ_BYTE
-        RP_MJ_READ      Serial0 SUCCESS Length 1: 00
-
-        RP_MJ_WRITE     Serial0 SUCCESS Length 4: 83 00 1A 02   ; READ_AREA
-        RP_MJ_READ      Serial0 SUCCESS Length 2: 00 12
-        """
-
-    def loadFlasherImage(self):
-        flashImage = bytearray(open(os.path.join(BASE, 'flash.bin'), 'rb').read())
-        print "Loading Flasher Image..."
-        #print formatBin(flashImage)
-        self.pod.writeArea(START_OF_RAM, flashImage)
-        print "Done."
-        readBack = self.pod.readArea(START_OF_RAM, len(flashImage))
-        dumpData(CanonicalDumper(), readBack)
-
-        #print "PC: %#x" % (self.pod.bdmModule)
-
-        #readBack = self.pod.readArea(START_OF_RAM, len(flashImage))
-        #dumpData(CanonicalDumper(), readBack)
-        #assert(flashImage == readBack)
-###
-###
-###
-
 import types
-from pyBDM.BDM import hexDump
 
 def dumpa(arr):
-    return ' '.join([("0x%02x" % ord(x)) for x in arr])
+    return ' '.join([("0x%02x" % x) for x in bytearray(arr)])
 
 def injectReader(pod):  # Example for DI!!!
     reader = pod.port.read
     #print reader
     def read(self, length):
         data = reader(length)
-        print "*** READ[%u]: '%s'." % (length, dumpa(data))
+        print("*** READ[%u]: '%s'." % (length, dumpa(data)))
         return data
     #print help(types.MethodType)
-    print
+    print()
     pod.port.read = types.MethodType(read, pod)
 
 
@@ -243,7 +167,11 @@ def main():
                 action="store_true", dest = "oneByteChar"),
         make_option("-n", help = "interpret only length bytes of input", dest = "length", action = "store", type = "int", default = 0x100),
         make_option("-s", help = "skip offset bytes from the beginning", dest = "offset", action = "store" , type = "int", default = 0x0000),
-        make_option("-p", help = "Communication port (number or name according to your operating systems conventions).", dest ="port", action = "store", default = "0")
+        make_option("-p", help = "Communication port (number or name according to your operating systems conventions).", dest ="port", action = "store", default = "0"),
+        make_option("-B", help = "negotiate the fastest working link (ComPOD12 baud rate, Kevin Ross extended speed)", dest = "negotiate", action = "store_true", default = False),
+        make_option("-O", help = "write an image file instead of dumping", dest = "output", action = "store", default = None),
+        make_option("-T", help = "image format [%s]" % '|'.join(sorted(WRITERS.keys())), dest = "format", action = "store",
+                type = "choice", choices = sorted(WRITERS.keys()), default = "bin"),
     ]
 
 
@@ -282,32 +210,37 @@ def main():
     logger.debug("STARTING '%s'." % os.path.split(sys.argv[0x00])[0x01])
     logger.debug('=' * 43)
     pod = podDevice(port, 38400)
-    pod.connect()
+    if options.negotiate and hasattr(podDevice, 'BAUDRATES'):
+        pod.connect(podDevice.BAUDRATES)
+    else:
+        pod.connect()
 
     #injectReader(pod)
 
     pod.reset()
     pod.targetHalt()
+    if options.negotiate and hasattr(pod, 'negotiateSpeed'):
+        pod.negotiateSpeed()    # Needs the halted target.
 
     pod.bdmModule.enableFirmware()
     logger.info("BDM-POD: '%s'." % pod.getPODVersion())
     logger.info('Reading %u bytes starting @ 0x%04x.' % (length, startAddr))
-    startTime = time.clock()
-
-
-    loader = Loader(pod)
-    loader.loadFlasherImage()
-    #print hex(pod.readWord(0x1000)), hex(pod.readWord(0x1002)), hex(pod.readWord(0x1004)), hex(pod.readWord(0x1006)), hex(pod.readWord(0x1008))
+    startTime = timer()
 
-    data = pod.readArea(startAddr, length)
-    elapsedTime = time.clock() - startTime
+    stream = pod.iterArea(startAddr, length, CHUNK_SIZE)
+    if options.output:
+        mode = 'wb' if options.format == 'bin' else 'w'
+        with open(options.output, mode) as fout:
+            WRITERS[options.format](stream, fout)
+    else:
+        dumper = OneByteOctalDumper() if options.oneByteOctal else CanonicalDumper()
+        dumper.dumpStream(stream)
+    elapsedTime = timer() - startTime
     logger.info("%2.2f seconds ==> %2.2f bytes/sec.", elapsedTime, length / elapsedTime)
+    logger.debug("Transport statistics:\n%s", pod.stats())
     logger.info('Done.')
     pod.close()
 
-    dumpData(CanonicalDumper(), data)
-    #dumpData(OneByteOctalDumper(), data)
-
 
 # serial.serialutil.SerialException:
 ## Log to file (suggested for verbosity level DEBUG).
@@ -394,7 +327,7 @@ def testFormatParser():
             di = match.groupdict()
             format = di.get('FORMAT', '')
             rrr = parseFormat(format)
-            print di
+            print(di)
             if di['ITER_COUNT'] is None and di['BYTE_COUNT'] is None:
 
                 # Single Literal.
@@ -403,7 +336,7 @@ def testFormatParser():
                 consumesBytes = False
             elif di['BYTE_COUNT'] is None:
 
-                                            # gengt eigentlich!
+                                            # genügt eigentlich!
 
                 consumesBytes = False
             else:
@@ -414,7 +347,7 @@ def testFormatParser():
                     raise ParameterError("Invalid byte count '%u' in format string."
                              % byteCount)
                 totalBytes += iterCount * byteCount
-        print
+        print()
 
         # raise ParameterError("Total bytes to output == 0.")
 